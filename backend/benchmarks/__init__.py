@@ -0,0 +1 @@
+"""Offline benchmarks for the pipeline stages; see pipeline_bench for the full suite."""
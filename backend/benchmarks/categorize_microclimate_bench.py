@@ -0,0 +1,90 @@
+"""
+Benchmark: vectorized categorize_microclimate_array vs. the row-wise categorize_microclimate path.
+
+Run from the repository root:
+    python -m backend.benchmarks.categorize_microclimate_bench
+    python -m backend.benchmarks.categorize_microclimate_bench --sizes 10000 100000 --max-rowwise 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import (
+    categorize_microclimate,
+    categorize_microclimate_array,
+)
+
+
+def make_grid_cells(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic city-scale raster cells covering every category, including boundary values
+    and NaNs, so the equality check exercises the rule ordering.
+    """
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'avg_temp_c': rng.uniform(-15, 40, n).round(1),
+        'avg_humidity_percent': rng.uniform(5, 100, n).round(0),
+        'total_rainfall_mm': rng.uniform(0, 2000, n).round(0),
+    })
+    # Sprinkle exact threshold values and missing readings
+    boundary = rng.random(n) < 0.05
+    data.loc[boundary, 'avg_temp_c'] = rng.choice([0, 10, 15, 25, 28], boundary.sum())
+    data.loc[rng.random(n) < 0.01, 'total_rainfall_mm'] = np.nan
+    return data
+
+
+def _time(fn, repeat: int = 3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(sizes, max_rowwise: int):
+    print(f"{'n':>10} {'row-wise (s)':>14} {'vectorized (s)':>15} {'speedup':>9}  match")
+    for n in sizes:
+        data = make_grid_cells(n)
+        vec_time, vec_result = _time(lambda: categorize_microclimate_array(
+            data['avg_temp_c'], data['avg_humidity_percent'], data['total_rainfall_mm']
+        ))
+
+        if n <= max_rowwise:
+            row_time, row_result = _time(lambda: data.apply(
+                lambda r: categorize_microclimate(
+                    r['avg_temp_c'], r['avg_humidity_percent'], r['total_rainfall_mm']
+                ),
+                axis=1
+            ), repeat=1)
+            match = bool((row_result.astype(str) == vec_result.astype(str)).all())
+            row_label = f"{row_time:14.4f}"
+        else:
+            # Too slow to run in full; extrapolate from a sample of rows
+            sample = data.iloc[:max_rowwise]
+            sample_time, _ = _time(lambda: sample.apply(
+                lambda r: categorize_microclimate(
+                    r['avg_temp_c'], r['avg_humidity_percent'], r['total_rainfall_mm']
+                ),
+                axis=1
+            ), repeat=1)
+            row_time = sample_time * n / len(sample)
+            match = None
+            row_label = f"~{row_time:13.4f}"
+
+        speedup = row_time / vec_time if vec_time else float('inf')
+        print(f"{n:>10} {row_label} {vec_time:15.4f} {speedup:8.0f}x  {'-' if match is None else match}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**4, 10**5, 10**6, 10**7])
+    parser.add_argument(
+        '--max-rowwise', type=int, default=10**5,
+        help="Largest n for which the row-wise path is run in full (larger sizes are extrapolated)."
+    )
+    args = parser.parse_args()
+    run(args.sizes, args.max_rowwise)
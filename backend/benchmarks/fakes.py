@@ -0,0 +1,230 @@
+"""
+Local stand-ins for the pipeline's external services, so benchmarks run offline:
+
+    StubWeatherServer   - OpenWeatherMap timemachine endpoint served from a local HTTP server
+    InMemorySupabase    - the subset of the Supabase client the recommender uses, over in-memory tables
+    scripted_react_llm  - a LangChain LLM that drives the ReAct agent through one tool call
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def _stub_hourly(lat: float, lon: float, dt: int, hours: int = 24) -> List[Dict[str, Any]]:
+    """
+    Deterministic hourly weather for a (lat, lon, day): the same request always gets the same data.
+    """
+    digest = hashlib.sha256(f"{lat:.4f},{lon:.4f},{dt}".encode()).digest()
+    rng = random.Random(digest)
+    base_temp = 30 - abs(lat) / 3 + rng.uniform(-3, 3)
+    base_humidity = rng.uniform(30, 90)
+    hourly = []
+    for hour in range(hours):
+        entry = {
+            'dt': dt + hour * 3600,
+            'temp': round(base_temp + rng.uniform(-4, 4), 2),
+            'humidity': round(min(100.0, max(0.0, base_humidity + rng.uniform(-10, 10))), 1),
+        }
+        if rng.random() < 0.2:
+            entry['rain'] = {'1h': round(rng.uniform(0, 5), 2)}
+        hourly.append(entry)
+    return hourly
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections when a pooled client opens many at once
+    request_queue_size = 1024
+
+
+class StubWeatherServer:
+    """
+    Threaded local HTTP server answering /data/2.5/onecall/timemachine like OpenWeatherMap.
+
+    Point ingestion at it with base_url=server.base_url (or OPENWEATHERMAP_BASE_URL).
+
+    Args:
+        latency_s (float): Delay added to every response, to model network round trips.
+        error_rate (float): Fraction of requests answered with 503.
+        throttle_every (int): Answer every n-th request with 429 + Retry-After (0 disables).
+        seed (int): Seed for the error draws.
+    """
+
+    def __init__(self, latency_s: float = 0.0, error_rate: float = 0.0, throttle_every: int = 0, seed: int = 0):
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.throttle_every = throttle_every
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[_StubHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes; with Nagle on, a kept-alive connection
+            # stalls ~40 ms per response on the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    count = stub.requests
+                    fail = stub._rng.random() < stub.error_rate
+                if stub.latency_s:
+                    time.sleep(stub.latency_s)
+
+                if stub.throttle_every and count % stub.throttle_every == 0:
+                    return self._send(429, {'cod': 429, 'message': 'rate limited'}, {'Retry-After': '0.05'})
+                if fail:
+                    return self._send(503, {'cod': 503, 'message': 'unavailable'})
+
+                query = parse_qs(urlparse(self.path).query)
+                try:
+                    lat = float(query['lat'][0])
+                    lon = float(query['lon'][0])
+                    dt = int(query['dt'][0])
+                except (KeyError, ValueError):
+                    return self._send(400, {'cod': 400, 'message': 'wrong parameters'})
+                self._send(200, {'lat': lat, 'lon': lon, 'hourly': _stub_hourly(lat, lon, dt)})
+
+            def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubWeatherServer":
+        self._server = _StubHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StubWeatherServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _Response:
+    def __init__(self, data: List[Dict[str, Any]]):
+        self.data = data
+
+
+class _TableQuery:
+    def __init__(self, client: "InMemorySupabase", rows: List[Dict[str, Any]]):
+        self._client = client
+        self._rows = rows
+        self._filters: List = []
+        self._limit: Optional[int] = None
+
+    def select(self, *columns: str) -> "_TableQuery":
+        return self
+
+    def eq(self, column: str, value: Any) -> "_TableQuery":
+        self._filters.append((column, value))
+        return self
+
+    def limit(self, n: int) -> "_TableQuery":
+        self._limit = n
+        return self
+
+    async def execute(self) -> _Response:
+        self._client.executes += 1
+        if self._client.latency_s:
+            await asyncio.sleep(self._client.latency_s)
+        rows = [row for row in self._rows if all(row.get(col) == val for col, val in self._filters)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return _Response([dict(row) for row in rows])
+
+
+class InMemorySupabase:
+    """
+    Async Supabase client stand-in: client.table(name).select('*').eq(...).execute().
+
+    Pass it to PlantRecommender(supabase_client=...) to run the recommender without a database.
+
+    Args:
+        tables (Dict[str, List[Dict]]): Table name -> rows.
+        latency_s (float): Delay added to every execute(), to model the database round trip.
+    """
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], latency_s: float = 0.0):
+        self.tables = tables
+        self.latency_s = latency_s
+        self.executes = 0
+
+    def table(self, name: str) -> _TableQuery:
+        return _TableQuery(self, self.tables.get(name, []))
+
+
+def scripted_react_llm(action_input: Dict[str, Any], tool_name: str = 'recommend_plants_tool',
+                       final_answer: str = 'Here are the recommended plants.', token_delay_s: float = 0.0):
+    """
+    A LangChain LLM that answers like a well-behaved ReAct model: first it calls tool_name with
+    action_input, then, once it sees the observation, it returns a final answer. It never
+    touches the network, so agent overhead can be measured on its own.
+
+    When streamed it emits its answer word by word, token_delay_s apart, like a slow local model.
+    """
+    from langchain_core.language_models.llms import LLM
+    from langchain_core.outputs import GenerationChunk
+
+    class ScriptedReActLLM(LLM):
+        @property
+        def _llm_type(self) -> str:
+            return 'scripted-react'
+
+        def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None,
+                    **kwargs: Any) -> Iterator[GenerationChunk]:
+            for token in re.findall(r"\S+\s*|\s+", self._call(prompt, stop)):
+                if token_delay_s:
+                    time.sleep(token_delay_s)
+                chunk = GenerationChunk(text=token)
+                if run_manager is not None:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+
+        def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+            # The ReAct scratchpad ends with "Thought:" once a tool observation has been added
+            if prompt.rstrip().endswith('Thought:'):
+                return f"I now know the final answer\nFinal Answer: {final_answer}"
+            return (
+                "Thought: I should look up suitable plants.\n"
+                f"Action: {tool_name}\n"
+                f"Action Input: {json.dumps(action_input)}"
+            )
+
+    return ScriptedReActLLM()
@@ -0,0 +1,104 @@
+"""
+Deterministic synthetic data for the benchmarks: sample points, zoning features, plant
+species rows and plant selections. Every generator takes a seed so runs are comparable
+between commits.
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import FEATURE_COLUMNS, MICROCLIMATE_CATEGORIES
+
+SOIL_TYPES = ['loamy', 'sandy', 'clay', 'silty', 'peaty', 'chalky']
+GOAL_PHRASES = [
+    'pollinator-friendly', 'bird habitat', 'low-water', 'shade', 'erosion control',
+    'native', 'fast-growing', 'edible', 'windbreak', 'evergreen',
+]
+
+
+def sample_points(n: int, seed: int = 0, centre: Tuple[float, float] = (40.7128, -74.0060),
+                  spread_deg: float = 0.5) -> List[Tuple[float, float]]:
+    """
+    n distinct (lat, lon) points scattered around centre, rounded like real sample grids.
+    """
+    rng = np.random.default_rng(seed)
+    lats = np.round(centre[0] + rng.uniform(-spread_deg, spread_deg, n), 5)
+    lons = np.round(centre[1] + rng.uniform(-spread_deg, spread_deg, n), 5)
+    return list(dict.fromkeys(zip(lats.tolist(), lons.tolist())))
+
+
+def zoning_features(n: int, n_zones: int = 4, seed: int = 0) -> pd.DataFrame:
+    """
+    n rows of FEATURE_COLUMNS drawn around n_zones climate centres, so clustering has real
+    structure to find, with a few missing readings.
+    """
+    rng = np.random.default_rng(seed)
+    centres = np.column_stack([
+        rng.uniform(0, 32, n_zones),      # temperature, C
+        rng.uniform(25, 90, n_zones),     # humidity, %
+        rng.uniform(100, 1800, n_zones),  # rainfall, mm
+    ])
+    zone = rng.integers(0, n_zones, n)
+    noise = rng.normal(0, 1, (n, 3)) * np.array([1.5, 5.0, 80.0])
+    data = pd.DataFrame(np.round(centres[zone] + noise, 2), columns=FEATURE_COLUMNS)
+    data['lat'] = np.round(40.7 + rng.uniform(-0.5, 0.5, n), 5)
+    data['lon'] = np.round(-74.0 + rng.uniform(-0.5, 0.5, n), 5)
+    data.loc[rng.random(n) < 0.01, 'total_rainfall_mm'] = np.nan
+    return data
+
+
+def plant_species(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    n rows shaped like the Supabase 'plant_species' table.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        ph_min = round(float(rng.uniform(4.5, 7.0)), 1)
+        n_tags = int(rng.integers(1, 4))
+        n_goals = int(rng.integers(1, 4))
+        rows.append({
+            'id': i + 1,
+            'common_name': f'Species {i + 1}',
+            'scientific_name': f'Plantae syntheticum {i + 1}',
+            'ideal_microclimate_tags': list(rng.choice(MICROCLIMATE_CATEGORIES, n_tags, replace=False)),
+            'ideal_soil_type': str(rng.choice(SOIL_TYPES)),
+            # Some species leave the pH range open, like real catalog rows
+            'ph_level_min': None if rng.random() < 0.05 else ph_min,
+            'ph_level_max': None if rng.random() < 0.05 else round(ph_min + float(rng.uniform(0.5, 2.5)), 1),
+            'biodiversity_benefit': ', '.join(rng.choice(GOAL_PHRASES, n_goals, replace=False)),
+            'carbon_seq_rate_kg_per_year_per_plant': round(float(rng.lognormal(1.5, 1.0)), 2),
+        })
+    return rows
+
+
+def recommendation_queries(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    n keyword-argument dicts for PlantRecommender.recommend_plants.
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'microclimate_category': str(rng.choice(MICROCLIMATE_CATEGORIES)),
+            'soil_type': str(rng.choice(SOIL_TYPES)),
+            'ph_level': round(float(rng.uniform(5.0, 8.0)), 1),
+            'user_goals': list(rng.choice(GOAL_PHRASES, int(rng.integers(0, 3)), replace=False)),
+        }
+        for _ in range(n)
+    ]
+
+
+def plant_selections(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    n plant selection dicts for calculate_carbon_sequestration_projection.
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'common_name': f'Species {i + 1}',
+            'carbon_seq_rate_kg_per_year_per_plant': round(float(rng.lognormal(1.5, 1.0)), 2),
+            'quantity': int(rng.integers(1, 200)),
+        }
+        for i in range(n)
+    ]
@@ -0,0 +1,127 @@
+"""
+Benchmark: cold import time of the ai_pipeline modules, checked against a regression budget.
+
+Each module is imported in a fresh interpreter with `python -X importtime`; the cumulative
+time of the module's own entry is taken (best of --repeat runs). A module also fails the
+check if importing it pulls in a heavy dependency it is supposed to load lazily.
+
+Run from the repository root:
+    python -m backend.benchmarks.import_time
+    python -m backend.benchmarks.import_time --repeat 10 --json import_times.json
+
+Exits with status 1 if any module is over budget or imports a forbidden dependency.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+PIPELINE = 'backend.src.ai_pipeline'
+
+# module -> (budget in ms, dependencies that must not be imported eagerly)
+BUDGETS: Dict[str, Tuple[float, List[str]]] = {
+    PIPELINE: (25, ['numpy', 'pandas', 'sklearn', 'httpx', 'supabase', 'langchain_core']),
+    f'{PIPELINE}.instrumentation': (25, ['numpy', 'pandas', 'dotenv']),
+    f'{PIPELINE}.caching.persistent_cache': (50, ['numpy', 'pandas']),
+    f'{PIPELINE}.carbon_modeling.calculator': (250, ['pandas', 'sklearn']),
+    f'{PIPELINE}.carbon_modeling.planting_optimizer': (250, ['pandas', 'sklearn']),
+    f'{PIPELINE}.carbon_modeling.uncertainty': (300, ['pandas', 'sklearn']),
+    f'{PIPELINE}.data_processing.data_ingestion': (400, ['pandas', 'httpx', 'requests', 'dotenv', 'sklearn']),
+    f'{PIPELINE}.data_processing.climatology': (300, ['pandas', 'pyarrow', 'sklearn']),
+    f'{PIPELINE}.data_processing.sensor_stream': (150, ['pandas', 'httpx', 'dotenv']),
+    f'{PIPELINE}.data_processing.soil_raster': (250, ['pandas']),
+    f'{PIPELINE}.microclimate_analysis.analyzer': (250, ['pandas', 'sklearn', 'pyarrow']),
+    f'{PIPELINE}.microclimate_analysis.zoning_model': (250, ['pandas', 'sklearn', 'scipy']),
+    f'{PIPELINE}.plant_selection.plant_catalog': (25, ['numpy', 'pandas']),
+    f'{PIPELINE}.plant_selection.recommender': (200, ['supabase', 'dotenv', 'pandas']),
+    f'{PIPELINE}.caching.llm_cache': (600, ['langchain_community', 'numpy', 'pandas']),
+    f'{PIPELINE}.langchain_integration.tool_cache': (50, ['numpy', 'pandas', 'langchain_core']),
+    f'{PIPELINE}.langchain_integration.chain_builder': (2500, ['langchain_community', 'supabase']),
+    f'{PIPELINE}.langchain_integration.query_router': (2500, ['langchain_community', 'supabase', 'sklearn']),
+    f'{PIPELINE}.langchain_integration.agent_streaming': (2500, ['langchain_community', 'supabase', 'sklearn']),
+}
+
+
+def measure(module: str, python: str = sys.executable) -> Tuple[Optional[float], List[str], Optional[str]]:
+    """
+    Imports module in a fresh interpreter.
+
+    Returns:
+        (cumulative import time in ms or None on failure, sorted sys.modules, error message)
+    """
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    # Run without the .env side effects the modules are meant to defer
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('SUPABASE_', 'OPENWEATHERMAP_'))}
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.getcwd(), env.get('PYTHONPATH')]))
+    proc = subprocess.run(
+        [python, '-X', 'importtime', '-c', code], capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        return None, [], proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed'
+
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    modules = json.loads(proc.stdout.strip().splitlines()[-1])
+    return (cumulative_us / 1000 if cumulative_us is not None else None), modules, None
+
+
+def run(modules: List[str], repeat: int, budget_scale: float) -> List[Dict]:
+    results = []
+    print(f"{'module':<58} {'best (ms)':>10} {'budget':>8}  status")
+    for module in modules:
+        budget_ms, forbidden = BUDGETS[module]
+        budget_ms *= budget_scale
+        timings, loaded, error = [], [], None
+        for _ in range(repeat):
+            elapsed, loaded, error = measure(module)
+            if elapsed is None:
+                break
+            timings.append(elapsed)
+
+        leaked = sorted(dep for dep in forbidden if dep in loaded)
+        best = min(timings) if timings else None
+        if error or best is None:
+            status = f"ERROR ({error or 'module not found in importtime output'})"
+        elif best > budget_ms:
+            status = "OVER BUDGET"
+        elif leaked:
+            status = f"EAGER IMPORTS: {', '.join(leaked)}"
+        else:
+            status = "ok"
+
+        best_label = f"{best:10.1f}" if best is not None else f"{'-':>10}"
+        print(f"{module:<58} {best_label} {budget_ms:8.0f}  {status}")
+        results.append({
+            'module': module,
+            'best_ms': best,
+            'timings_ms': timings,
+            'budget_ms': budget_ms,
+            'eager_imports': leaked,
+            'ok': status == "ok",
+        })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=list(BUDGETS), choices=list(BUDGETS))
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh-interpreter runs per module (best is kept).")
+    parser.add_argument(
+        '--budget-scale', type=float, default=1.0,
+        help="Multiplier applied to every budget, e.g. 2 on slow CI machines."
+    )
+    parser.add_argument('--json', help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(args.modules, args.repeat, args.budget_scale)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version, 'results': results}, f, indent=2)
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
@@ -0,0 +1,353 @@
+"""
+Benchmark suite: latency and throughput of every pipeline stage, fully offline.
+
+External services are replaced by the local fakes in backend.benchmarks.fakes (stub weather
+server, in-memory plant_species table, scripted LLM) and inputs come from the seeded
+generators in backend.benchmarks.generators, so runs are comparable between commits.
+
+Stages and their size sweeps:
+    weather     fetch_weather_data (sequential) and fetch_weather_data_many (concurrent), n points
+    zoning      identify_microclimate_zones, n feature rows
+    recommend   recommend_plants / recommend_plants_batch over a catalog of n species
+    projection  calculate_carbon_sequestration_projection, n plant selections
+    agent       PlantRecommenderTool.ainvoke and a full agent run with a scripted LLM, n species
+
+Run from the repository root:
+    python -m backend.benchmarks.pipeline_bench --json results/HEAD.json
+    python -m backend.benchmarks.pipeline_bench --quick --stages zoning recommend
+    python -m backend.benchmarks.pipeline_bench --json new.json --compare results/HEAD.json
+
+Exits with status 1 if a case could not run (it is still written to the JSON, with 'skipped' set
+to the error), or, with --compare, if any case's median latency regressed by more than --threshold
+or a case in the baseline is missing from this run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from backend.benchmarks import generators
+from backend.benchmarks.fakes import InMemorySupabase, StubWeatherServer, scripted_react_llm
+
+SIZES = {
+    'weather': [10, 100, 1000],
+    'zoning': [1_000, 10_000, 100_000],
+    'recommend': [100, 1_000, 10_000],
+    'projection': [10, 100, 1_000],
+    'agent': [100, 1_000, 10_000],
+}
+QUICK_SIZES = {
+    'weather': [10, 100],
+    'zoning': [1_000, 10_000],
+    'recommend': [100, 1_000],
+    'projection': [10, 100],
+    'agent': [100],
+}
+# Sequential single-point fetches are only run up to this many points
+MAX_SEQUENTIAL_FETCHES = 100
+QUERIES_PER_ROUND = 200
+
+
+def _skipped(stage: str, case: str, size: int, error: Exception) -> Dict[str, Any]:
+    """
+    Result of a case that could not run: kept in the report so its absence can't go unnoticed.
+    """
+    return {'stage': stage, 'case': case, 'size': size, 'skipped': f"{type(error).__name__}: {error}"}
+
+
+def _summary(stage: str, case: str, size: int, items: int, samples_s: List[float], **extra: Any) -> Dict[str, Any]:
+    samples_ms = np.array(samples_s) * 1000
+    p50 = float(np.percentile(samples_ms, 50))
+    return {
+        'stage': stage,
+        'case': case,
+        'size': size,
+        'items': items,
+        'repeat': len(samples_s),
+        'latency_ms': {
+            'min': round(float(samples_ms.min()), 3),
+            'p50': round(p50, 3),
+            'p95': round(float(np.percentile(samples_ms, 95)), 3),
+            'mean': round(float(samples_ms.mean()), 3),
+        },
+        'throughput_per_s': round(items / (p50 / 1000), 2) if p50 > 0 else None,
+        **extra,
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def measure_async(fn: Callable[[], Awaitable[Any]], repeat: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_weather(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    from backend.src.ai_pipeline.data_processing.data_ingestion import (
+        default_weather_dates,
+        fetch_weather_data,
+        fetch_weather_data_many,
+    )
+    from backend.src.ai_pipeline.data_processing.request_scheduler import RequestScheduler
+
+    results = []
+    date = default_weather_dates(1)[0]
+    with StubWeatherServer(latency_s=0.002) as server:
+        # The stub ignores the key; ingestion only requires one to be set
+        os.environ.setdefault('OPENWEATHERMAP_API_KEY', 'benchmark')
+        previous_base_url = os.environ.get('OPENWEATHERMAP_BASE_URL')
+        os.environ['OPENWEATHERMAP_BASE_URL'] = server.base_url
+        try:
+            for n in sizes:
+                points = generators.sample_points(n)
+                if n <= MAX_SEQUENTIAL_FETCHES:
+                    # Unthrottled scheduler, as for fetch_many below
+                    sequential_scheduler = RequestScheduler(calls_per_minute=1e9)
+                    samples = measure(
+                        lambda: [
+                            fetch_weather_data(lat, lon, date, use_cache=False, scheduler=sequential_scheduler)
+                            for lat, lon in points
+                        ],
+                        repeat
+                    )
+                    results.append(_summary('weather', 'fetch_weather_data', n, len(points), samples))
+
+                async def fetch_many():
+                    # Unthrottled scheduler: measure the client, not the API plan's rate limit
+                    scheduler = RequestScheduler(calls_per_minute=1e9)
+                    return await fetch_weather_data_many(
+                        points, [date], use_cache=False, scheduler=scheduler, base_url=server.base_url
+                    )
+
+                samples = asyncio.run(measure_async(fetch_many, repeat))
+                results.append(_summary('weather', 'fetch_weather_data_many', n, len(points), samples))
+        finally:
+            if previous_base_url is None:
+                os.environ.pop('OPENWEATHERMAP_BASE_URL', None)
+            else:
+                os.environ['OPENWEATHERMAP_BASE_URL'] = previous_base_url
+    return results
+
+
+def bench_zoning(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    from backend.src.ai_pipeline.microclimate_analysis.analyzer import identify_microclimate_zones
+
+    results = []
+    for n in sizes:
+        data = generators.zoning_features(n)
+        samples = measure(lambda: identify_microclimate_zones(data, n_clusters=4), repeat)
+        results.append(_summary('zoning', 'identify_microclimate_zones', n, n, samples))
+    return results
+
+
+def _recommender(n_species: int):
+    from backend.src.ai_pipeline.plant_selection.recommender import PlantRecommender
+
+    client = InMemorySupabase({'plant_species': generators.plant_species(n_species)})
+    return PlantRecommender(catalog_ttl_seconds=None, supabase_client=client)
+
+
+def bench_recommend(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    queries = generators.recommendation_queries(QUERIES_PER_ROUND)
+    for n in sizes:
+        recommender = _recommender(n)
+
+        async def run_stage():
+            stage_results = []
+            samples = await measure_async(recommender.refresh_catalog, repeat)
+            stage_results.append(_summary('recommend', 'catalog_load', n, n, samples))
+
+            async def sequential_queries():
+                for query in queries:
+                    await recommender.recommend_plants(**query)
+
+            samples = await measure_async(sequential_queries, repeat)
+            stage_results.append(_summary('recommend', 'recommend_plants', n, len(queries), samples))
+
+            zones = [{'zone_id': i, **query} for i, query in enumerate(queries)]
+            samples = await measure_async(lambda: recommender.recommend_plants_batch(zones), repeat)
+            stage_results.append(_summary('recommend', 'recommend_plants_batch', n, len(zones), samples))
+            return stage_results
+
+        results.extend(asyncio.run(run_stage()))
+    return results
+
+
+def bench_projection(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    from backend.src.ai_pipeline.carbon_modeling.calculator import calculate_carbon_sequestration_projection
+
+    results = []
+    for n in sizes:
+        selections = generators.plant_selections(n)
+        samples = measure(lambda: calculate_carbon_sequestration_projection(selections, 20), repeat)
+        results.append(_summary('projection', 'calculate_carbon_sequestration_projection', n, n, samples))
+    return results
+
+
+def bench_agent(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    from backend.src.ai_pipeline.caching.llm_cache import PersistentLLMCache
+    from backend.src.ai_pipeline.langchain_integration.chain_builder import PlantRecommenderTool, build_ai_agent
+    from backend.src.ai_pipeline.langchain_integration.tool_cache import ToolResultCache
+
+    results = []
+    queries = generators.recommendation_queries(QUERIES_PER_ROUND)
+    # ReAct agents hand the tool its whole 'Action Input' as one JSON string
+    tool_inputs = [json.dumps(query) for query in queries]
+    for n in sizes:
+        recommender = _recommender(n)
+
+        async def run_stage():
+            await recommender.refresh_catalog()
+            stage_results = []
+
+            # Cached cases: the warm-up round fills the caches, the timed rounds are all hits
+            for case, result_cache in [('tool_ainvoke', None), ('tool_ainvoke_cached', ToolResultCache())]:
+                tool = PlantRecommenderTool(recommender=recommender, result_cache=result_cache)
+
+                async def tool_calls():
+                    for tool_input in tool_inputs:
+                        await tool.ainvoke(tool_input)
+
+                samples = await measure_async(tool_calls, repeat)
+                stage_results.append(_summary('agent', case, n, len(tool_inputs), samples))
+
+            for case, use_cache in [('agent_ainvoke', False), ('agent_ainvoke_cached', True)]:
+                try:
+                    agent = build_ai_agent(
+                        recommender, llm=scripted_react_llm(queries[0]), verbose=False,
+                        llm_cache=PersistentLLMCache(), tool_cache=ToolResultCache(), use_cache=use_cache
+                    )
+                except ImportError as e:
+                    stage_results.append(_skipped('agent', case, n, e))
+                    continue
+                samples = await measure_async(
+                    lambda: agent.ainvoke({'input': 'Which plants suit a temperate-humid site with loamy soil?'}),
+                    repeat
+                )
+                stage_results.append(_summary('agent', case, n, 1, samples))
+            return stage_results
+
+        results.extend(asyncio.run(run_stage()))
+    return results
+
+
+STAGES = {
+    'weather': bench_weather,
+    'zoning': bench_zoning,
+    'recommend': bench_recommend,
+    'projection': bench_projection,
+    'agent': bench_agent,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float) -> bool:
+    """
+    Prints median-latency ratios against a baseline run. Returns False if any case regressed
+    by more than threshold (e.g. 1.25 = 25% slower), or if a case measured in the baseline was
+    skipped or not run this time (only for the stages this run covered).
+    """
+    baseline_by_key = {(r['stage'], r['case'], r['size']): r for r in baseline if 'skipped' not in r}
+    current_keys = {(r['stage'], r['case'], r['size']) for r in current if 'skipped' not in r}
+    stages_run = {r['stage'] for r in current}
+    ok = True
+    print(f"\n{'stage':<11} {'case':<42} {'size':>8} {'base p50':>10} {'new p50':>10} {'ratio':>7}")
+    for key, base in baseline_by_key.items():
+        if key[0] in stages_run and key not in current_keys:
+            ok = False
+            print(f"{key[0]:<11} {key[1]:<42} {key[2]:>8} {base['latency_ms']['p50']:>10.2f} {'-':>10} {'-':>7}  MISSING")
+    for result in current:
+        base = baseline_by_key.get((result['stage'], result['case'], result['size']))
+        if base is None or 'skipped' in result:
+            continue
+        base_p50, new_p50 = base['latency_ms']['p50'], result['latency_ms']['p50']
+        ratio = new_p50 / base_p50 if base_p50 else float('inf')
+        flag = '  REGRESSION' if ratio > threshold else ''
+        ok = ok and not flag
+        print(f"{result['stage']:<11} {result['case']:<42} {result['size']:>8} "
+              f"{base_p50:>10.2f} {new_p50:>10.2f} {ratio:>6.2f}x{flag}")
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--quick', action='store_true', help="Smaller size sweeps for a fast smoke run.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed repetitions per case (after one warm-up).")
+    parser.add_argument('--json', help="Write the results to this JSON file.")
+    parser.add_argument('--compare', help="Baseline JSON file from an earlier run to compare against.")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Median-latency ratio counted as a regression.")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    all_results: List[Dict[str, Any]] = []
+    print(f"{'stage':<11} {'case':<42} {'size':>8} {'p50 (ms)':>10} {'p95 (ms)':>10} {'items/s':>12}")
+    for stage in args.stages:
+        for result in STAGES[stage](sizes[stage], args.repeat):
+            all_results.append(result)
+            if 'skipped' in result:
+                print(f"{result['stage']:<11} {result['case']:<42} {result['size']:>8}  SKIPPED ({result['skipped']})")
+                continue
+            print(f"{result['stage']:<11} {result['case']:<42} {result['size']:>8} "
+                  f"{result['latency_ms']['p50']:>10.2f} {result['latency_ms']['p95']:>10.2f} "
+                  f"{result['throughput_per_s'] or 0:>12.1f}")
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'quick': args.quick,
+            'repeat': args.repeat,
+        },
+        'results': all_results,
+    }
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(all_results)} results to {args.json}")
+
+    ok = True
+    if args.compare:
+        with open(args.compare) as f:
+            baseline_report = json.load(f)
+        ok = compare(all_results, baseline_report['results'], args.threshold)
+    skipped = [result for result in all_results if 'skipped' in result]
+    if skipped:
+        print(f"\n{len(skipped)} case(s) could not run: " + ', '.join(f"{r['case']} (n={r['size']})" for r in skipped))
+    if skipped or not ok:
+        sys.exit(1)
@@ -0,0 +1,42 @@
+"""
+Verdant Green AI pipeline: weather/soil ingestion, microclimate zoning, plant selection and
+carbon modelling.
+
+The public names below are resolved lazily, so `import backend.src.ai_pipeline` is cheap and
+only the submodules (and heavy dependencies) a caller actually uses get imported.
+"""
+from backend.src.ai_pipeline._lazy import lazy_exports
+
+_DATA_PROCESSING = 'backend.src.ai_pipeline.data_processing'
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    'fetch_weather_data': f'{_DATA_PROCESSING}.data_ingestion',
+    'fetch_weather_data_many': f'{_DATA_PROCESSING}.data_ingestion',
+    'get_soil_type_from_coords': f'{_DATA_PROCESSING}.data_ingestion',
+    'get_soil_properties_bulk': f'{_DATA_PROCESSING}.data_ingestion',
+    'ClimatologyStore': f'{_DATA_PROCESSING}.climatology',
+    'SensorStreamAggregator': f'{_DATA_PROCESSING}.sensor_stream',
+    'SoilRaster': f'{_DATA_PROCESSING}.soil_raster',
+    'FEATURE_COLUMNS': 'backend.src.ai_pipeline.microclimate_analysis.analyzer',
+    'MICROCLIMATE_CATEGORIES': 'backend.src.ai_pipeline.microclimate_analysis.analyzer',
+    'categorize_microclimate': 'backend.src.ai_pipeline.microclimate_analysis.analyzer',
+    'identify_microclimate_zones': 'backend.src.ai_pipeline.microclimate_analysis.analyzer',
+    'identify_microclimate_zones_streaming': 'backend.src.ai_pipeline.microclimate_analysis.analyzer',
+    'ZoningModel': 'backend.src.ai_pipeline.microclimate_analysis.zoning_model',
+    'ZoningModelStore': 'backend.src.ai_pipeline.microclimate_analysis.zoning_model',
+    'PlantCatalog': 'backend.src.ai_pipeline.plant_selection.plant_catalog',
+    'PlantRecommender': 'backend.src.ai_pipeline.plant_selection.recommender',
+    'calculate_carbon_sequestration_projection': 'backend.src.ai_pipeline.carbon_modeling.calculator',
+    'project_carbon_portfolios': 'backend.src.ai_pipeline.carbon_modeling.calculator',
+    'optimize_planting_mix': 'backend.src.ai_pipeline.carbon_modeling.planting_optimizer',
+    'simulate_carbon_sequestration_uncertainty': 'backend.src.ai_pipeline.carbon_modeling.uncertainty',
+    'analyze_site': 'backend.src.ai_pipeline.geospatial.site_analysis',
+    'build_ai_agent': 'backend.src.ai_pipeline.langchain_integration.chain_builder',
+    'build_routed_agent': 'backend.src.ai_pipeline.langchain_integration.query_router',
+    'stream_agent_events': 'backend.src.ai_pipeline.langchain_integration.agent_streaming',
+    'PersistentLLMCache': 'backend.src.ai_pipeline.caching.llm_cache',
+    'ToolResultCache': 'backend.src.ai_pipeline.langchain_integration.tool_cache',
+    'InMemoryCollector': 'backend.src.ai_pipeline.instrumentation',
+    'PrometheusExporter': 'backend.src.ai_pipeline.instrumentation',
+    'set_exporter': 'backend.src.ai_pipeline.instrumentation',
+})
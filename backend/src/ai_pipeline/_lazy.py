@@ -0,0 +1,68 @@
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access.
+
+    Used for heavy dependencies (pandas, scikit-learn, LangChain, ...) so that importing a
+    pipeline module for one cheap function doesn't pay for libraries it never touches.
+    Modules using it annotate with `from __future__ import annotations`, so annotations
+    like `pd.DataFrame` don't trigger the import either.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._load(), attr)
+        # Cache on the proxy so later lookups skip __getattr__ entirely
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> Any:
+    """
+    Returns the module if it is already imported, otherwise a LazyModule proxy for it.
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def lazy_exports(
+    package: str, exports: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]], List[str]]:
+    """
+    Builds module-level __getattr__/__dir__/__all__ that resolve public names to the
+    submodules defining them on first access (PEP 562).
+
+    Args:
+        package (str): The package's __name__.
+        exports (Dict[str, str]): Public name -> module path it is defined in.
+    """
+    def __getattr__(name: str) -> Any:
+        module_path = exports.get(name)
+        if module_path is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_path), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__, sorted(exports)
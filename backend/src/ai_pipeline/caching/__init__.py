@@ -0,0 +1 @@
+"""Persistent and in-memory caches shared by the pipeline stages."""
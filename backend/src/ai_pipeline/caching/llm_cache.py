@@ -0,0 +1,136 @@
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from backend.src.ai_pipeline.caching.persistent_cache import PersistentLRUCache, resolve_cache_path
+from backend.src.ai_pipeline.config import get_env
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Collapses whitespace runs and case, so prompts that differ only in formatting share a cache entry.
+    """
+    return _WHITESPACE.sub(" ", prompt).strip().casefold()
+
+
+def _generation_to_dict(generation: Generation) -> Dict[str, Any]:
+    if isinstance(generation, ChatGeneration):
+        return {
+            'type': 'chat',
+            'message': messages_to_dict([generation.message])[0],
+            'generation_info': generation.generation_info,
+        }
+    return {'type': 'text', 'text': generation.text, 'generation_info': generation.generation_info}
+
+
+def _generation_from_dict(data: Dict[str, Any]) -> Generation:
+    if data['type'] == 'chat':
+        return ChatGeneration(
+            message=messages_from_dict([data['message']])[0], generation_info=data.get('generation_info')
+        )
+    return Generation(text=data['text'], generation_info=data.get('generation_info'))
+
+
+class PersistentLLMCache(BaseCache):
+    """
+    LangChain LLM cache backed by PersistentLRUCache (in-process LRU in front of SQLite).
+
+    Entries are keyed on the normalized prompt (see normalize_prompt) and the llm_string LangChain
+    passes in, which encodes the model name and its generation parameters, so a different model
+    or temperature never reuses another's completion. Size and age limits are those of
+    PersistentLRUCache.
+
+    Attach it to one model with `llm.cache = PersistentLLMCache(...)`, or globally with
+    langchain_core.globals.set_llm_cache.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, **kwargs: Any):
+        """
+        Args:
+            db_path (str, optional): SQLite file for the persistent level (None = memory only).
+            **kwargs: Size/age limits forwarded to PersistentLRUCache.
+        """
+        kwargs.setdefault('table_name', 'llm_cache')
+        self.store = PersistentLRUCache(db_path=db_path, **kwargs)
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        payload = f"{normalize_prompt(prompt)}\x00{llm_string}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        cached = self.store.get(self.make_key(prompt, llm_string))
+        if cached is None:
+            return None
+        return [_generation_from_dict(data) for data in cached]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.store.set(self.make_key(prompt, llm_string), [_generation_to_dict(g) for g in return_val])
+
+    # A local SQLite read/write is faster than the thread hop BaseCache's async defaults make
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
+
+
+_default_cache: Optional[PersistentLLMCache] = None
+
+
+def get_default_llm_cache() -> PersistentLLMCache:
+    """
+    Returns the process-wide LLM completion cache, creating it on first use.
+
+    Configured through environment variables:
+        LLM_CACHE_PATH: SQLite file for the persistent level (default llm_cache.sqlite under
+            CACHE_DIR; 'memory' for no disk level).
+        LLM_CACHE_MAX_AGE_HOURS: Age after which cached completions are regenerated.
+        LLM_CACHE_MAX_ENTRIES: Maximum number of completions kept on disk.
+    """
+    global _default_cache
+    if _default_cache is None:
+        max_age_hours = get_env("LLM_CACHE_MAX_AGE_HOURS")
+        _default_cache = PersistentLLMCache(
+            db_path=resolve_cache_path(get_env("LLM_CACHE_PATH"), 'llm_cache.sqlite'),
+            max_age_seconds=float(max_age_hours) * 3600 if max_age_hours else None,
+            max_disk_entries=int(get_env("LLM_CACHE_MAX_ENTRIES", 100_000)),
+        )
+    return _default_cache
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    import os
+    import tempfile
+    import time
+
+    from langchain_core.language_models.fake import FakeListLLM
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'llm_cache.sqlite')
+    llm = FakeListLLM(responses=["Plant oaks.", "Plant maples."], cache=PersistentLLMCache(db_path))
+
+    start = time.perf_counter()
+    print(llm.invoke("Which trees suit a temperate-humid site?"))
+    # Same question with different spacing/case: served from the cache, not the model
+    print(llm.invoke("which trees suit a  temperate-humid site?  "))
+    print(f"Two calls in {(time.perf_counter() - start) * 1000:.1f} ms; cache stats: {llm.cache.stats()}")
+
+    # A fresh cache object on the same file (e.g. after a restart) still has the completion
+    reopened = FakeListLLM(responses=["Plant oaks.", "Plant maples."], cache=PersistentLLMCache(db_path))
+    print(reopened.invoke("Which trees suit a temperate-humid site?"), reopened.cache.stats())
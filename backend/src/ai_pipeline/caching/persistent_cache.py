@@ -0,0 +1,234 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from backend.src.ai_pipeline.config import get_env
+from backend.src.ai_pipeline.instrumentation import record_cache
+
+DEFAULT_CACHE_DIR = os.path.join('~', '.cache', 'verdant-green')
+# Value of a *_CACHE_PATH variable that keeps that cache in memory only
+MEMORY_ONLY = 'memory'
+
+
+def resolve_cache_path(configured: Optional[str], filename: str) -> Optional[str]:
+    """
+    Resolves the SQLite file of a process-wide cache from its *_CACHE_PATH setting.
+
+    Unset means filename under CACHE_DIR (default ~/.cache/verdant-green), so caches persist
+    across restarts out of the box; MEMORY_ONLY ('memory') returns None, i.e. no disk level.
+    """
+    if configured and configured.strip().lower() == MEMORY_ONLY:
+        return None
+    if configured:
+        return configured
+    return os.path.join(os.path.expanduser(get_env("CACHE_DIR") or DEFAULT_CACHE_DIR), filename)
+
+
+class PersistentLRUCache:
+    """
+    A two-level key/value cache: an in-process LRU in front of an optional SQLite file.
+
+    Values must be JSON-serialisable. Entries are evicted by size (least recently used first,
+    independently for the memory and disk levels) and by age (max_age_seconds). Hit/miss
+    counters are kept so callers can report how effective the cache is.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_memory_entries: int = 10_000,
+        max_disk_entries: Optional[int] = 1_000_000,
+        max_age_seconds: Optional[float] = None,
+        table_name: str = "cache_entries"
+    ):
+        """
+        Args:
+            db_path (str, optional): Path of the SQLite file. If None, only the in-memory level is used.
+            max_memory_entries (int): Maximum number of entries kept in the in-process LRU.
+            max_disk_entries (int, optional): Maximum number of rows kept on disk (None = unbounded).
+            max_age_seconds (float, optional): Entries older than this are treated as missing and removed.
+            table_name (str): SQLite table to use, so several caches can share one file.
+        """
+        if max_memory_entries < 0:
+            raise ValueError("max_memory_entries must be non-negative.")
+        if not table_name.isidentifier():
+            raise ValueError(f"Invalid table name: {table_name}")
+
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_age_seconds = max_age_seconds
+        self.table_name = table_name
+
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes_since_trim = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            directory = os.path.dirname(os.path.abspath(db_path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table_name} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table_name}_accessed_idx "
+                f"ON {self.table_name} (accessed_at)"
+            )
+            self._conn.commit()
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return self.max_age_seconds is not None and now - stored_at > self.max_age_seconds
+
+    def _remember(self, key: str, stored_at: float, value: Any) -> None:
+        if self.max_memory_entries == 0:
+            return
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the cached value for key, or None on a miss (including expired entries).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._is_expired(stored_at, now):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    record_cache(self.table_name, hit=True)
+                    return value
+                del self._memory[key]
+                self.evictions += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    f"SELECT value, stored_at FROM {self.table_name} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value_json, stored_at = row
+                    if not self._is_expired(stored_at, now):
+                        self._conn.execute(
+                            f"UPDATE {self.table_name} SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        self._conn.commit()
+                        value = json.loads(value_json)
+                        self._remember(key, stored_at, value)
+                        self.disk_hits += 1
+                        record_cache(self.table_name, hit=True)
+                        return value
+                    self._conn.execute(f"DELETE FROM {self.table_name} WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self.evictions += 1
+
+            self.misses += 1
+            record_cache(self.table_name, hit=False)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores value under key in both levels, evicting least recently used entries if needed.
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table_name} (key, value, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._conn.commit()
+            self._writes_since_trim += 1
+            # Trimming needs a COUNT(*), so only do it every so often (at most ~10% overshoot)
+            if self.max_disk_entries is not None:
+                trim_interval = max(1, min(100, self.max_disk_entries // 10))
+                if self._writes_since_trim >= trim_interval:
+                    self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        self._writes_since_trim = 0
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table_name} WHERE key IN ("
+                f"SELECT key FROM {self.table_name} ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._conn.commit()
+            self.evictions += overflow
+
+    def purge(self) -> int:
+        """
+        Removes expired entries and enforces the disk size limit. Returns the number of entries removed.
+        """
+        removed = 0
+        now = time.time()
+        with self._lock:
+            if self.max_age_seconds is not None:
+                expired = [k for k, (stored_at, _) in self._memory.items() if self._is_expired(stored_at, now)]
+                for key in expired:
+                    del self._memory[key]
+                removed += len(expired)
+                if self._conn is not None:
+                    cursor = self._conn.execute(
+                        f"DELETE FROM {self.table_name} WHERE stored_at < ?", (now - self.max_age_seconds,)
+                    )
+                    self._conn.commit()
+                    removed += cursor.rowcount
+            self.evictions += removed
+            if self._conn is not None and self.max_disk_entries is not None:
+                self._trim_disk()
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.table_name}")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss counters and the current size of each cache level.
+        """
+        with self._lock:
+            disk_entries = None
+            if self._conn is not None:
+                (disk_entries,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': disk_entries,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
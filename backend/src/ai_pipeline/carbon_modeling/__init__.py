@@ -0,0 +1 @@
+"""Carbon sequestration projections and their uncertainty."""
@@ -1,5 +1,28 @@
-from typing import List, Dict, Any
+import math
 
+import numpy as np
+from typing import List, Dict, Any, Optional, Union
+
+from backend.src.ai_pipeline.instrumentation import instrumented, record_error, record_payload
+
+ArrayLike = Union[np.ndarray, List[float]]
+
+
+def as_number(value: Any, default: Optional[float] = None) -> Optional[float]:
+    """
+    A plant field as a finite float: default when it is missing (None), NaN when it can't be read
+    as a finite number (e.g. 'n/a' in a hand-written request), so callers can tell the two apart.
+    """
+    if value is None:
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return number if math.isfinite(number) else math.nan
+
+
+@instrumented('carbon.projection')
 def calculate_carbon_sequestration_projection(
     plant_selections: List[Dict[str, Any]], years: int = 20
 ) -> Dict[str, Any]:
@@ -28,6 +51,7 @@ def calculate_carbon_sequestration_projection(
     if not isinstance(years, int) or years <= 0:
         raise ValueError("years must be a positive integer.")
 
+    record_payload('carbon.projection', len(plant_selections), 'plants')
     annual_breakdown = {}
     total_carbon_sequestered_cumulative = 0.0
 
@@ -39,9 +63,11 @@ def calculate_carbon_sequestration_projection(
 
         if rate is None or quantity is None:
             print(f"Warning: Skipping plant due to missing 'carbon_seq_rate_kg_per_year_per_plant' or 'quantity': {plant}")
+            record_error('carbon.projection', 'missing_fields')
             continue
         if not isinstance(rate, (int, float)) or not isinstance(quantity, int) or quantity < 0:
             print(f"Warning: Skipping plant due to invalid rate or quantity type/value: {plant}")
+            record_error('carbon.projection', 'invalid_values')
             continue
 
         total_annual_sequestration_rate += (rate * quantity)
@@ -56,6 +82,113 @@ def calculate_carbon_sequestration_projection(
         "annual_cumulative_breakdown_kg": annual_breakdown
     }
 
+def maturity_fraction(ages: np.ndarray, midpoint_years: np.ndarray, steepness: Union[np.ndarray, float] = 1.0) -> np.ndarray:
+    """
+    Logistic growth curve: the fraction of its mature sequestration rate a plant reaches at a given age.
+
+    fraction(age) = 1 / (1 + exp(-steepness * (age - midpoint_years)))
+
+    All arguments broadcast against each other.
+    """
+    return 1.0 / (1.0 + np.exp(-steepness * (ages - midpoint_years)))
+
+
+def annual_sequestration_per_plant(
+    rates: ArrayLike,
+    years: int,
+    maturity_midpoint_years: Optional[ArrayLike] = None,
+    maturity_steepness: Optional[ArrayLike] = None,
+    annual_mortality: Optional[ArrayLike] = None
+) -> np.ndarray:
+    """
+    Expected carbon sequestered in each year by one planted individual of each species.
+
+    Args:
+        rates: Mature sequestration rate per plant (kg CO2e/year), shape (..., n_species).
+        years (int): Projection horizon.
+        maturity_midpoint_years: Age at which a species reaches half its mature rate (logistic curve).
+            NaN entries (or None) mean the species sequesters at its full rate from year 1.
+        maturity_steepness: Logistic growth rate per year (default 1.0).
+        annual_mortality: Fraction of plants lost per year; expected survivors in year t are
+            (1 - mortality) ** t.
+
+    Returns:
+        np.ndarray: Shape (..., n_species, years); entry [..., s, t] is year t + 1.
+        Leading dimensions broadcast, so per-scenario parameter samples can be passed as 2-D arrays.
+    """
+    rates = np.asarray(rates, dtype=float)[..., None]
+    ages = np.arange(1, years + 1, dtype=float)
+
+    annual = np.broadcast_to(rates, rates.shape[:-1] + (years,)).copy()
+    if maturity_midpoint_years is not None:
+        midpoints = np.asarray(maturity_midpoint_years, dtype=float)[..., None]
+        steepness = 1.0 if maturity_steepness is None else np.asarray(maturity_steepness, dtype=float)[..., None]
+        fraction = maturity_fraction(ages, midpoints, steepness)
+        annual *= np.where(np.isnan(midpoints), 1.0, fraction)
+    if annual_mortality is not None:
+        mortality = np.asarray(annual_mortality, dtype=float)[..., None]
+        annual *= (1.0 - mortality) ** ages
+    return annual
+
+
+@instrumented('carbon.portfolios')
+def project_carbon_portfolios(
+    quantities: ArrayLike,
+    rates: ArrayLike,
+    years: int = 20,
+    maturity_midpoint_years: Optional[ArrayLike] = None,
+    maturity_steepness: Optional[ArrayLike] = None,
+    annual_mortality: Optional[ArrayLike] = None
+) -> np.ndarray:
+    """
+    Vectorized cumulative carbon projections for many planting portfolios at once.
+
+    Args:
+        quantities: Species x quantity matrix of shape (n_portfolios, n_species); a 1-D array is
+            treated as a single portfolio.
+        rates: Mature sequestration rate per plant for each species, shape (n_species,).
+        years (int): Projection horizon.
+        maturity_midpoint_years, maturity_steepness, annual_mortality: Optional per-species growth
+            and survival parameters, see annual_sequestration_per_plant. Leaving them all as None
+            gives the constant-rate model of calculate_carbon_sequestration_projection.
+
+    Returns:
+        np.ndarray: Shape (n_portfolios, years); entry [p, t] is the cumulative carbon (kg CO2e)
+        sequestered by portfolio p up to the end of year t + 1. Use projection_to_dict for the
+        dict format returned by calculate_carbon_sequestration_projection.
+    """
+    if not isinstance(years, int) or years <= 0:
+        raise ValueError("years must be a positive integer.")
+    quantities = np.atleast_2d(np.asarray(quantities, dtype=float))
+    rates = np.asarray(rates, dtype=float)
+    if quantities.shape[1] != rates.shape[0]:
+        raise ValueError(
+            f"quantities has {quantities.shape[1]} species columns but {rates.shape[0]} rates were given."
+        )
+    if np.any(quantities < 0):
+        raise ValueError("quantities must be non-negative.")
+
+    record_payload('carbon.portfolios', quantities.shape[0], 'portfolios')
+    per_plant = annual_sequestration_per_plant(
+        rates, years, maturity_midpoint_years, maturity_steepness, annual_mortality
+    )
+    # (n_portfolios, n_species) @ (n_species, years) -> annual totals, then accumulate over years
+    return np.cumsum(quantities @ per_plant, axis=1)
+
+
+def projection_to_dict(cumulative_kg: ArrayLike) -> Dict[str, Any]:
+    """
+    Converts one row of project_carbon_portfolios output to the dict format returned by
+    calculate_carbon_sequestration_projection.
+    """
+    cumulative_kg = np.asarray(cumulative_kg, dtype=float)
+    annual_breakdown = {year: round(float(value), 2) for year, value in enumerate(cumulative_kg, start=1)}
+    return {
+        "total_carbon_kg_over_years": round(float(cumulative_kg[-1]), 2),
+        "annual_cumulative_breakdown_kg": annual_breakdown
+    }
+
+
 # Example Usage (for testing purposes)
 if __name__ == '__main__':
     # Define a list of selected plants with their carbon sequestration rates and quantities
@@ -86,4 +219,22 @@ if __name__ == '__main__':
         {"common_name": "Shrub", "quantity": 10}, # Missing rate
     ]
     missing_data_projection = calculate_carbon_sequestration_projection(missing_data_plants, 5)
-    print(missing_data_projection)
\ No newline at end of file
+    print(missing_data_projection)
+
+    # Compare several planting mixes of the same species with the vectorized engine,
+    # using logistic growth curves and annual mortality
+    print("\nVectorized projection for three portfolios with growth curves:")
+    species_rates = [22.5, 18.0, 25.0]  # Oak, Maple, Pine
+    portfolios = np.array([
+        [50, 75, 30],
+        [100, 0, 0],
+        [0, 50, 80],
+    ])
+    cumulative = project_carbon_portfolios(
+        portfolios, species_rates, years=projection_years,
+        maturity_midpoint_years=[8, 6, 7],
+        maturity_steepness=[0.6, 0.8, 0.7],
+        annual_mortality=[0.01, 0.02, 0.015]
+    )
+    for i, row in enumerate(cumulative):
+        print(f"Portfolio {i}: {projection_to_dict(row)['total_carbon_kg_over_years']} kg CO2e after {projection_years} years")
@@ -0,0 +1,368 @@
+import math
+import time
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.src.ai_pipeline.carbon_modeling.calculator import (
+    annual_sequestration_per_plant,
+    as_number,
+    project_carbon_portfolios,
+    projection_to_dict,
+)
+from backend.src.ai_pipeline.instrumentation import instrumented, record_error, record_payload
+
+DEFAULT_TIME_BUDGET_S = 0.5
+# Surrogate weightings of the area and budget constraints tried for the root bound
+SURROGATE_GRID = np.linspace(0.0, 1.0, 41)
+_CHECK_EVERY_NODES = 1024
+
+
+def _species_arrays(
+    plants: List[Dict[str, Any]],
+    footprint_key: str,
+    cost_key: str,
+    default_footprint_m2: Optional[float],
+    default_cost: float
+) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray]]:
+    """
+    Extracts per-species arrays from plant dicts, skipping (with a warning) species without a
+    usable sequestration rate or footprint, or with fields that are not valid numbers.
+    """
+    kept, rates, footprints, costs, midpoints, steepness, mortality = [], [], [], [], [], [], []
+    for plant in plants:
+        rate = as_number(plant.get('carbon_seq_rate_kg_per_year_per_plant'))
+        footprint = as_number(plant.get(footprint_key), default_footprint_m2)
+        cost = as_number(plant.get(cost_key), default_cost)
+        if rate is None or footprint is None:
+            print(f"Warning: Skipping plant without 'carbon_seq_rate_kg_per_year_per_plant' or '{footprint_key}': {plant.get('common_name', plant)}")
+            record_error('carbon.optimize', 'missing_fields')
+            continue
+        # Growth fields are optional: a missing (or null) one takes the calculator's default
+        midpoint = as_number(plant.get('maturity_midpoint_years'), math.nan)
+        plant_steepness = as_number(plant.get('maturity_steepness'), 1.0)
+        plant_mortality = as_number(plant.get('annual_mortality_rate'), 0.0)
+        unreadable = math.isnan(rate) or (plant.get('maturity_midpoint_years') is not None and math.isnan(midpoint))
+        # NaN fails every comparison here, so unreadable values are caught with the out-of-range ones
+        in_range = footprint > 0 and cost >= 0 and plant_steepness > 0 and 0 <= plant_mortality <= 1
+        if unreadable or not in_range:
+            print(f"Warning: Skipping plant with invalid footprint, cost, rate or growth values: {plant.get('common_name', plant)}")
+            record_error('carbon.optimize', 'invalid_values')
+            continue
+
+        kept.append(plant)
+        rates.append(rate)
+        footprints.append(footprint)
+        costs.append(cost)
+        midpoints.append(midpoint)
+        steepness.append(plant_steepness)
+        mortality.append(plant_mortality)
+
+    return kept, {
+        'rates': np.array(rates),
+        'footprints': np.array(footprints),
+        'costs': np.array(costs),
+        'midpoints': np.array(midpoints),
+        'steepness': np.array(steepness),
+        'mortality': np.array(mortality),
+    }
+
+
+class _SurrogateBound:
+    """
+    Dantzig (fractional) upper bound of the knapsack obtained by merging the area and budget
+    constraints into one: mu * area/site_area + (1 - mu) * cost/budget <= 1. Any mu gives a valid
+    bound, and the smallest over mu equals the LP relaxation's.
+
+    Species are kept sorted by value per unit of merged weight, with prefix sums, so the bound of
+    "species i.. with capacity r left" is a binary search.
+    """
+
+    def __init__(self, mu: float, values: np.ndarray, areas: np.ndarray, costs: np.ndarray,
+                 upper: np.ndarray, site_area: float, budget: float):
+        self.mu = mu
+        self.site_area = site_area
+        self.budget = budget
+        weights = mu * areas / site_area + (1.0 - mu) * costs / budget
+        with np.errstate(divide='ignore'):
+            ratios = np.where(weights > 0, values / weights, np.inf)
+        self.order = np.argsort(-ratios, kind='stable')
+        self.weights = weights[self.order]
+        self.ratios = ratios[self.order]
+        self.cum_weight = np.concatenate([[0.0], np.cumsum(self.weights * upper[self.order])])
+        self.cum_value = np.concatenate([[0.0], np.cumsum(values[self.order] * upper[self.order])])
+        # Python lists: the branch-and-bound loop reads these one scalar at a time
+        self._cum_weight = self.cum_weight.tolist()
+        self._cum_value = self.cum_value.tolist()
+        self._ratios = self.ratios.tolist()
+
+    def capacity(self, area_left: float, budget_left: float) -> float:
+        return self.mu * area_left / self.site_area + (1.0 - self.mu) * budget_left / self.budget
+
+    def bound(self, start: int, capacity: float) -> float:
+        """
+        Best fractional value of the sorted species start.. within capacity.
+        """
+        target = self._cum_weight[start] + capacity
+        k = bisect_right(self._cum_weight, target) - 1
+        n = len(self._cum_weight) - 1
+        if k >= n:
+            return self._cum_value[n] - self._cum_value[start]
+        return self._cum_value[k] - self._cum_value[start] + (target - self._cum_weight[k]) * self._ratios[k]
+
+
+def _greedy(bound: _SurrogateBound, values, areas, costs, upper, site_area, budget) -> np.ndarray:
+    """
+    Integer incumbent: takes species in the bound's ratio order, each as many times as both
+    constraints still allow, then tops up with any species that still fits.
+    """
+    quantities = np.zeros(len(values), dtype=np.int64)
+    area_left, budget_left = site_area, budget
+    for _ in range(2):
+        for s in bound.order.tolist():
+            fit = int(upper[s] - quantities[s])
+            fit = min(fit, math.floor(area_left / areas[s] + 1e-9))
+            if costs[s] > 0:
+                fit = min(fit, math.floor(budget_left / costs[s] + 1e-9))
+            if fit > 0:
+                quantities[s] += fit
+                area_left -= fit * areas[s]
+                budget_left -= fit * costs[s]
+    return quantities
+
+
+@instrumented('carbon.optimize')
+def optimize_planting_mix(
+    plants: List[Dict[str, Any]],
+    site_area_m2: float,
+    budget: Optional[float] = None,
+    years: int = 20,
+    max_area_share: Optional[float] = None,
+    max_quantity_per_species: Optional[int] = None,
+    time_budget_s: float = DEFAULT_TIME_BUDGET_S,
+    max_nodes: Optional[int] = None,
+    footprint_key: str = 'footprint_m2',
+    cost_key: str = 'cost',
+    default_footprint_m2: Optional[float] = None,
+    default_cost: float = 0.0
+) -> Dict[str, Any]:
+    """
+    Chooses how many of each species to plant so projected carbon over `years` is as large as
+    possible within the site area and budget.
+
+    Every species is scored at once with annual_sequestration_per_plant (honouring the optional
+    'maturity_midpoint_years', 'maturity_steepness' and 'annual_mortality_rate' fields). The
+    integer problem (a bounded knapsack with area and budget constraints) is solved by
+    depth-first branch and bound: a greedy plan is the starting incumbent, and branches whose
+    fractional bound cannot beat it are pruned. The search stops at time_budget_s (or max_nodes)
+    and returns the best plan found with its optimality gap; 'optimal' is True if the search
+    finished.
+
+    Args:
+        plants (List[Dict[str, Any]]): Candidate species, e.g. the recommender's output. Each needs
+            'carbon_seq_rate_kg_per_year_per_plant' and a footprint (m^2 per plant, footprint_key);
+            the cost per plant (cost_key) defaults to default_cost. Species whose fields are not
+            valid numbers are skipped with a warning.
+        site_area_m2 (float): Plantable area.
+        budget (float, optional): Total spend allowed (None = unlimited).
+        years (int): Projection horizon the carbon is maximized over.
+        max_area_share (float, optional): Diversity constraint: largest share of the site area a
+            single species may cover (e.g. 0.25 means at least four species when area binds).
+        max_quantity_per_species (int, optional): Cap on plants of any one species.
+        time_budget_s (float): Wall-clock budget of the branch-and-bound search.
+        max_nodes (int, optional): Node budget of the search, checked every 1024 nodes (for reproducible runs).
+        footprint_key, cost_key (str): Keys of the per-plant footprint and cost in the plant dicts.
+        default_footprint_m2 (float, optional): Footprint of species without footprint_key (or with it null).
+        default_cost (float): Cost of species without cost_key (or with it null).
+
+    Returns:
+        Dict[str, Any]: {
+            'selections': the chosen plants with 'quantity' (input for calculate_carbon_sequestration_projection),
+            'projection': cumulative projection of the mix (calculate_carbon_sequestration_projection format),
+            'total_carbon_kg_over_years', 'upper_bound_kg', 'gap', 'optimal',
+            'area_used_m2', 'cost', 'nodes', 'elapsed_s'
+        }
+    """
+    if site_area_m2 <= 0:
+        raise ValueError("site_area_m2 must be positive.")
+    if budget is not None and budget < 0:
+        raise ValueError("budget must be non-negative.")
+    if max_area_share is not None and not 0 < max_area_share <= 1:
+        raise ValueError("max_area_share must be in (0, 1].")
+    if not isinstance(years, int) or years <= 0:
+        raise ValueError("years must be a positive integer.")
+
+    start_time = time.perf_counter()
+    deadline = start_time + time_budget_s
+    kept, params = _species_arrays(plants, footprint_key, cost_key, default_footprint_m2, default_cost)
+    record_payload('carbon.optimize', len(kept), 'plants')
+
+    values = annual_sequestration_per_plant(
+        params['rates'], years, params['midpoints'], params['steepness'], params['mortality']
+    ).sum(axis=1) if kept else np.zeros(0)
+    areas, costs = params['footprints'], params['costs']
+
+    # Per-species quantity caps from the area, budget, diversity and explicit limits
+    area_cap = site_area_m2 * (max_area_share or 1.0)
+    upper = np.floor(area_cap / areas + 1e-9) if kept else np.zeros(0)
+    if budget is not None:
+        with np.errstate(divide='ignore'):
+            upper = np.minimum(upper, np.where(costs > 0, np.floor(budget / costs + 1e-9), np.inf))
+    if max_quantity_per_species is not None:
+        upper = np.minimum(upper, max_quantity_per_species)
+    upper = np.where(values > 0, upper, 0).astype(np.int64)
+
+    # An unlimited budget is modelled as one no plan can reach, so the surrogate maths stays finite
+    effective_budget = budget if budget is not None else float(costs @ upper) + 1.0
+    effective_budget = max(effective_budget, 1e-9)
+
+    candidates = np.flatnonzero(upper > 0)
+    best_value, best_quantities = 0.0, np.zeros(len(kept), dtype=np.int64)
+    root_bound, nodes, optimal = 0.0, 0, True
+    if len(candidates):
+        v, a, c, u = values[candidates], areas[candidates], costs[candidates], upper[candidates]
+        mus = SURROGATE_GRID if budget is not None else np.array([1.0])
+        bounds = [_SurrogateBound(mu, v, a, c, u, site_area_m2, effective_budget) for mu in mus]
+        root_bounds = [b.bound(0, b.capacity(site_area_m2, effective_budget)) for b in bounds]
+        surrogate = bounds[int(np.argmin(root_bounds))]
+        root_bound = min(root_bounds)
+
+        incumbent = _greedy(surrogate, v, a, c, u, site_area_m2, effective_budget)
+        best_value = float(incumbent @ v)
+        best_local = incumbent
+
+        # Depth-first search over species in ratio order; each frame tries quantities from the
+        # largest that fits downwards. Along that order the bound only falls as the quantity
+        # falls, so the first pruned quantity ends the frame.
+        order = surrogate.order.tolist()
+        sv, sa, sc, su = (v[order].tolist(), a[order].tolist(), c[order].tolist(), u[order].tolist())
+        n = len(order)
+        current = [0] * n
+        stack: List[List[float]] = []
+        depth, area_left, budget_left, value = 0, float(site_area_m2), float(effective_budget), 0.0
+        tolerance = 1e-9 * max(root_bound, 1.0)
+
+        while True:
+            nodes += 1
+            if nodes % _CHECK_EVERY_NODES == 0 and (
+                time.perf_counter() > deadline or (max_nodes is not None and nodes >= max_nodes)
+            ):
+                optimal = False
+                break
+
+            descend = False
+            if depth < n:
+                quantity = min(su[depth], math.floor(area_left / sa[depth] + 1e-9))
+                if sc[depth] > 0:
+                    quantity = min(quantity, math.floor(budget_left / sc[depth] + 1e-9))
+                quantity = max(quantity, 0)
+                bound = value + quantity * sv[depth] + surrogate.bound(
+                    depth + 1, surrogate.capacity(area_left - quantity * sa[depth], budget_left - quantity * sc[depth])
+                )
+                if bound > best_value + tolerance:
+                    stack.append([depth, quantity, area_left, budget_left, value])
+                    current[depth] = quantity
+                    area_left -= quantity * sa[depth]
+                    budget_left -= quantity * sc[depth]
+                    value += quantity * sv[depth]
+                    depth += 1
+                    descend = True
+            elif value > best_value + tolerance:
+                best_value = value
+                best_local = np.zeros(n, dtype=np.int64)
+                best_local[order] = current
+            if descend:
+                continue
+
+            # Backtrack to the deepest frame with a smaller quantity still worth trying
+            while stack:
+                frame = stack[-1]
+                frame_depth, frame_quantity, frame_area, frame_budget, frame_value = frame
+                for later in range(frame_depth, depth):
+                    current[later] = 0
+                quantity = int(frame_quantity) - 1
+                if quantity >= 0:
+                    bound = frame_value + quantity * sv[frame_depth] + surrogate.bound(
+                        frame_depth + 1,
+                        surrogate.capacity(frame_area - quantity * sa[frame_depth], frame_budget - quantity * sc[frame_depth])
+                    )
+                    if bound > best_value + tolerance:
+                        frame[1] = quantity
+                        current[frame_depth] = quantity
+                        depth = frame_depth + 1
+                        area_left = frame_area - quantity * sa[frame_depth]
+                        budget_left = frame_budget - quantity * sc[frame_depth]
+                        value = frame_value + quantity * sv[frame_depth]
+                        break
+                stack.pop()
+                depth = frame_depth
+            else:
+                break
+
+        best_quantities[candidates] = best_local
+
+    if optimal:
+        root_bound = best_value
+    selections = [
+        {**plant, 'quantity': int(quantity)} for plant, quantity in zip(kept, best_quantities) if quantity > 0
+    ]
+    chosen = best_quantities > 0
+    cumulative = project_carbon_portfolios(
+        best_quantities[chosen], params['rates'][chosen], years,
+        params['midpoints'][chosen], params['steepness'][chosen], params['mortality'][chosen]
+    )[0] if chosen.any() else np.zeros(years)
+    return {
+        'selections': selections,
+        'projection': projection_to_dict(cumulative),
+        'total_carbon_kg_over_years': round(best_value, 2),
+        'upper_bound_kg': round(root_bound, 2),
+        'gap': (root_bound - best_value) / root_bound if root_bound > 0 else 0.0,
+        'optimal': optimal,
+        'area_used_m2': round(float(best_quantities @ areas), 2) if kept else 0.0,
+        'cost': round(float(best_quantities @ costs), 2) if kept else 0.0,
+        'nodes': nodes,
+        'elapsed_s': round(time.perf_counter() - start_time, 4),
+    }
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    example_plants = [
+        {"common_name": "Oak Tree", "carbon_seq_rate_kg_per_year_per_plant": 22.5, "footprint_m2": 50.0, "cost": 120.0,
+         "maturity_midpoint_years": 12, "maturity_steepness": 0.5},
+        {"common_name": "Maple Tree", "carbon_seq_rate_kg_per_year_per_plant": 18.0, "footprint_m2": 35.0, "cost": 90.0,
+         "maturity_midpoint_years": 8, "maturity_steepness": 0.6},
+        {"common_name": "Pine Tree", "carbon_seq_rate_kg_per_year_per_plant": 25.0, "footprint_m2": 30.0, "cost": 60.0,
+         "maturity_midpoint_years": 10, "maturity_steepness": 0.5, "annual_mortality_rate": 0.02},
+        {"common_name": "Elderberry", "carbon_seq_rate_kg_per_year_per_plant": 4.0, "footprint_m2": 4.0, "cost": 15.0},
+        {"common_name": "Switchgrass", "carbon_seq_rate_kg_per_year_per_plant": 0.8, "footprint_m2": 0.5, "cost": 2.0},
+    ]
+
+    print("Best mix for 2,000 m^2 and a $5,000 budget over 20 years:")
+    plan = optimize_planting_mix(example_plants, site_area_m2=2000, budget=5000, years=20)
+    for selection in plan['selections']:
+        print(f"  {selection['common_name']}: {selection['quantity']}")
+    print(f"  {plan['total_carbon_kg_over_years']} kg CO2e, {plan['area_used_m2']} m^2, ${plan['cost']}, "
+          f"optimal={plan['optimal']}, nodes={plan['nodes']}")
+
+    print("\nSame site, no species on more than 30% of the area:")
+    diverse = optimize_planting_mix(example_plants, site_area_m2=2000, budget=5000, years=20, max_area_share=0.3)
+    print(f"  {[(s['common_name'], s['quantity']) for s in diverse['selections']]}, {diverse['total_carbon_kg_over_years']} kg CO2e")
+
+    # A synthetic catalog of 5,000 species, solved within the default time budget
+    rng = np.random.default_rng(0)
+    catalog = [
+        {
+            "common_name": f"Species {i}",
+            "carbon_seq_rate_kg_per_year_per_plant": float(rng.gamma(2.0, 5.0)),
+            "footprint_m2": float(rng.uniform(0.5, 60.0)),
+            "cost": float(rng.uniform(2.0, 150.0)),
+            "maturity_midpoint_years": float(rng.uniform(2, 15)),
+        }
+        for i in range(5000)
+    ]
+    large = optimize_planting_mix(catalog, site_area_m2=10_000, budget=20_000, years=20, max_area_share=0.1)
+    print(f"\n5,000-species catalog: {len(large['selections'])} species chosen, "
+          f"{large['total_carbon_kg_over_years']} kg CO2e, gap={large['gap']:.2e}, optimal={large['optimal']}, "
+          f"{large['nodes']} nodes in {large['elapsed_s']} s")
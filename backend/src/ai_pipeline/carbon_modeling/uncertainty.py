@@ -0,0 +1,261 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.src.ai_pipeline.carbon_modeling.calculator import annual_sequestration_per_plant, as_number
+from backend.src.ai_pipeline.instrumentation import instrumented
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+DEFAULT_HISTOGRAM_BINS = 4096
+
+
+def _species_parameters(
+    plant_selections: List[Dict[str, Any]],
+    rate_cv: float,
+    default_annual_mortality: float
+) -> Dict[str, np.ndarray]:
+    """
+    Extracts per-species arrays from plant selection dicts, skipping invalid entries the same
+    way calculate_carbon_sequestration_projection does.
+    """
+    rates, quantities, cvs, midpoints, steepness, mortality = [], [], [], [], [], []
+    for plant in plant_selections:
+        rate = plant.get('carbon_seq_rate_kg_per_year_per_plant')
+        quantity = plant.get('quantity')
+
+        if rate is None or quantity is None:
+            print(f"Warning: Skipping plant due to missing 'carbon_seq_rate_kg_per_year_per_plant' or 'quantity': {plant}")
+            continue
+        if not isinstance(rate, (int, float)) or not isinstance(quantity, int) or quantity < 0:
+            print(f"Warning: Skipping plant due to invalid rate or quantity type/value: {plant}")
+            continue
+
+        # Optional fields: a missing or NULL one (how Supabase returns unset columns) takes the default
+        cv = as_number(plant.get('carbon_seq_rate_cv'), rate_cv)
+        midpoint = as_number(plant.get('maturity_midpoint_years'), math.nan)
+        plant_steepness = as_number(plant.get('maturity_steepness'), 1.0)
+        plant_mortality = as_number(plant.get('annual_mortality_rate'), default_annual_mortality)
+        unreadable = plant.get('maturity_midpoint_years') is not None and math.isnan(midpoint)
+        # NaN fails every comparison here, so unreadable values are caught with the out-of-range ones
+        if unreadable or not (cv >= 0 and plant_steepness > 0 and 0 <= plant_mortality <= 1):
+            print(f"Warning: Skipping plant due to invalid uncertainty or growth values: {plant}")
+            continue
+
+        rates.append(float(rate))
+        quantities.append(quantity)
+        cvs.append(cv)
+        midpoints.append(midpoint)
+        steepness.append(plant_steepness)
+        mortality.append(plant_mortality)
+
+    return {
+        'rates': np.array(rates),
+        'quantities': np.array(quantities, dtype=float),
+        'rate_cv': np.array(cvs),
+        'midpoints': np.array(midpoints),
+        'steepness': np.array(steepness),
+        'mortality': np.array(mortality),
+    }
+
+
+def _sample_trajectories(
+    params: Dict[str, np.ndarray],
+    years: int,
+    n: int,
+    rng: np.random.Generator,
+    growth_cv: float,
+    mortality_concentration: float
+) -> np.ndarray:
+    """
+    Simulates n cumulative sequestration trajectories, shape (n, years).
+
+    Per simulation and species:
+        - the mature rate is lognormal with the nominal rate as its mean and the given CV,
+        - the maturity midpoint is normal around its nominal value (CV growth_cv),
+        - the annual mortality is Beta-distributed around its nominal value.
+    """
+    n_species = len(params['rates'])
+
+    cv = params['rate_cv']
+    sigma = np.sqrt(np.log1p(cv ** 2))
+    mu = np.log(np.maximum(params['rates'], 1e-12)) - sigma ** 2 / 2
+    rates = np.where(params['rates'] > 0, rng.lognormal(mu, sigma, (n, n_species)), 0.0)
+
+    midpoints = params['midpoints'] * (1.0 + growth_cv * rng.standard_normal((n, n_species)))
+    midpoints = np.where(np.isnan(midpoints), np.nan, np.maximum(midpoints, 0.0))
+
+    nominal_mortality = params['mortality']
+    alpha = np.maximum(nominal_mortality * mortality_concentration, 1e-9)
+    beta = np.maximum((1.0 - nominal_mortality) * mortality_concentration, 1e-9)
+    mortality = np.where(nominal_mortality > 0, rng.beta(alpha, beta, (n, n_species)), 0.0)
+
+    per_plant = annual_sequestration_per_plant(rates, years, midpoints, params['steepness'], mortality)
+    # (n, species, years) weighted by quantity -> (n, years), then accumulate over years
+    return np.cumsum(np.einsum('nsy,s->ny', per_plant, params['quantities']), axis=1)
+
+
+def _simulate_batch(args: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Runs one batch and reduces it to per-year histogram counts and sums, so only
+    O(years x bins) data leaves the worker. Module-level so it can run in a process pool.
+    """
+    params, years, n, seed_seq, upper_edges, bins, growth_cv, mortality_concentration = args
+    rng = np.random.default_rng(seed_seq)
+    trajectories = _sample_trajectories(params, years, n, rng, growth_cv, mortality_concentration)
+
+    # Map each value to its bin per year; values beyond the top edge land in the last bin
+    scale = np.where(upper_edges > 0, bins / np.where(upper_edges > 0, upper_edges, 1.0), 0.0)
+    bin_index = np.clip((trajectories * scale).astype(np.int64), 0, bins - 1)
+    counts = np.zeros((years, bins), dtype=np.int64)
+    for year in range(years):
+        counts[year] = np.bincount(bin_index[:, year], minlength=bins)
+    overflow = (trajectories > upper_edges).sum(axis=0)
+    return counts, np.column_stack([trajectories.sum(axis=0), overflow])
+
+
+def _histogram_percentiles(counts: np.ndarray, upper_edges: np.ndarray, q: float) -> np.ndarray:
+    """
+    Interpolated q-th percentile per year from histogram counts over [0, upper_edge].
+    """
+    years, bins = counts.shape
+    cdf = np.cumsum(counts, axis=1)
+    target = cdf[:, -1] * q / 100.0
+    idx = np.minimum((cdf < target[:, None]).sum(axis=1), bins - 1)
+    below = np.where(idx > 0, cdf[np.arange(years), idx - 1], 0)
+    in_bin = counts[np.arange(years), idx]
+    within = np.where(in_bin > 0, (target - below) / np.maximum(in_bin, 1), 0.0)
+    width = upper_edges / bins
+    return (idx + within) * width
+
+
+@instrumented('carbon.uncertainty')
+def simulate_carbon_sequestration_uncertainty(
+    plant_selections: List[Dict[str, Any]],
+    years: int = 20,
+    n_simulations: int = 20_000,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    rate_cv: float = 0.25,
+    growth_cv: float = 0.2,
+    default_annual_mortality: float = 0.0,
+    mortality_concentration: float = 50.0,
+    batch_size: int = 2_000,
+    max_workers: Optional[int] = None,
+    seed: Optional[int] = 0,
+    histogram_bins: int = DEFAULT_HISTOGRAM_BINS
+) -> Dict[str, Any]:
+    """
+    Monte Carlo version of calculate_carbon_sequestration_projection that reports uncertainty bands.
+
+    Sequestration rates, maturity curves and survival are sampled per simulation (see
+    _sample_trajectories) in vectorized batches spread across a process pool. Each batch is
+    reduced to per-year histograms before being merged, so memory stays O(years x bins) no
+    matter how many trajectories are simulated. Percentiles are read from the merged histograms
+    and are accurate to within one bin width; the histogram range comes from a pilot batch, and
+    the fraction of values that fell above it is reported as 'overflow_fraction'.
+
+    Args:
+        plant_selections (List[Dict[str, Any]]): Same format as calculate_carbon_sequestration_projection.
+            Each dict may also set 'carbon_seq_rate_cv', 'maturity_midpoint_years',
+            'maturity_steepness' and 'annual_mortality_rate' to override the defaults.
+        years (int): The number of years for which to project the sequestration.
+        n_simulations (int): Number of simulated trajectories.
+        percentiles (Sequence[float]): Percentiles to report (default P5/P50/P95).
+        rate_cv (float): Default coefficient of variation of the sequestration rate.
+        growth_cv (float): Coefficient of variation of the maturity midpoint age.
+        default_annual_mortality (float): Mortality for plants that don't set 'annual_mortality_rate'.
+        mortality_concentration (float): Beta concentration for mortality (higher = less spread).
+        batch_size (int): Trajectories simulated per vectorized batch.
+        max_workers (int, optional): Process pool size; 1 runs every batch in-process.
+        seed (int, optional): Seed for reproducible results, independent of max_workers.
+        histogram_bins (int): Bins per year used for the streaming percentile reduction.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing:
+            - 'n_simulations': Number of trajectories simulated.
+            - 'total_carbon_kg_over_years': {'P5': ..., 'P50': ..., 'P95': ...} for the final year.
+            - 'annual_cumulative_percentiles_kg': {'P5': {year: value}, ...}.
+            - 'annual_cumulative_mean_kg': {year: mean cumulative value}.
+            - 'overflow_fraction': Share of values above the histogram range.
+    """
+    if not isinstance(plant_selections, list):
+        raise TypeError("plant_selections must be a list of dictionaries.")
+    if not all(isinstance(p, dict) for p in plant_selections):
+        raise ValueError("Each item in plant_selections must be a dictionary.")
+    if not isinstance(years, int) or years <= 0:
+        raise ValueError("years must be a positive integer.")
+    if n_simulations < 1 or batch_size < 1:
+        raise ValueError("n_simulations and batch_size must be positive integers.")
+
+    params = _species_parameters(plant_selections, rate_cv, default_annual_mortality)
+
+    batch_sizes = [batch_size] * (n_simulations // batch_size)
+    if n_simulations % batch_size:
+        batch_sizes.append(n_simulations % batch_size)
+    # One child seed per batch, so results don't depend on how batches are spread over workers
+    pilot_seed, *seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes) + 1)
+
+    # Pilot batch fixes the histogram range: generous headroom above the largest pilot value.
+    # With nothing to sequester the range is zero-width and every percentile comes out as 0.
+    pilot = _sample_trajectories(
+        params, years, min(batch_sizes[0], 1_000), np.random.default_rng(pilot_seed),
+        growth_cv, mortality_concentration
+    )
+    upper_edges = pilot.max(axis=0) * 1.5
+
+    jobs = [
+        (params, years, n, seed_seq, upper_edges, histogram_bins, growth_cv, mortality_concentration)
+        for n, seed_seq in zip(batch_sizes, seeds)
+    ]
+    if max_workers == 1 or len(jobs) == 1:
+        results = map(_simulate_batch, jobs)
+        counts, totals = _merge(results, years, histogram_bins)
+    else:
+        workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts, totals = _merge(pool.map(_simulate_batch, jobs), years, histogram_bins)
+
+    means = totals[:, 0] / n_simulations
+    bands = {
+        f"P{q:g}": _histogram_percentiles(counts, upper_edges, q) for q in percentiles
+    }
+    return {
+        "n_simulations": n_simulations,
+        "total_carbon_kg_over_years": {label: round(float(values[-1]), 2) for label, values in bands.items()},
+        "annual_cumulative_percentiles_kg": {
+            label: {year: round(float(v), 2) for year, v in enumerate(values, start=1)}
+            for label, values in bands.items()
+        },
+        "annual_cumulative_mean_kg": {year: round(float(v), 2) for year, v in enumerate(means, start=1)},
+        "overflow_fraction": float(totals[:, 1].max() / n_simulations),
+    }
+
+
+def _merge(results, years: int, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    counts = np.zeros((years, bins), dtype=np.int64)
+    totals = np.zeros((years, 2))
+    for batch_counts, batch_totals in results:
+        counts += batch_counts
+        totals += batch_totals
+    return counts, totals
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    example_plant_selections = [
+        {"common_name": "Oak Tree", "carbon_seq_rate_kg_per_year_per_plant": 22.5, "quantity": 50,
+         "maturity_midpoint_years": 8, "maturity_steepness": 0.6, "annual_mortality_rate": 0.01},
+        {"common_name": "Maple Tree", "carbon_seq_rate_kg_per_year_per_plant": 18.0, "quantity": 75,
+         "maturity_midpoint_years": 6, "annual_mortality_rate": 0.02},
+        {"common_name": "Pine Tree", "carbon_seq_rate_kg_per_year_per_plant": 25.0, "quantity": 30},
+    ]
+
+    projection_years = 20
+    print(f"Simulating carbon sequestration uncertainty for {projection_years} years:")
+    bands = simulate_carbon_sequestration_uncertainty(example_plant_selections, projection_years, n_simulations=50_000)
+    print(f"Total after {projection_years} years: {bands['total_carbon_kg_over_years']}")
+    for year in (1, 5, 10, 20):
+        p = bands['annual_cumulative_percentiles_kg']
+        print(f"Year {year}: P5={p['P5'][year]} P50={p['P50'][year]} P95={p['P95'][year]} kg CO2e")
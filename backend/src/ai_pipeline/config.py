@@ -0,0 +1,27 @@
+import os
+from typing import Optional
+
+_env_loaded = False
+
+
+def load_env() -> None:
+    """
+    Loads variables from a .env file into os.environ the first time it is called.
+
+    Modules call this (through get_env) when they first need configuration rather than at
+    import time, so importing the pipeline has no side effects. Variables already set in
+    the environment take precedence over the .env file.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def get_env(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    os.getenv, after making sure the .env file has been loaded.
+    """
+    load_env()
+    return os.getenv(name, default)
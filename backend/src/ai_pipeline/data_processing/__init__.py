@@ -0,0 +1 @@
+"""Weather, soil and climate data ingestion."""
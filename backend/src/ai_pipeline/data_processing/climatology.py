@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+from typing import Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from backend.src.ai_pipeline._lazy import lazy_import
+from backend.src.ai_pipeline.config import get_env
+from backend.src.ai_pipeline.instrumentation import instrumented, record_payload
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import FEATURE_COLUMNS
+
+pd = lazy_import('pandas')
+
+METADATA_FILE = "metadata.json"
+NORMALS_FILE = "normals.parquet"
+
+DEFAULT_RESOLUTION_DEG = 0.25
+ANNUAL = 0  # month value of the annual normals; 1-12 are calendar months
+
+# Daily observation columns expected in the historical input files
+OBSERVATION_COLUMNS = ['lat', 'lon', 'date', 'temp_c', 'humidity_percent', 'rainfall_mm']
+# Mean days per calendar month, used to turn mean daily rainfall into monthly totals
+DAYS_IN_MONTH = np.array([31, 28.25, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+ArrayLike = Union[np.ndarray, "pd.Series", Sequence[float]]
+
+
+def _cell_indices(lats: ArrayLike, lons: ArrayLike, resolution_deg: float):
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    rows = np.floor((lats + 90.0) / resolution_deg).astype(np.int64)
+    # Longitudes wrap, so 180 and -180 share a column
+    cols = np.floor(np.mod(lons + 180.0, 360.0) / resolution_deg).astype(np.int64)
+    return rows, cols
+
+
+class ClimatologyStore:
+    """
+    Gridded climate normals (temperature, humidity, rainfall) per grid cell and month.
+
+    The table is keyed on (cell_row, cell_col, month) with month 0 holding the annual normals.
+    Temperature and humidity are mean daily values; rainfall is the normal total over the
+    period (month or year), which is what the categorize_microclimate thresholds expect.
+
+    The table is loaded once into sorted numpy arrays, so a lookup of N points is a single
+    vectorized binary search instead of N API calls.
+    """
+
+    def __init__(self, normals: pd.DataFrame, resolution_deg: float):
+        if resolution_deg <= 0:
+            raise ValueError("resolution_deg must be positive.")
+        self.resolution_deg = float(resolution_deg)
+        self._n_cols = int(np.ceil(360.0 / self.resolution_deg))
+
+        keys = self._keys(
+            normals['cell_row'].to_numpy(np.int64), normals['cell_col'].to_numpy(np.int64),
+            normals['month'].to_numpy(np.int64)
+        )
+        order = np.argsort(keys, kind='stable')
+        self._keys_sorted = keys[order]
+        self._values = normals[FEATURE_COLUMNS].to_numpy(dtype=np.float64)[order]
+        self._counts = normals['n_observations'].to_numpy(dtype=np.int64)[order]
+
+    def __len__(self) -> int:
+        return len(self._keys_sorted)
+
+    def _keys(self, rows: np.ndarray, cols: np.ndarray, months: np.ndarray) -> np.ndarray:
+        return (rows * self._n_cols + cols) * 13 + months
+
+    @classmethod
+    def open(cls, directory: str) -> "ClimatologyStore":
+        """
+        Loads a store directory written by build_climatology.
+        """
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        normals = pd.read_parquet(os.path.join(directory, NORMALS_FILE))
+        return cls(normals, metadata['resolution_deg'])
+
+    def _find(self, rows: np.ndarray, cols: np.ndarray, month: int):
+        keys = self._keys(rows, cols, np.full(rows.shape, month, dtype=np.int64))
+        idx = np.searchsorted(self._keys_sorted, keys)
+        idx = np.minimum(idx, max(len(self._keys_sorted) - 1, 0))
+        found = (self._keys_sorted[idx] == keys) if len(self._keys_sorted) else np.zeros(keys.shape, dtype=bool)
+        return idx, found
+
+    def lookup(
+        self, lats: ArrayLike, lons: ArrayLike, month: int = ANNUAL, fill_radius_cells: int = 0
+    ) -> pd.DataFrame:
+        """
+        Climate normals for many points at once.
+
+        Args:
+            lats, lons: Equal-length point coordinates in degrees.
+            month (int): 1-12 for monthly normals, 0 for annual normals.
+            fill_radius_cells (int): For points whose cell has no data, use the nearest cell with
+                data within this many cells (Chebyshev distance). 0 disables filling.
+
+        Returns:
+            pd.DataFrame: One row per point with 'lat', 'lon', FEATURE_COLUMNS and
+            'n_observations', in the format identify_microclimate_zones expects. Points without
+            data have NaN features and 0 observations.
+        """
+        if not 0 <= month <= 12:
+            raise ValueError("month must be between 0 (annual) and 12.")
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if lats.shape != lons.shape:
+            raise ValueError("lats and lons must have the same shape.")
+
+        rows, cols = _cell_indices(lats, lons, self.resolution_deg)
+        idx, found = self._find(rows, cols, month)
+
+        # Search rings of neighbouring cells, nearest ring first, for points still missing
+        for radius in range(1, fill_radius_cells + 1):
+            missing = np.flatnonzero(~found)
+            if missing.size == 0:
+                break
+            ring = [(dr, dc) for dr in range(-radius, radius + 1) for dc in range(-radius, radius + 1)
+                    if max(abs(dr), abs(dc)) == radius]
+            ring.sort(key=lambda offset: offset[0] ** 2 + offset[1] ** 2)
+            for dr, dc in ring:
+                ring_idx, ring_found = self._find(rows[missing] + dr, (cols[missing] + dc) % self._n_cols, month)
+                idx[missing[ring_found]] = ring_idx[ring_found]
+                found[missing[ring_found]] = True
+                missing = missing[~ring_found]
+                if missing.size == 0:
+                    break
+
+        values = np.full((len(lats), len(FEATURE_COLUMNS)), np.nan)
+        counts = np.zeros(len(lats), dtype=np.int64)
+        if len(self._keys_sorted):
+            # Stored as float32; round so values read back as the 2 dp they were written with
+            values[found] = np.round(self._values[idx[found]], 2)
+            counts[found] = self._counts[idx[found]]
+
+        features = pd.DataFrame(values, columns=FEATURE_COLUMNS)
+        features.insert(0, 'lat', lats)
+        features.insert(1, 'lon', lons)
+        features['n_observations'] = counts
+        return features
+
+
+def _read_observation_chunks(paths: Sequence[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    for path in paths:
+        if str(path).endswith('.parquet'):
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(path)
+            for batch in parquet_file.iter_batches(batch_size=chunksize, columns=OBSERVATION_COLUMNS):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, usecols=OBSERVATION_COLUMNS, chunksize=chunksize)
+
+
+def _partial_sums(chunk: pd.DataFrame, resolution_deg: float) -> pd.DataFrame:
+    """
+    Per (cell, month) sums and counts of one chunk of daily observations.
+    """
+    rows, cols = _cell_indices(chunk['lat'], chunk['lon'], resolution_deg)
+    frame = pd.DataFrame({
+        'cell_row': rows,
+        'cell_col': cols,
+        'month': pd.to_datetime(chunk['date']).dt.month.to_numpy(),
+    })
+    for column in ('temp_c', 'humidity_percent', 'rainfall_mm'):
+        values = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        frame[f'{column}_sum'] = np.where(valid, values, 0.0)
+        frame[f'{column}_count'] = valid.astype(np.int64)
+    return frame.groupby(['cell_row', 'cell_col', 'month'], sort=False).sum()
+
+
+def _normals_from_sums(sums: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turns per (cell, month) sums into monthly normals and appends the annual (month 0) rows.
+    """
+    def mean(column: str) -> pd.Series:
+        counts = sums[f'{column}_count']
+        return (sums[f'{column}_sum'] / counts).where(counts > 0)
+
+    monthly = pd.DataFrame(index=sums.index)
+    monthly['avg_temp_c'] = mean('temp_c')
+    monthly['avg_humidity_percent'] = mean('humidity_percent')
+    months = sums.index.get_level_values('month').to_numpy()
+    monthly['total_rainfall_mm'] = mean('rainfall_mm') * DAYS_IN_MONTH[months - 1]
+    monthly['n_observations'] = sums[['temp_c_count', 'humidity_percent_count', 'rainfall_mm_count']].max(axis=1)
+    monthly = monthly.reset_index()
+
+    by_cell = monthly.groupby(['cell_row', 'cell_col'], sort=False)
+    annual = by_cell.agg(
+        avg_temp_c=('avg_temp_c', 'mean'),
+        avg_humidity_percent=('avg_humidity_percent', 'mean'),
+        n_observations=('n_observations', 'sum'),
+        months_with_rain=('total_rainfall_mm', 'count'),
+        rain_total=('total_rainfall_mm', 'sum'),
+    )
+    # Scale up to a full year when some months have no rainfall records
+    annual['total_rainfall_mm'] = (annual['rain_total'] * 12 / annual['months_with_rain']).where(
+        annual['months_with_rain'] > 0
+    )
+    annual = annual.drop(columns=['months_with_rain', 'rain_total']).reset_index()
+    annual['month'] = ANNUAL
+
+    normals = pd.concat([annual, monthly], ignore_index=True)[
+        ['cell_row', 'cell_col', 'month'] + FEATURE_COLUMNS + ['n_observations']
+    ]
+    normals[FEATURE_COLUMNS] = normals[FEATURE_COLUMNS].astype(np.float32).round(2)
+    normals[['cell_row', 'cell_col']] = normals[['cell_row', 'cell_col']].astype(np.int32)
+    normals['month'] = normals['month'].astype(np.int8)
+    return normals.sort_values(['cell_row', 'cell_col', 'month'], ignore_index=True)
+
+
+def build_climatology(
+    input_paths: Sequence[str],
+    output_dir: str,
+    resolution_deg: float = DEFAULT_RESOLUTION_DEG,
+    chunksize: int = 500_000
+) -> ClimatologyStore:
+    """
+    Builds a climatology store from historical daily observations.
+
+    Input files (CSV or Parquet) need the columns in OBSERVATION_COLUMNS: 'lat', 'lon',
+    'date', 'temp_c', 'humidity_percent' and daily 'rainfall_mm'. They are read in chunks and
+    reduced to per (cell, month) sums as they go, so inputs can be far larger than memory.
+
+    Args:
+        input_paths (Sequence[str]): Files (or glob patterns) of daily observations.
+        output_dir (str): Directory to write normals.parquet and metadata.json to.
+        resolution_deg (float): Grid cell size in degrees.
+        chunksize (int): Rows read per chunk.
+
+    Returns:
+        ClimatologyStore: The store that was written.
+    """
+    if resolution_deg <= 0:
+        raise ValueError("resolution_deg must be positive.")
+    paths = sorted({path for pattern in input_paths for path in (glob.glob(pattern) or [pattern])})
+
+    totals: Optional[pd.DataFrame] = None
+    pending: List[pd.DataFrame] = []
+    for chunk in _read_observation_chunks(paths, chunksize):
+        if chunk.empty:
+            continue
+        pending.append(_partial_sums(chunk, resolution_deg))
+        # Fold partial sums together now and then to keep memory bounded by the number of cells
+        if len(pending) >= 16:
+            totals = pd.concat(([totals] if totals is not None else []) + pending).groupby(level=[0, 1, 2]).sum()
+            pending = []
+    if pending or totals is None:
+        frames = ([totals] if totals is not None else []) + pending
+        if not frames:
+            raise ValueError(f"No observations found in {list(input_paths)}.")
+        totals = pd.concat(frames).groupby(level=[0, 1, 2]).sum()
+
+    normals = _normals_from_sums(totals)
+    os.makedirs(output_dir, exist_ok=True)
+    normals.to_parquet(os.path.join(output_dir, NORMALS_FILE), index=False)
+    with open(os.path.join(output_dir, METADATA_FILE), 'w') as f:
+        json.dump({
+            'resolution_deg': resolution_deg,
+            'n_cells': int((normals['month'] == ANNUAL).sum()),
+            'sources': paths,
+        }, f, indent=2)
+    return ClimatologyStore(normals, resolution_deg)
+
+
+_default_store: Optional[ClimatologyStore] = None
+_default_store_loaded = False
+
+
+def get_default_climatology_store() -> Optional[ClimatologyStore]:
+    """
+    Returns the store configured by the CLIMATOLOGY_DIR environment variable (loaded once),
+    or None if it is not set.
+    """
+    global _default_store, _default_store_loaded
+    if not _default_store_loaded:
+        directory = get_env("CLIMATOLOGY_DIR")
+        _default_store = ClimatologyStore.open(directory) if directory else None
+        _default_store_loaded = True
+    return _default_store
+
+
+@instrumented('climatology.lookup')
+def get_climatology_features(
+    points: Sequence[Sequence[float]],
+    month: int = ANNUAL,
+    store: Optional[ClimatologyStore] = None,
+    fill_radius_cells: int = 1
+) -> pd.DataFrame:
+    """
+    Offline replacement for fetch_weather_data_many: climate normals for (lat, lon) points,
+    ready to pass to identify_microclimate_zones.
+
+    Raises:
+        ValueError: If no store is given and CLIMATOLOGY_DIR is not set.
+    """
+    store = store if store is not None else get_default_climatology_store()
+    if store is None:
+        raise ValueError("No climatology store configured (set CLIMATOLOGY_DIR or pass store).")
+    points = list(points)
+    record_payload('climatology.lookup', len(points), 'points')
+    return store.lookup(
+        [lat for lat, _ in points], [lon for _, lon in points], month=month, fill_radius_cells=fill_radius_cells
+    )
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build a gridded climatology store from daily observations.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Aggregate historical CSV/Parquet files into normals.")
+    build.add_argument('inputs', nargs='+', help="Input files or glob patterns.")
+    build.add_argument('--output', required=True, help="Output store directory.")
+    build.add_argument('--resolution-deg', type=float, default=DEFAULT_RESOLUTION_DEG)
+    build.add_argument('--chunksize', type=int, default=500_000)
+    lookup = subparsers.add_parser('lookup', help="Print the normals for one point.")
+    lookup.add_argument('store')
+    lookup.add_argument('lat', type=float)
+    lookup.add_argument('lon', type=float)
+    lookup.add_argument('--month', type=int, default=ANNUAL)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        built = build_climatology(args.inputs, args.output, args.resolution_deg, args.chunksize)
+        print(f"Wrote {len(built)} normals rows to {args.output}")
+    else:
+        print(ClimatologyStore.open(args.store).lookup([args.lat], [args.lon], month=args.month, fill_radius_cells=1))
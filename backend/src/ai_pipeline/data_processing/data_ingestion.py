@@ -1,69 +1,238 @@
-import requests
-import pandas as pd
-import os
-from dotenv import load_dotenv
-from typing import Dict, Optional, Union
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+from backend.src.ai_pipeline._lazy import lazy_import
+from backend.src.ai_pipeline.config import get_env
+from backend.src.ai_pipeline.instrumentation import instrumented, record_error, record_payload
+from backend.src.ai_pipeline.data_processing.request_scheduler import (
+    RequestScheduler,
+    WeatherFetchError,
+    get_default_scheduler,
+)
+from backend.src.ai_pipeline.data_processing.spatial_dedup import IngestionDedupIndex
+from backend.src.ai_pipeline.data_processing.soil_raster import SoilRaster, get_default_soil_raster
+from backend.src.ai_pipeline.data_processing.weather_cache import WeatherCache, get_default_weather_cache
+
+pd = lazy_import('pandas')
+httpx = lazy_import('httpx')
+
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+# The base URL is overridable (OPENWEATHERMAP_BASE_URL) so ingestion can be pointed at a local stub server
+OPENWEATHERMAP_DEFAULT_BASE_URL = "https://api.openweathermap.org"
+OPENWEATHERMAP_TIMEMACHINE_PATH = "/data/2.5/onecall/timemachine"
+
+# Defaults for the bulk (async) ingestion path
+DEFAULT_MAX_CONCURRENCY = 20
+DEFAULT_REQUEST_TIMEOUT_S = 10.0
+
+
+def _empty_weather_response() -> Dict[str, Optional[float]]:
+    return {
+        'avg_temp_c': None,
+        'avg_humidity_percent': None,
+        'total_rainfall_mm': None,
+        'num_data_points': 0
+    }
+
 
-# Load OpenWeatherMap API Key from environment variables
-OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHERMAP_API_KEY")
+def default_weather_dates(n_days: int = 3) -> List[str]:
+    """
+    The most recent n_days full days (YYYY-MM-DD), all within the API's 5-day window.
+    """
+    return [(datetime.now() - timedelta(days=d)).strftime("%Y-%m-%d") for d in range(1, n_days + 1)]
 
-def fetch_weather_data(lat: float, lon: float, date: str) -> Dict[str, Optional[float]]:
+
+def _parse_date_to_timestamp(date: str) -> int:
+    """
+    Validates that the date is within the last 5 days and returns its Unix timestamp.
+    Raises ValueError for unparseable or out-of-range dates.
+    """
+    try:
+        date_obj = pd.to_datetime(date)
+        if date_obj > datetime.now() or date_obj < datetime.now() - timedelta(days=5):
+            raise ValueError("Date must be within the last 5 days due to API limitations")
+        return int(date_obj.timestamp())
+    except Exception as e:
+        logger.error(f"Date parsing error: {e}")
+        raise ValueError(f"Invalid date format: {date}. Error: {e}")
+
+
+def _api_key() -> Optional[str]:
+    # Read on use rather than at import, so importing this module doesn't need the .env
+    return get_env("OPENWEATHERMAP_API_KEY")
+
+
+def _timemachine_url(base_url: Optional[str] = None) -> str:
+    base_url = base_url or get_env("OPENWEATHERMAP_BASE_URL", OPENWEATHERMAP_DEFAULT_BASE_URL)
+    return base_url.rstrip('/') + OPENWEATHERMAP_TIMEMACHINE_PATH
+
+
+def _timemachine_params(lat: float, lon: float, dt_timestamp: int) -> Dict[str, Any]:
+    return {
+        'lat': lat,
+        'lon': lon,
+        'dt': dt_timestamp,
+        'units': 'metric',
+        'appid': _api_key(),
+    }
+
+
+def _summarize_hourly(hourly_data: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """
+    Reduces an OpenWeatherMap 'hourly' payload to the averaged/summed metrics
+    used by the microclimate analyzer.
+    """
+    temps = [h['temp'] for h in hourly_data if 'temp' in h]
+    humidities = [h['humidity'] for h in hourly_data if 'humidity' in h]
+    rainfalls = [
+        h.get('rain', {}).get('1h', 0)
+        for h in hourly_data
+    ]
+
+    return {
+        'avg_temp_c': round(pd.Series(temps).mean(), 2) if temps else None,
+        'avg_humidity_percent': round(pd.Series(humidities).mean(), 2) if humidities else None,
+        'total_rainfall_mm': round(pd.Series(rainfalls).sum(), 2) if rainfalls else 0.0,
+        'num_data_points': len(hourly_data)
+    }
+
+def _resolve_cache(cache: Optional[WeatherCache], use_cache: bool) -> Optional[WeatherCache]:
+    if not use_cache:
+        return None
+    return cache if cache is not None else get_default_weather_cache()
+
+
+_sync_client: Optional[httpx.Client] = None
+_sync_client_lock = threading.Lock()
+
+
+def _shared_sync_client() -> httpx.Client:
+    # One pooled client for every blocking fetch: building a client (and its SSL context) per
+    # request costs more than a cached request
+    global _sync_client
+    with _sync_client_lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(timeout=DEFAULT_REQUEST_TIMEOUT_S)
+        return _sync_client
+
+
+@instrumented('weather.fetch')
+def fetch_weather_data(
+    lat: float,
+    lon: float,
+    date: str,
+    cache: Optional[WeatherCache] = None,
+    use_cache: bool = True,
+    scheduler: Optional[RequestScheduler] = None,
+    base_url: Optional[str] = None,
+    client: Optional[httpx.Client] = None
+) -> Dict[str, Optional[float]]:
     """
     Fetches historical weather data for a given location and date.
+
+    The request goes through the scheduler like the bulk path: it shares the rate limit, 429/5xx
+    responses are retried with backoff, and a request that fails for good raises WeatherFetchError.
     
     Args:
         lat (float): Latitude of the location
         lon (float): Longitude of the location
         date (str): Date string in YYYY-MM-DD format
+        cache (WeatherCache, optional): Cache to consult first; defaults to the process-wide cache.
+        use_cache (bool): Set to False to always go to the API.
+        scheduler (RequestScheduler, optional): Rate limiter/retry policy; defaults to the
+            process-wide scheduler.
+        base_url (str, optional): API base URL, e.g. a local stub server.
+        client (httpx.Client, optional): Client to use; defaults to one pooled client per process.
         
     Returns:
-        Dict containing weather metrics or None values if data fetch fails
+        Dict containing weather metrics, or None values if the API has no data for the day
+
+    Raises:
+        WeatherFetchError: If the request fails after all retries or the payload is malformed.
     """
-    if not OPENWEATHERMAP_API_KEY:
+    # The cache comes first: a cached day stays servable after it leaves the API's 5-day
+    # window, and without an API key
+    cache = _resolve_cache(cache, use_cache)
+    if cache is not None:
+        cached = cache.get_weather(lat, lon, date)
+        if cached is not None:
+            return dict(cached)
+
+    if not _api_key():
         raise ValueError("OPENWEATHERMAP_API_KEY environment variable is not set.")
 
-    # Validate date is within 5 days
-    try:
-        date_obj = pd.to_datetime(date)
-        if date_obj > datetime.now() or date_obj < datetime.now() - timedelta(days=5):
-            raise ValueError("Date must be within the last 5 days due to API limitations")
-        dt_timestamp = int(date_obj.timestamp())
-    except Exception as e:
-        logger.error(f"Date parsing error: {e}")
-        raise ValueError(f"Invalid date format: {date}. Error: {e}")
+    dt_timestamp = _parse_date_to_timestamp(date)
+    empty_response = _empty_weather_response()
+    scheduler = scheduler if scheduler is not None else get_default_scheduler()
 
-    url = (
-        f"https://api.openweathermap.org/data/2.5/onecall/timemachine"
-        f"?lat={lat}&lon={lon}&dt={dt_timestamp}&units=metric"
-        f"&appid={OPENWEATHERMAP_API_KEY}"
-    )
-    
-    empty_response = {
-        'avg_temp_c': None,
-        'avg_humidity_percent': None,
-        'total_rainfall_mm': None,
-        'num_data_points': 0
-    }
+    client = client if client is not None else _shared_sync_client()
 
     try:
-        response = requests.get(url, timeout=10)  # Add timeout
-        response.raise_for_status()
-        data = response.json()
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"HTTP Error fetching weather data: {e.response.status_code} - {e.response.text}")
+        data = scheduler.get_json_blocking(
+            client, _timemachine_url(base_url), _timemachine_params(lat, lon, dt_timestamp)
+        )
+        if not isinstance(data, dict):
+            raise WeatherFetchError(f"Unexpected weather payload for {lat}, {lon} on {date}: {type(data).__name__}")
+    except WeatherFetchError as e:
+        logger.error(f"Weather fetch failed for {lat}, {lon} on {date}: {e}")
+        record_error('weather.fetch', f"http_{e.status_code}" if e.status_code else 'request_failed')
+        raise
+
+    hourly_data = data.get('hourly', [])
+
+    if not hourly_data:
+        logger.warning(f"No hourly data found for {lat}, {lon} on {date}.")
         return empty_response
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request Error fetching weather data: {e}")
+
+    try:
+        weather = _summarize_hourly(hourly_data)
+    except Exception as e:
+        logger.error(f"Error processing weather data: {e}")
+        record_error('weather.fetch', 'invalid_payload')
         return empty_response
 
+    if cache is not None:
+        cache.put_weather(lat, lon, date, weather)
+    return weather
+
+
+async def _fetch_weather_summary_async(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    lat: float,
+    lon: float,
+    date: str,
+    dt_timestamp: int,
+    scheduler: RequestScheduler,
+    url: str,
+    cache: Optional[WeatherCache] = None
+) -> Dict[str, Optional[float]]:
+    """
+    Async counterpart of fetch_weather_data for a single (lat, lon, date). Requests go through
+    the scheduler (rate limit, retries, coalescing); a request that fails for good raises
+    WeatherFetchError.
+    """
+    empty_response = _empty_weather_response()
+
+    if cache is not None:
+        cached = cache.get_weather(lat, lon, date)
+        if cached is not None:
+            return dict(cached)
+
+    # WeatherFetchError propagates so the caller can record the failure instead of a silent hole
+    async with semaphore:
+        data = await scheduler.get_json(client, url, _timemachine_params(lat, lon, dt_timestamp))
+
+    if not isinstance(data, dict):
+        # Raised (not returned empty) so the caller records this point as failed, not the whole batch
+        raise WeatherFetchError(f"Unexpected weather payload for {lat}, {lon} on {date}: {type(data).__name__}")
+
     hourly_data = data.get('hourly', [])
 
     if not hourly_data:
@@ -71,51 +240,269 @@ def fetch_weather_data(lat: float, lon: float, date: str) -> Dict[str, Optional[
         return empty_response
 
     try:
-        temps = [h['temp'] for h in hourly_data if 'temp' in h]
-        humidities = [h['humidity'] for h in hourly_data if 'humidity' in h]
-        rainfalls = [
-            h.get('rain', {}).get('1h', 0) 
-            for h in hourly_data
-        ]
-
-        return {
-            'avg_temp_c': round(pd.Series(temps).mean(), 2) if temps else None,
-            'avg_humidity_percent': round(pd.Series(humidities).mean(), 2) if humidities else None,
-            'total_rainfall_mm': round(pd.Series(rainfalls).sum(), 2) if rainfalls else 0.0,
-            'num_data_points': len(hourly_data)
-        }
+        weather = _summarize_hourly(hourly_data)
     except Exception as e:
         logger.error(f"Error processing weather data: {e}")
+        record_error('weather.fetch_many', 'invalid_payload')
         return empty_response
 
-def get_soil_type_from_coords(lat: float, lon: float) -> Dict[str, Union[str, float]]:
+    if cache is not None:
+        cache.put_weather(lat, lon, date, weather)
+    return weather
+
+
+async def _fetch_weather_data_async(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    lat: float,
+    lon: float,
+    date: str,
+    dt_timestamp: int,
+    scheduler: RequestScheduler,
+    url: str,
+    cache: Optional[WeatherCache] = None,
+    dedup_index: Optional[IngestionDedupIndex] = None
+) -> Dict[str, Any]:
+    """
+    Fetches one summary, through the dedup index if one is given. Always returns a record
+    tagged with its own coordinates and date so that results streamed out of order can be
+    matched back to their sample point, and with an 'error' message (None on success).
+    """
+    async def fetch_summary(fetch_lat: float, fetch_lon: float, fetch_date: str) -> Dict[str, Optional[float]]:
+        return await _fetch_weather_summary_async(
+            client, semaphore, fetch_lat, fetch_lon, fetch_date, dt_timestamp, scheduler, url, cache
+        )
+
+    record: Dict[str, Any] = {'lat': lat, 'lon': lon, 'date': date}
+    try:
+        if dedup_index is not None:
+            weather = await dedup_index.fetch(lat, lon, date, fetch_summary)
+        else:
+            weather = await fetch_summary(lat, lon, date)
+    except WeatherFetchError as e:
+        logger.error(f"Weather fetch failed for {lat}, {lon} on {date}: {e}")
+        record_error('weather.fetch_many', f"http_{e.status_code}" if e.status_code else 'request_failed')
+        return {**record, **_empty_weather_response(), 'error': str(e)}
+    return {**record, **weather, 'error': None}
+
+
+async def stream_weather_data_many(
+    points: Iterable[Tuple[float, float]],
+    dates: Sequence[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    client: Optional[httpx.AsyncClient] = None,
+    cache: Optional[WeatherCache] = None,
+    use_cache: bool = True,
+    dedup_index: Optional[IngestionDedupIndex] = None,
+    scheduler: Optional[RequestScheduler] = None,
+    base_url: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Fetches weather data for every (point, date) pair concurrently and yields each
+    result as soon as it completes (not in input order).
+
+    Args:
+        points (Iterable[Tuple[float, float]]): (lat, lon) sample points.
+        dates (Sequence[str]): Date strings in YYYY-MM-DD format (within the last 5 days, unless cached).
+        max_concurrency (int): Upper bound on simultaneous in-flight requests.
+        client (httpx.AsyncClient, optional): Shared client whose connection pool is reused.
+            If omitted, a pooled client sized to max_concurrency is created for this call.
+        cache (WeatherCache, optional): Cache consulted before each request; defaults to the
+            process-wide cache. Cached results are yielded without touching the network.
+        use_cache (bool): Set to False to always go to the API.
+        dedup_index (IngestionDedupIndex, optional): Spatial index, typically shared across calls,
+            so that points in the same cell (or radius) share one upstream fetch, whether it is
+            still in flight or already completed.
+        scheduler (RequestScheduler, optional): Rate limiter/retry policy; defaults to the
+            process-wide scheduler so concurrent calls share one rate limit.
+        base_url (str, optional): API base URL, e.g. a local stub server; defaults to
+            the OPENWEATHERMAP_BASE_URL environment variable or the public API.
+
+    Yields:
+        Dict containing 'lat', 'lon', 'date', the same metrics as fetch_weather_data and
+        'error', which holds the failure message for requests that failed after all retries.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be a positive integer.")
+
+    # Cached summaries are served first, so cached days past the API's 5-day window (or a
+    # fully cached batch without an API key) still work
+    cache = _resolve_cache(cache, use_cache)
+    pending = []
+    for lat, lon in points:
+        for date in dates:
+            cached = cache.get_weather(lat, lon, date) if cache is not None else None
+            if cached is not None:
+                yield {'lat': lat, 'lon': lon, 'date': date, **cached, 'error': None}
+            else:
+                pending.append((lat, lon, date))
+    if not pending:
+        return
+
+    if not _api_key():
+        raise ValueError("OPENWEATHERMAP_API_KEY environment variable is not set.")
+    # Validate every date still to fetch up front so a bad date fails fast instead of mid-batch
+    timestamps = {date: _parse_date_to_timestamp(date) for date in dict.fromkeys(date for _, _, date in pending)}
+    scheduler = scheduler if scheduler is not None else get_default_scheduler()
+    url = _timemachine_url(base_url)
+
+    owns_client = client is None
+    if owns_client:
+        client = httpx.AsyncClient(
+            timeout=DEFAULT_REQUEST_TIMEOUT_S,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency
+            )
+        )
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = [
+        asyncio.ensure_future(
+            _fetch_weather_data_async(
+                client, semaphore, lat, lon, date, timestamps[date], scheduler, url, cache, dedup_index
+            )
+        )
+        for lat, lon, date in pending
+    ]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Consumer stopped early or something failed: don't leave requests running
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if owns_client:
+            await client.aclose()
+
+
+@instrumented('weather.fetch_many')
+async def fetch_weather_data_many(
+    points: Iterable[Tuple[float, float]],
+    dates: Sequence[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    client: Optional[httpx.AsyncClient] = None,
+    cache: Optional[WeatherCache] = None,
+    use_cache: bool = True,
+    dedup_index: Optional[IngestionDedupIndex] = None,
+    scheduler: Optional[RequestScheduler] = None,
+    base_url: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Bulk version of fetch_weather_data for many sample points over several dates.
+
+    Requests are issued concurrently over a pooled HTTP client (see stream_weather_data_many)
+    and aggregated per point: temperature and humidity are averaged across dates and
+    rainfall is summed.
+
+    Returns:
+        pd.DataFrame: One row per (lat, lon) with 'avg_temp_c', 'avg_humidity_percent',
+        'total_rainfall_mm', 'num_data_points' and 'num_failed_requests', ready for
+        identify_microclimate_zones. Points for which every fetch failed keep NaN metrics;
+        'num_failed_requests' tells those apart from points the API had no data for.
+    """
+    # Duplicate points would be fetched twice and double-count rainfall
+    points = list(dict.fromkeys((lat, lon) for lat, lon in points))
+    record_payload('weather.fetch_many', len(points), 'points')
+    records = [
+        record async for record in stream_weather_data_many(
+            points, dates, max_concurrency=max_concurrency, client=client,
+            cache=cache, use_cache=use_cache, dedup_index=dedup_index,
+            scheduler=scheduler, base_url=base_url
+        )
+    ]
+
+    columns = [
+        'lat', 'lon', 'avg_temp_c', 'avg_humidity_percent', 'total_rainfall_mm',
+        'num_data_points', 'num_failed_requests'
+    ]
+    if not records:
+        return pd.DataFrame(columns=columns)
+
+    per_request = pd.DataFrame.from_records(records)
+    numeric_cols = ['avg_temp_c', 'avg_humidity_percent', 'total_rainfall_mm']
+    per_request[numeric_cols] = per_request[numeric_cols].astype(float)
+    per_request['failed'] = per_request['error'].notna()
+
+    grouped = per_request.groupby(['lat', 'lon'], sort=False)
+    summary = grouped.agg(
+        avg_temp_c=('avg_temp_c', 'mean'),
+        avg_humidity_percent=('avg_humidity_percent', 'mean'),
+        total_rainfall_mm=('total_rainfall_mm', lambda s: s.sum(min_count=1)),
+        num_data_points=('num_data_points', 'sum'),
+        num_failed_requests=('failed', 'sum')
+    ).round(2)
+
+    # Restore the caller's point order (as_completed yields in completion order)
+    order = pd.MultiIndex.from_tuples(points, names=['lat', 'lon'])
+    return summary.reindex(order).reset_index()[columns]
+
+_warned_no_soil_raster = False
+
+
+def _warn_no_soil_raster() -> None:
+    global _warned_no_soil_raster
+    if not _warned_no_soil_raster:
+        print("Warning: SOIL_RASTER_DIR is not set; soil properties are reported as 'unknown'.")
+        _warned_no_soil_raster = True
+
+
+def get_soil_type_from_coords(
+    lat: float, lon: float, raster: Optional[SoilRaster] = None
+) -> Dict[str, Union[str, float]]:
     """
     Get soil type and properties from coordinates.
+
+    Looks the point up in the local soil raster (the one passed in, or SOIL_RASTER_DIR).
+    Without a configured raster, or outside its coverage, the soil is reported as 'unknown'.
     
     Args:
         lat (float): Latitude of the location
         lon (float): Longitude of the location
+        raster (SoilRaster, optional): Raster to query instead of the default one.
         
     Returns:
         Dict containing soil type, pH level and texture
     """
+    unknown = {"soil_type": "unknown", "ph_level": None, "texture": "unknown"}
     try:
-        # This is dummy data for demonstration purposes
-        # Replace with actual API calls in a real project
         if not (-90 <= lat <= 90 and -180 <= lon <= 180):
             raise ValueError("Invalid coordinates")
 
-        if (lat + lon) % 2 == 0:
-            return {"soil_type": "loamy", "ph_level": 6.5, "texture": "medium"}
-        elif (lat + lon) % 3 == 0:
-            return {"soil_type": "sandy", "ph_level": 7.0, "texture": "coarse"}
-        else:
-            return {"soil_type": "clay", "ph_level": 6.0, "texture": "fine"}
+        raster = raster if raster is not None else get_default_soil_raster()
+        if raster is None:
+            _warn_no_soil_raster()
+            return unknown
+        return raster.lookup(lat, lon)
     except Exception as e:
         logger.error(f"Error getting soil data: {e}")
-        return {"soil_type": "unknown", "ph_level": None, "texture": "unknown"}
+        record_error('soil.lookup', type(e).__name__)
+        return unknown
+
+@instrumented('soil.lookup')
+def get_soil_properties_bulk(
+    lats: Sequence[float], lons: Sequence[float], raster: Optional[SoilRaster] = None
+) -> pd.DataFrame:
+    """
+    Vectorized soil lookup for many points at once.
+
+    Returns:
+        pd.DataFrame: One row per point with 'soil_type', 'ph_level' and 'texture', from
+        SoilRaster.query (no per-point Python work). Without a configured raster every point
+        is 'unknown'.
+    """
+    record_payload('soil.lookup', len(lats), 'points')
+    raster = raster if raster is not None else get_default_soil_raster()
+    if raster is None:
+        _warn_no_soil_raster()
+        return SoilRaster.unknown_frame(len(lats))
+    return raster.query(lats, lons)
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     try:
         test_lat, test_lon = 40.7128, -74.0060
         test_date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
@@ -127,5 +514,13 @@ if __name__ == '__main__':
         logger.info(f"\nFetching soil data for {test_lat}, {test_lon}...")
         soil_result = get_soil_type_from_coords(test_lat, test_lon)
         logger.info(f"Soil Data: {soil_result}")
+
+        logger.info("\nFetching weather data for several sample points concurrently...")
+        sample_points = [(40.7128, -74.0060), (40.7306, -73.9352), (40.6782, -73.9442)]
+        sample_dates = [
+            (datetime.now() - timedelta(days=d)).strftime("%Y-%m-%d") for d in range(1, 4)
+        ]
+        bulk_result = asyncio.run(fetch_weather_data_many(sample_points, sample_dates))
+        logger.info(f"Bulk Weather Data:\n{bulk_result}")
     except Exception as e:
         logger.error(f"Test execution failed: {e}")
\ No newline at end of file
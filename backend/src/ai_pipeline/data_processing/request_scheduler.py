@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from backend.src.ai_pipeline._lazy import lazy_import
+from backend.src.ai_pipeline.config import get_env
+from backend.src.ai_pipeline.instrumentation import record_error, record_payload, stage_timer
+
+httpx = lazy_import('httpx')
+
+logger = logging.getLogger(__name__)
+
+# OpenWeatherMap's free plan allows 60 calls/minute
+DEFAULT_CALLS_PER_MINUTE = 60.0
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE_S = 0.5
+DEFAULT_BACKOFF_MAX_S = 30.0
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class WeatherFetchError(Exception):
+    """
+    Raised when a weather request fails for good: a non-retryable response, or a
+    retryable one (429/5xx/transport error) that persisted through every retry.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, attempts: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.attempts = attempts
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: `rate` tokens per second, holding at most `capacity`.
+
+    Tokens are reserved synchronously, so the bucket holds no event-loop-bound state and one
+    instance can be shared by every caller in the process, async or blocking. A caller that finds the bucket
+    empty goes into debt and is told how long to sleep until its token is due, which keeps
+    callers in FIFO order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        if self.capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        # Blocking callers may reserve from worker threads alongside the event loop
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes one token and returns the number of seconds to wait before using it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self) -> None:
+        """
+        Returns a reserved token, e.g. when its waiter was cancelled.
+        """
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """
+    Parses a Retry-After header given either as delta-seconds or as an HTTP date.
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RequestScheduler:
+    """
+    Schedules GET requests against a rate-limited JSON API.
+
+    - A token bucket paces requests to the API plan (calls_per_minute, with bursts up to burst).
+    - 429 and 5xx responses and transport errors are retried with exponential backoff and full
+      jitter. A Retry-After header is honoured, and on a 429 it pauses every request sharing
+      this scheduler, not just the one that was throttled.
+    - Identical concurrent requests (same URL and params) are coalesced into one in-flight call.
+    - Failures that outlast the retries raise WeatherFetchError instead of returning empty data.
+    - get_json_blocking gives synchronous callers the same rate limit and retry policy.
+
+    stats() reports request counts plus the current and peak queue depth (requests waiting on
+    the rate limiter) and throttle counters.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: float = DEFAULT_CALLS_PER_MINUTE,
+        burst: Optional[float] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base_s: float = DEFAULT_BACKOFF_BASE_S,
+        backoff_max_s: float = DEFAULT_BACKOFF_MAX_S,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Args:
+            calls_per_minute (float): Sustained request rate allowed by the API plan.
+            burst (float, optional): Bucket capacity; defaults to one minute's worth of calls.
+            max_retries (int): Retries after the first attempt before giving up.
+            backoff_base_s (float): Backoff ceiling for the first retry; doubles every retry.
+            backoff_max_s (float): Upper bound on the backoff ceiling.
+            rng (random.Random, optional): Jitter source, for reproducible tests.
+        """
+        if max_retries < 0:
+            raise ValueError("max_retries must be non-negative.")
+        self.bucket = TokenBucket(calls_per_minute / 60.0, burst if burst is not None else calls_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._rng = rng or random.Random()
+
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._paused_until = 0.0
+
+        self.requests = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.rate_limit_wait_s = 0.0
+        self.backoff_wait_s = 0.0
+
+    @staticmethod
+    def _request_key(url: str, params: Optional[Dict[str, Any]]) -> Hashable:
+        return url, tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        ceiling = min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt)
+        delay = self._rng.uniform(0, ceiling)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def _reserve_slot(self) -> Tuple[float, float]:
+        """
+        Takes a rate-limit token. Returns (start time, seconds to wait before using it).
+        """
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        return time.monotonic(), self.bucket.reserve()
+
+    def _release_slot(self, start: float) -> None:
+        self.queue_depth -= 1
+        self.rate_limit_wait_s += time.monotonic() - start
+
+    async def _wait_for_slot(self) -> None:
+        """
+        Waits for a rate-limit token and for any throttle pause to end.
+        """
+        start, delay = self._reserve_slot()
+        try:
+            try:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.bucket.refund()
+                raise
+            while time.monotonic() < self._paused_until:
+                await asyncio.sleep(self._paused_until - time.monotonic())
+        finally:
+            self._release_slot(start)
+
+    def _wait_for_slot_blocking(self) -> None:
+        start, delay = self._reserve_slot()
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            while time.monotonic() < self._paused_until:
+                time.sleep(self._paused_until - time.monotonic())
+        finally:
+            self._release_slot(start)
+
+    def _check_response(self, response: httpx.Response, url: str, attempt: int) -> Tuple[bool, Any]:
+        """
+        Classifies one upstream response: (True, decoded JSON) on success, or (False, (status code,
+        reason, Retry-After)) for a retryable failure. Raises WeatherFetchError for a final one.
+        """
+        if response.status_code < 400:
+            record_payload('weather.http', len(response.content), 'bytes')
+            try:
+                return True, response.json()
+            except json.JSONDecodeError as e:
+                self.failures += 1
+                raise WeatherFetchError(f"Invalid JSON from {url}: {e}", response.status_code, attempt + 1)
+        status_code = response.status_code
+        record_error('weather.http', f"http_{status_code}")
+        reason = f"HTTP Error fetching {url}: {status_code} - {response.text[:200]}"
+        if status_code not in RETRYABLE_STATUS_CODES:
+            self.failures += 1
+            raise WeatherFetchError(reason, status_code, attempt + 1)
+        if status_code == 429:
+            self.throttled += 1
+        return False, (status_code, reason, _retry_after_seconds(response))
+
+    def _retry_delay(self, attempt: int, status_code: Optional[int], reason: str, retry_after: Optional[float]) -> float:
+        """
+        Returns how long to back off before the next attempt, or raises WeatherFetchError if
+        this was the last one.
+        """
+        if attempt == self.max_retries:
+            self.failures += 1
+            raise WeatherFetchError(f"{reason} (gave up after {attempt + 1} attempts)", status_code, attempt + 1)
+
+        delay = self._backoff_delay(attempt, retry_after)
+        if status_code == 429:
+            # The API is throttling the whole key, so hold back everyone else too
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(f"{reason}; retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+        self.retries += 1
+        self.backoff_wait_s += delay
+        return delay
+
+    async def _get_with_retries(
+        self, client: httpx.AsyncClient, url: str, params: Optional[Dict[str, Any]]
+    ) -> Any:
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_slot()
+            self.upstream_calls += 1
+            try:
+                # One upstream round trip, retries and rate-limit waits excluded
+                with stage_timer('weather.http'):
+                    response = await client.get(url, params=params)
+            except httpx.TransportError as e:
+                status_code, reason, retry_after = None, f"Request Error fetching {url}: {e}", None
+            else:
+                ok, result = self._check_response(response, url, attempt)
+                if ok:
+                    return result
+                status_code, reason, retry_after = result
+            await asyncio.sleep(self._retry_delay(attempt, status_code, reason, retry_after))
+
+    def get_json_blocking(self, client: httpx.Client, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Synchronous get_json for callers outside an event loop (e.g. fetch_weather_data). Shares
+        the rate limit, throttle pauses and retry policy with the async callers; identical
+        requests are not coalesced.
+
+        Raises:
+            WeatherFetchError: If the request fails for good.
+        """
+        self.requests += 1
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_slot_blocking()
+            self.upstream_calls += 1
+            try:
+                with stage_timer('weather.http'):
+                    response = client.get(url, params=params)
+            except httpx.TransportError as e:
+                status_code, reason, retry_after = None, f"Request Error fetching {url}: {e}", None
+            else:
+                ok, result = self._check_response(response, url, attempt)
+                if ok:
+                    return result
+                status_code, reason, retry_after = result
+            time.sleep(self._retry_delay(attempt, status_code, reason, retry_after))
+
+    async def get_json(self, client: httpx.AsyncClient, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GETs url and returns the decoded JSON body, sharing the call with any identical
+        request already in flight.
+
+        Raises:
+            WeatherFetchError: If the request fails for good.
+        """
+        self.requests += 1
+        key = self._request_key(url, params)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            # shield: one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._get_with_retries(client, url, params)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure doesn't log "exception was never retrieved"
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns request, retry and throttle counters and the current/peak queue depth.
+        """
+        return {
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'upstream_calls': self.upstream_calls,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'failures': self.failures,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight': len(self._in_flight),
+            'rate_limit_wait_s': round(self.rate_limit_wait_s, 3),
+            'backoff_wait_s': round(self.backoff_wait_s, 3),
+        }
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+
+
+def get_default_scheduler() -> RequestScheduler:
+    """
+    Process-wide scheduler shared by every ingestion call, so the rate limit covers them all.
+    Configured by OPENWEATHERMAP_CALLS_PER_MINUTE and OPENWEATHERMAP_MAX_RETRIES.
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = RequestScheduler(
+            calls_per_minute=float(get_env("OPENWEATHERMAP_CALLS_PER_MINUTE", DEFAULT_CALLS_PER_MINUTE)),
+            max_retries=int(get_env("OPENWEATHERMAP_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+        )
+    return _default_scheduler
@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from backend.src.ai_pipeline._lazy import lazy_import
+from backend.src.ai_pipeline.config import get_env
+from backend.src.ai_pipeline.instrumentation import record_payload
+
+pd = lazy_import('pandas')
+
+# Station readings are kept per metric in this order
+METRICS = ('temp_c', 'humidity_percent', 'rainfall_mm')
+TEMP, HUMIDITY, RAINFALL = range(len(METRICS))
+
+DEFAULT_WINDOW_HOURS = 24.0
+# A day of readings at one every 5 minutes
+DEFAULT_BUFFER_SIZE = 288
+_INITIAL_STATIONS = 64
+
+
+class SensorStreamAggregator:
+    """
+    Rolling per-station aggregates over readings from on-site weather stations.
+
+    Every station gets a fixed-size ring buffer of its last buffer_size readings, further limited
+    to the last window_s seconds. The buffers of all stations are rows of shared numpy arrays, so
+    memory per station is constant and no per-reading Python objects are kept.
+
+    Aggregates are maintained as readings enter and leave the window:
+        sum/count/mean - running sums per metric (NaN readings are skipped)
+        min/max        - monotonic deques of buffer positions per metric, so the current extreme
+                         is always at the deque head (amortized O(1) per reading)
+    feature_row / feature_frame therefore cost O(1) per station, whatever the window holds.
+
+    Readings must arrive in time order per station; older ones are counted and dropped.
+    """
+
+    def __init__(
+        self,
+        window_s: Optional[float] = DEFAULT_WINDOW_HOURS * 3600,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        resync_every: Optional[int] = None
+    ):
+        """
+        Args:
+            window_s (float, optional): Age after which readings leave the window (None = count only).
+            buffer_size (int): Readings kept per station.
+            resync_every (int, optional): Evictions after which a station's running sums are
+                recomputed from its buffer, bounding floating-point drift (default buffer_size).
+        """
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be a positive integer.")
+        if window_s is not None and window_s <= 0:
+            raise ValueError("window_s must be positive.")
+        self.window_s = window_s
+        self.buffer_size = int(buffer_size)
+        self.resync_every = int(resync_every or buffer_size)
+        self._lock = threading.Lock()
+
+        self._rows: Dict[str, int] = {}
+        self._station_ids: List[str] = []
+        self._allocate(_INITIAL_STATIONS)
+
+        self.readings = 0
+        self.late_readings = 0
+
+    def _allocate(self, n_stations: int) -> None:
+        n_metrics, size = len(METRICS), self.buffer_size
+        fields = {
+            '_values': ((n_stations, size, n_metrics), np.float64, np.nan),
+            '_times': ((n_stations, size), np.float64, np.nan),
+            # Sequence numbers: the buffer holds readings [_start, _next), at slot seq % buffer_size
+            '_start': ((n_stations,), np.int64, 0),
+            '_next': ((n_stations,), np.int64, 0),
+            # Newest accepted timestamp, kept after its reading expires so late readings are still caught
+            '_latest': ((n_stations,), np.float64, -np.inf),
+            '_sums': ((n_stations, n_metrics), np.float64, 0.0),
+            '_counts': ((n_stations, n_metrics), np.int64, 0),
+            '_evictions': ((n_stations,), np.int64, 0),
+            # Deques 2m (min) and 2m+1 (max) of metric m hold sequence numbers, between head and tail
+            '_deques': ((n_stations, 2 * n_metrics, size), np.int64, 0),
+            '_deque_head': ((n_stations, 2 * n_metrics), np.int64, 0),
+            '_deque_tail': ((n_stations, 2 * n_metrics), np.int64, 0),
+            '_location': ((n_stations, 2), np.float64, np.nan),
+        }
+        for name, (shape, dtype, fill) in fields.items():
+            array = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:len(old)] = old
+            setattr(self, name, array)
+
+    def _row(self, station_id: str) -> int:
+        row = self._rows.get(station_id)
+        if row is None:
+            row = len(self._station_ids)
+            if row == len(self._start):
+                # Grow by doubling, so adding stations is amortized O(1)
+                self._allocate(2 * row)
+            self._rows[station_id] = row
+            self._station_ids.append(station_id)
+        return row
+
+    def __len__(self) -> int:
+        return len(self._station_ids)
+
+    def register_station(self, station_id: str, lat: float, lon: float) -> None:
+        """
+        Records a station's location, which feature_frame reports as 'lat'/'lon'.
+        """
+        with self._lock:
+            row = self._row(station_id)
+            self._location[row] = (lat, lon)
+
+    def _evict_oldest(self, row: int) -> None:
+        seq = self._start[row]
+        slot = seq % self.buffer_size
+        values = self._values[row, slot]
+        for metric in range(len(METRICS)):
+            if not math.isnan(values[metric]):
+                self._sums[row, metric] -= values[metric]
+                self._counts[row, metric] -= 1
+            for deque in (2 * metric, 2 * metric + 1):
+                head = self._deque_head[row, deque]
+                if head < self._deque_tail[row, deque] and self._deques[row, deque, head % self.buffer_size] == seq:
+                    self._deque_head[row, deque] = head + 1
+        self._start[row] = seq + 1
+
+        self._evictions[row] += 1
+        if self._evictions[row] >= self.resync_every:
+            self._resync(row)
+
+    def _resync(self, row: int) -> None:
+        """
+        Recomputes a station's running sums from its buffer (subtracting evicted values leaves
+        rounding error behind, which would otherwise accumulate for as long as the station reports).
+        """
+        window = self._window_values(row)
+        valid = ~np.isnan(window)
+        self._sums[row] = np.where(valid, window, 0.0).sum(axis=0)
+        self._counts[row] = valid.sum(axis=0)
+        self._evictions[row] = 0
+
+    def _window_values(self, row: int) -> np.ndarray:
+        slots = np.arange(self._start[row], self._next[row]) % self.buffer_size
+        return self._values[row, slots]
+
+    def _expire(self, row: int, now: float) -> None:
+        if self.window_s is None:
+            return
+        cutoff = now - self.window_s
+        while self._start[row] < self._next[row] and self._times[row, self._start[row] % self.buffer_size] <= cutoff:
+            self._evict_oldest(row)
+
+    def _push_deque(self, row: int, deque: int, seq: int, value: float, is_max: bool) -> None:
+        head, tail = self._deque_head[row, deque], self._deque_tail[row, deque]
+        # Drop entries the new value supersedes: they can never be the window's extreme again
+        while tail > head:
+            back = self._deques[row, deque, (tail - 1) % self.buffer_size]
+            back_value = self._values[row, back % self.buffer_size, deque // 2]
+            if (back_value <= value) if is_max else (back_value >= value):
+                tail -= 1
+            else:
+                break
+        self._deques[row, deque, tail % self.buffer_size] = seq
+        self._deque_tail[row, deque] = tail + 1
+
+    def _push(
+        self, row: int, timestamp: float, temp_c: float, humidity_percent: float, rainfall_mm: float
+    ) -> bool:
+        if timestamp < self._latest[row]:
+            self.late_readings += 1
+            return False
+
+        self._expire(row, timestamp)
+        if self._next[row] - self._start[row] == self.buffer_size:
+            self._evict_oldest(row)
+
+        seq = self._next[row]
+        slot = seq % self.buffer_size
+        self._times[row, slot] = timestamp
+        for metric, value in enumerate((temp_c, humidity_percent, rainfall_mm)):
+            value = np.nan if value is None else float(value)
+            self._values[row, slot, metric] = value
+            if math.isnan(value):
+                continue
+            self._sums[row, metric] += value
+            self._counts[row, metric] += 1
+            self._push_deque(row, 2 * metric, seq, value, is_max=False)
+            self._push_deque(row, 2 * metric + 1, seq, value, is_max=True)
+        self._next[row] = seq + 1
+        self._latest[row] = timestamp
+        self.readings += 1
+        return True
+
+    def push(
+        self,
+        station_id: str,
+        temp_c: Optional[float],
+        humidity_percent: Optional[float],
+        rainfall_mm: Optional[float],
+        timestamp: Optional[float] = None
+    ) -> bool:
+        """
+        Adds one reading (None for a metric the station did not report).
+
+        Args:
+            station_id (str): Station identifier; new stations are added on first reading.
+            temp_c, humidity_percent: Instantaneous readings.
+            rainfall_mm: Rain since the station's previous reading (summed over the window).
+            timestamp (float, optional): Unix time of the reading (default now).
+
+        Returns:
+            bool: False if the reading was older than the station's latest one and was dropped.
+        """
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        with self._lock:
+            return self._push(self._row(station_id), timestamp, temp_c, humidity_percent, rainfall_mm)
+
+    def push_many(self, readings: Iterable[Dict[str, Any]]) -> int:
+        """
+        Adds a batch of readings given as dicts with 'station_id', 'timestamp' (optional) and
+        the METRICS keys. Returns the number accepted.
+        """
+        accepted = 0
+        now = time.time()
+        with self._lock:
+            for reading in readings:
+                timestamp = reading.get('timestamp')
+                accepted += self._push(
+                    self._row(reading['station_id']),
+                    now if timestamp is None else float(timestamp),
+                    reading.get('temp_c'),
+                    reading.get('humidity_percent'),
+                    reading.get('rainfall_mm'),
+                )
+        record_payload('sensors.ingest', accepted, 'readings')
+        return accepted
+
+    def _extreme(self, row: int, metric: int, is_max: bool) -> Optional[float]:
+        deque = 2 * metric + int(is_max)
+        head = self._deque_head[row, deque]
+        if head == self._deque_tail[row, deque]:
+            return None
+        return float(self._values[row, self._deques[row, deque, head % self.buffer_size] % self.buffer_size, metric])
+
+    def stats(self, station_id: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Full rolling aggregates of one station: count, mean, sum, min and max per metric.
+
+        Raises:
+            KeyError: If the station has never reported.
+        """
+        with self._lock:
+            row = self._rows[station_id]
+            self._expire(row, time.time() if now is None else now)
+            result: Dict[str, Any] = {'station_id': station_id, 'num_readings': int(self._next[row] - self._start[row])}
+            for metric, name in enumerate(METRICS):
+                count = int(self._counts[row, metric])
+                result[name] = {
+                    'count': count,
+                    'mean': float(self._sums[row, metric] / count) if count else None,
+                    'sum': float(self._sums[row, metric]),
+                    'min': self._extreme(row, metric, is_max=False),
+                    'max': self._extreme(row, metric, is_max=True),
+                }
+            return result
+
+    def feature_row(self, station_id: str, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        The station's window reduced to the weather features fetch_weather_data returns.
+
+        Raises:
+            KeyError: If the station has never reported.
+        """
+        with self._lock:
+            row = self._rows[station_id]
+            self._expire(row, time.time() if now is None else now)
+            return self._feature_row(row)
+
+    def _feature_row(self, row: int) -> Dict[str, Optional[float]]:
+        sums, counts = self._sums[row], self._counts[row]
+        return {
+            'avg_temp_c': round(float(sums[TEMP] / counts[TEMP]), 2) if counts[TEMP] else None,
+            'avg_humidity_percent': round(float(sums[HUMIDITY] / counts[HUMIDITY]), 2) if counts[HUMIDITY] else None,
+            'total_rainfall_mm': round(float(sums[RAINFALL]), 2),
+            'num_data_points': int(self._next[row] - self._start[row]),
+        }
+
+    def feature_frame(self, station_ids: Optional[Sequence[str]] = None, now: Optional[float] = None) -> pd.DataFrame:
+        """
+        Feature rows of many stations (all by default) as a DataFrame with 'station_id', 'lat',
+        'lon' and the fetch_weather_data columns, ready for identify_microclimate_zones.
+        Unknown stations get empty features.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            ids = list(self._station_ids if station_ids is None else station_ids)
+            rows = np.array([self._rows.get(station_id, -1) for station_id in ids], dtype=np.int64)
+            known = rows >= 0
+            if self.window_s is not None:
+                # Only stations whose oldest reading has aged out need the per-station expiry loop
+                known_rows = rows[known]
+                oldest = self._times[known_rows, self._start[known_rows] % self.buffer_size]
+                has_data = self._next[known_rows] > self._start[known_rows]
+                for row in known_rows[has_data & (oldest <= now - self.window_s)]:
+                    self._expire(int(row), now)
+            safe_rows = np.where(known, rows, 0)
+            sums = np.where(known[:, None], self._sums[safe_rows], 0.0)
+            counts = np.where(known[:, None], self._counts[safe_rows], 0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.where(counts > 0, sums / counts, np.nan)
+            location = np.where(known[:, None], self._location[safe_rows], np.nan)
+            num_points = np.where(known, self._next[safe_rows] - self._start[safe_rows], 0)
+        return pd.DataFrame({
+            'station_id': ids,
+            'lat': location[:, 0],
+            'lon': location[:, 1],
+            'avg_temp_c': means[:, TEMP].round(2),
+            'avg_humidity_percent': means[:, HUMIDITY].round(2),
+            'total_rainfall_mm': np.where(known, sums[:, RAINFALL], np.nan).round(2),
+            'num_data_points': num_points,
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'stations': len(self),
+            'readings': self.readings,
+            'late_readings': self.late_readings,
+            'window_s': self.window_s,
+            'buffer_size': self.buffer_size,
+            'buffer_bytes': int(sum(
+                getattr(self, name).nbytes for name in (
+                    '_values', '_times', '_start', '_next', '_latest', '_sums', '_counts', '_evictions',
+                    '_deques', '_deque_head', '_deque_tail', '_location',
+                )
+            )),
+        }
+
+
+_default_stream: Optional[SensorStreamAggregator] = None
+
+
+def get_default_sensor_stream() -> SensorStreamAggregator:
+    """
+    Returns the process-wide sensor aggregator, creating it on first use.
+
+    Configured through environment variables:
+        SENSOR_WINDOW_HOURS: Age after which readings leave the rolling window.
+        SENSOR_BUFFER_SIZE: Readings kept per station.
+    """
+    global _default_stream
+    if _default_stream is None:
+        _default_stream = SensorStreamAggregator(
+            window_s=float(get_env("SENSOR_WINDOW_HOURS", DEFAULT_WINDOW_HOURS)) * 3600,
+            buffer_size=int(get_env("SENSOR_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)),
+        )
+    return _default_stream
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    stream = SensorStreamAggregator(window_s=6 * 3600, buffer_size=72)
+    n_stations = 2000
+    for i in range(n_stations):
+        stream.register_station(f"station-{i}", 40.7 + i * 1e-4, -74.0)
+
+    # 12 hours of 5-minute readings from every station; only the last 6 hours stay in the window
+    start_time = 1_700_000_000.0
+    start = time.perf_counter()
+    for step in range(144):
+        timestamp = start_time + step * 300
+        stream.push_many(
+            {
+                'station_id': f"station-{i}",
+                'timestamp': timestamp,
+                'temp_c': 15 + 5 * math.sin(step / 24) + rng.normal(0, 0.5),
+                'humidity_percent': 60 + rng.normal(0, 5),
+                'rainfall_mm': max(0.0, rng.normal(0.05, 0.1)),
+            }
+            for i in range(n_stations)
+        )
+    elapsed = time.perf_counter() - start
+    print(f"Ingested {stream.readings} readings in {elapsed:.2f} s ({stream.readings / elapsed:,.0f}/s)")
+    print(stream.summary())
+
+    now = start_time + 143 * 300
+    print(stream.feature_row("station-0", now=now))
+    print(stream.stats("station-0", now=now)['temp_c'])
+
+    stream.feature_frame(now=now)  # the first call also imports pandas
+    start = time.perf_counter()
+    frame = stream.feature_frame(now=now + 1800)
+    print(f"Feature rows for {len(frame)} stations (30 minutes later) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(frame.head())
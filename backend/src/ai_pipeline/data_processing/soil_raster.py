@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from backend.src.ai_pipeline._lazy import lazy_import
+from backend.src.ai_pipeline.config import get_env
+
+pd = lazy_import('pandas')
+
+# Class vocabularies; code 0 is reserved for nodata in both
+SOIL_TYPES = ["unknown", "loamy", "sandy", "clay", "silty", "peaty", "chalky"]
+TEXTURES = ["unknown", "fine", "medium", "coarse"]
+
+METADATA_FILE = "metadata.json"
+SOIL_CLASS_FILE = "soil_class.npy"
+PH_FILE = "ph.npy"
+TEXTURE_FILE = "texture.npy"
+
+ArrayLike = Union[np.ndarray, "pd.Series", Sequence[float]]
+
+
+class SoilRaster:
+    """
+    A gridded soil-property raster (soil class, pH, texture) stored as memory-mapped .npy arrays.
+
+    Layout of a raster directory:
+        metadata.json   - north/west edges, cell size (degrees), shape and class vocabularies
+        soil_class.npy  - uint8 codes into metadata['soil_types'] (0 = nodata)
+        ph.npy          - float32 pH (NaN = nodata)
+        texture.npy     - uint8 codes into metadata['textures'] (0 = nodata)
+
+    Row 0 is the northern edge. Opening a raster only maps the files, so load time does not
+    depend on raster size, and queries only touch the pages they need.
+    """
+
+    def __init__(
+        self,
+        soil_class: np.ndarray,
+        ph: np.ndarray,
+        texture: np.ndarray,
+        north: float,
+        west: float,
+        resolution_deg: float,
+        soil_types: Sequence[str] = SOIL_TYPES,
+        textures: Sequence[str] = TEXTURES
+    ):
+        if not (soil_class.shape == ph.shape == texture.shape) or soil_class.ndim != 2:
+            raise ValueError("soil_class, ph and texture must be 2-D arrays of the same shape.")
+        if resolution_deg <= 0:
+            raise ValueError("resolution_deg must be positive.")
+        self.soil_class = soil_class
+        self.ph = ph
+        self.texture = texture
+        self.north = float(north)
+        self.west = float(west)
+        self.resolution_deg = float(resolution_deg)
+        self.soil_types = list(soil_types)
+        self.textures = list(textures)
+
+    @property
+    def shape(self):
+        return self.soil_class.shape
+
+    @classmethod
+    def open(cls, directory: str) -> "SoilRaster":
+        """
+        Memory-maps a raster directory written by write_soil_raster.
+        """
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        return cls(
+            soil_class=np.load(os.path.join(directory, SOIL_CLASS_FILE), mmap_mode='r'),
+            ph=np.load(os.path.join(directory, PH_FILE), mmap_mode='r'),
+            texture=np.load(os.path.join(directory, TEXTURE_FILE), mmap_mode='r'),
+            north=metadata['north'],
+            west=metadata['west'],
+            resolution_deg=metadata['resolution_deg'],
+            soil_types=metadata.get('soil_types', SOIL_TYPES),
+            textures=metadata.get('textures', TEXTURES),
+        )
+
+    def _cell_indices(self, lats: ArrayLike, lons: ArrayLike):
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if lats.shape != lons.shape:
+            raise ValueError("lats and lons must have the same shape.")
+        n_rows, n_cols = self.shape
+        rows = np.floor((self.north - lats) / self.resolution_deg)
+        cols = np.floor((lons - self.west) / self.resolution_deg)
+        # The extent is closed: points on the southern/eastern edge (e.g. lat=-90 or lon=180 on a
+        # global raster) fall one past the last row/column and belong to it
+        south = self.north - n_rows * self.resolution_deg
+        east = self.west + n_cols * self.resolution_deg
+        rows = np.where((rows == n_rows) & (lats == south), n_rows - 1, rows)
+        cols = np.where((cols == n_cols) & (lons == east), n_cols - 1, cols)
+        valid = (
+            (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+            & (lats >= -90) & (lats <= 90) & (lons >= -180) & (lons <= 180)
+        )
+        # Out-of-range points read cell 0 and are masked out afterwards
+        rows = np.where(valid, rows, 0).astype(np.intp)
+        cols = np.where(valid, cols, 0).astype(np.intp)
+        return rows, cols, valid
+
+    def query_codes(self, lats: ArrayLike, lons: ArrayLike) -> Dict[str, np.ndarray]:
+        """
+        Raw per-point lookup: uint8 soil/texture codes (0 = nodata) and float32 pH (NaN = nodata).
+        """
+        rows, cols, valid = self._cell_indices(lats, lons)
+        return {
+            'soil_class': np.where(valid, self.soil_class[rows, cols], 0).astype(np.uint8),
+            'ph_level': np.where(valid, self.ph[rows, cols], np.nan).astype(np.float32),
+            'texture': np.where(valid, self.texture[rows, cols], 0).astype(np.uint8),
+        }
+
+    def query(self, lats: ArrayLike, lons: ArrayLike) -> pd.DataFrame:
+        """
+        Vectorized lookup for many points.
+
+        Returns:
+            pd.DataFrame: One row per point with categorical 'soil_type' and 'texture' columns
+            ('unknown' outside the raster or where it has no data) and float32 'ph_level'.
+        """
+        codes = self.query_codes(lats, lons)
+        return pd.DataFrame({
+            'soil_type': pd.Categorical.from_codes(codes['soil_class'], categories=self.soil_types),
+            'ph_level': codes['ph_level'],
+            'texture': pd.Categorical.from_codes(codes['texture'], categories=self.textures),
+        })
+
+    @classmethod
+    def unknown_frame(cls, n_points: int) -> pd.DataFrame:
+        """
+        The frame query returns for points with no soil data, for n_points points.
+        """
+        codes = np.zeros(n_points, dtype=np.uint8)
+        return pd.DataFrame({
+            'soil_type': pd.Categorical.from_codes(codes, categories=SOIL_TYPES),
+            'ph_level': np.full(n_points, np.nan, dtype=np.float32),
+            'texture': pd.Categorical.from_codes(codes, categories=TEXTURES),
+        })
+
+    def lookup(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Single-point lookup returning the dict format of get_soil_type_from_coords.
+        """
+        codes = self.query_codes([lat], [lon])
+        ph = float(codes['ph_level'][0])
+        return {
+            'soil_type': self.soil_types[codes['soil_class'][0]],
+            'ph_level': None if np.isnan(ph) else round(ph, 2),
+            'texture': self.textures[codes['texture'][0]],
+        }
+
+
+def write_soil_raster(
+    directory: str,
+    soil_class: np.ndarray,
+    ph: np.ndarray,
+    texture: np.ndarray,
+    north: float,
+    west: float,
+    resolution_deg: float,
+    soil_types: Sequence[str] = SOIL_TYPES,
+    textures: Sequence[str] = TEXTURES
+) -> None:
+    """
+    Writes a raster directory in the layout SoilRaster.open expects.
+    """
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, SOIL_CLASS_FILE), np.ascontiguousarray(soil_class, dtype=np.uint8))
+    np.save(os.path.join(directory, PH_FILE), np.ascontiguousarray(ph, dtype=np.float32))
+    np.save(os.path.join(directory, TEXTURE_FILE), np.ascontiguousarray(texture, dtype=np.uint8))
+    with open(os.path.join(directory, METADATA_FILE), 'w') as f:
+        json.dump({
+            'north': north,
+            'west': west,
+            'resolution_deg': resolution_deg,
+            'shape': list(np.shape(soil_class)),
+            'soil_types': list(soil_types),
+            'textures': list(textures),
+        }, f, indent=2)
+
+
+def build_synthetic_soil_raster(directory: str, resolution_deg: float = 5.0, seed: int = 0) -> SoilRaster:
+    """
+    Writes a small deterministic global raster for tests and local development.
+
+    Soil classes come in latitude bands with some noise, pH varies smoothly between 4.5 and 8.5,
+    texture follows the soil class, and the polar rows are left as nodata.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = int(round(180 / resolution_deg))
+    n_cols = int(round(360 / resolution_deg))
+    lat_centres = 90 - (np.arange(n_rows) + 0.5) * resolution_deg
+    lon_centres = -180 + (np.arange(n_cols) + 0.5) * resolution_deg
+
+    band = (np.abs(lat_centres)[:, None] // 15).astype(int) + rng.integers(0, 2, (n_rows, n_cols))
+    soil_class = 1 + band % (len(SOIL_TYPES) - 1)
+    ph = 6.5 + 1.5 * np.sin(np.radians(lon_centres))[None, :] * np.cos(np.radians(lat_centres))[:, None]
+    ph = np.round(ph + rng.normal(0, 0.2, (n_rows, n_cols)), 1).clip(4.5, 8.5)
+    # loamy/silty/peaty -> medium, sandy/chalky -> coarse, clay -> fine
+    texture_for_class = np.array([0, 2, 3, 1, 2, 2, 3], dtype=np.uint8)
+    texture = texture_for_class[soil_class]
+
+    polar = np.abs(lat_centres) > 80
+    soil_class[polar] = 0
+    ph[polar] = np.nan
+    texture[polar] = 0
+
+    write_soil_raster(directory, soil_class, ph, texture, north=90.0, west=-180.0, resolution_deg=resolution_deg)
+    return SoilRaster.open(directory)
+
+
+_default_raster: Optional[SoilRaster] = None
+_default_raster_loaded = False
+
+
+def get_default_soil_raster() -> Optional[SoilRaster]:
+    """
+    Returns the raster configured by the SOIL_RASTER_DIR environment variable (opened once),
+    or None if it is not set. For local development it can point at the synthetic raster in
+    backend/data/fixtures/soil_raster.
+    """
+    global _default_raster, _default_raster_loaded
+    if not _default_raster_loaded:
+        directory = get_env("SOIL_RASTER_DIR")
+        _default_raster = SoilRaster.open(directory) if directory else None
+        _default_raster_loaded = True
+    return _default_raster
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Soil raster utilities.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    synthetic = subparsers.add_parser('build-synthetic', help="Write a small synthetic global raster.")
+    synthetic.add_argument('directory')
+    synthetic.add_argument('--resolution-deg', type=float, default=5.0)
+    synthetic.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    raster = build_synthetic_soil_raster(args.directory, args.resolution_deg, args.seed)
+    print(f"Wrote {raster.shape[0]}x{raster.shape[1]} synthetic soil raster to {args.directory}")
+    print(f"Sample lookup (40.7128, -74.0060): {raster.lookup(40.7128, -74.0060)}")
@@ -0,0 +1,216 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from datetime import date as date_cls
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.src.ai_pipeline.instrumentation import record_cache
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_CELL_DEG = 0.01
+
+Fetcher = Callable[[float, float, str], Awaitable[Dict[str, Any]]]
+
+
+class _Representative:
+    __slots__ = ('entry_id', 'lat', 'lon', 'date', 'bucket', 'future', 'completed_at')
+
+    def __init__(self, entry_id: int, lat: float, lon: float, date: str, bucket: Tuple, future: asyncio.Future):
+        self.entry_id = entry_id
+        self.lat = lat
+        self.lon = lon
+        self.date = date
+        self.bucket = bucket
+        self.future = future
+        self.completed_at: Optional[float] = None
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class IngestionDedupIndex:
+    """
+    Spatial index over pending and completed weather fetches so nearby requests share one upstream call.
+
+    Points are hashed into grid buckets per date. In cell mode (the default) two points share a
+    fetch when they fall in the same cell_deg x cell_deg cell. In radius mode (radius_km set) the
+    bucket size follows the radius and the 3x3 neighbouring buckets are searched, so any point
+    within radius_km of an earlier request shares its fetch.
+
+    The first request in a cell/radius becomes its representative and performs the fetch; later
+    requests await the same future (while pending) or reuse its result (once completed). Failed
+    fetches are dropped from the index so the next request retries. As in WeatherCache, a
+    completed summary for today (still accumulating hours) is only shared while it is in flight,
+    and completed entries older than max_age_seconds are fetched again.
+    """
+
+    def __init__(
+        self,
+        cell_deg: float = DEFAULT_CELL_DEG,
+        radius_km: Optional[float] = None,
+        max_entries: int = 100_000,
+        max_age_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            cell_deg (float): Bucket size in degrees (cell mode).
+            radius_km (float, optional): Sharing radius; switches to radius mode when set.
+            max_entries (int): Maximum completed representatives kept (least recently used evicted first).
+            max_age_seconds (float, optional): Age after which a completed result is no longer shared
+                (None = no limit; past days' weather doesn't change).
+        """
+        if radius_km is not None and radius_km <= 0:
+            raise ValueError("radius_km must be positive.")
+        if cell_deg <= 0:
+            raise ValueError("cell_deg must be positive.")
+        self.radius_km = radius_km
+        # In radius mode a bucket is at least radius wide, so neighbours within radius are in the 3x3 block
+        self.cell_deg = radius_km / (2 * math.pi * EARTH_RADIUS_KM / 360) if radius_km else cell_deg
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+
+        self._buckets: Dict[Tuple, List[_Representative]] = {}
+        self._entries: "OrderedDict[int, _Representative]" = OrderedDict()
+        self._next_id = 0
+
+        self.requests = 0
+        self.upstream_fetches = 0
+
+    def _bucket(self, lat: float, lon: float, date: str, d_row: int = 0, d_col: int = 0) -> Tuple:
+        return (date, math.floor(lat / self.cell_deg) + d_row, math.floor(lon / self.cell_deg) + d_col)
+
+    def _expired(self, rep: _Representative) -> bool:
+        if rep.completed_at is None or self.max_age_seconds is None:
+            return False
+        return time.monotonic() - rep.completed_at > self.max_age_seconds
+
+    def _live(self, bucket: Tuple) -> List[_Representative]:
+        reps = self._buckets.get(bucket, ())
+        for rep in [rep for rep in reps if self._expired(rep)]:
+            self._remove(rep)
+        return self._buckets.get(bucket, [])
+
+    def _find(self, lat: float, lon: float, date: str) -> Optional[_Representative]:
+        if self.radius_km is None:
+            reps = self._live(self._bucket(lat, lon, date))
+            return reps[0] if reps else None
+
+        # Radius searches need longitude buckets widened by 1/cos(lat) near the poles
+        lon_span = max(1, math.ceil(1 / max(math.cos(math.radians(lat)), 1e-6)))
+        best, best_distance = None, self.radius_km
+        for d_row in (-1, 0, 1):
+            for d_col in range(-lon_span, lon_span + 1):
+                for rep in self._live(self._bucket(lat, lon, date, d_row, d_col)):
+                    distance = _haversine_km(lat, lon, rep.lat, rep.lon)
+                    if distance <= best_distance:
+                        best, best_distance = rep, distance
+        return best
+
+    def _register(self, lat: float, lon: float, date: str) -> _Representative:
+        bucket = self._bucket(lat, lon, date)
+        rep = _Representative(self._next_id, lat, lon, date, bucket, asyncio.get_running_loop().create_future())
+        self._next_id += 1
+        self._buckets.setdefault(bucket, []).append(rep)
+        self._entries[rep.entry_id] = rep
+        return rep
+
+    def _remove(self, rep: _Representative) -> None:
+        self._entries.pop(rep.entry_id, None)
+        reps = self._buckets.get(rep.bucket)
+        if reps is not None:
+            if rep in reps:
+                reps.remove(rep)
+            if not reps:
+                del self._buckets[rep.bucket]
+
+    def _evict(self) -> None:
+        # Only completed representatives are evicted; pending ones still have waiters
+        while len(self._entries) > self.max_entries:
+            for entry_id, rep in self._entries.items():
+                if rep.future.done():
+                    self._remove(rep)
+                    break
+            else:
+                return
+
+    async def fetch(self, lat: float, lon: float, date: str, fetcher: Fetcher) -> Dict[str, Any]:
+        """
+        Returns the weather summary for (lat, lon, date), sharing the upstream fetch with any
+        pending or completed request in the same cell/radius.
+
+        Args:
+            fetcher: Coroutine function (lat, lon, date) -> summary dict, called only by representatives.
+        """
+        self.requests += 1
+        while True:
+            rep = self._find(lat, lon, date)
+            if rep is None:
+                break
+            self._entries.move_to_end(rep.entry_id)
+            record_cache('weather_dedup', hit=True)
+            try:
+                # shield: one waiter being cancelled must not cancel the shared fetch
+                return dict(await asyncio.shield(rep.future))
+            except asyncio.CancelledError:
+                if not rep.future.cancelled():
+                    raise
+                # The representative itself was cancelled; look again (or fetch ourselves)
+
+        rep = self._register(lat, lon, date)
+        self.upstream_fetches += 1
+        record_cache('weather_dedup', hit=False)
+        try:
+            result = await fetcher(lat, lon, date)
+        except asyncio.CancelledError:
+            self._remove(rep)
+            rep.future.cancel()
+            raise
+        except Exception as e:
+            self._remove(rep)
+            rep.future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log "exception was never retrieved"
+            rep.future.exception()
+            raise
+        rep.future.set_result(result)
+        rep.completed_at = time.monotonic()
+        if not result.get('num_data_points') or str(date)[:10] >= date_cls.today().isoformat():
+            # Don't let a failed/empty fetch, or today's partial day, stand in for later requests
+            self._remove(rep)
+        self._evict()
+        return dict(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns request/fetch counters. dedup_ratio is the share of requests served by another
+        request's fetch, i.e. the fraction of upstream API calls saved.
+        """
+        saved = self.requests - self.upstream_fetches
+        return {
+            'requests': self.requests,
+            'upstream_fetches': self.upstream_fetches,
+            'api_calls_saved': saved,
+            'dedup_ratio': saved / self.requests if self.requests else 0.0,
+            'indexed_entries': len(self._entries),
+        }
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    async def _fake_fetcher(lat: float, lon: float, date: str) -> Dict[str, Any]:
+        await asyncio.sleep(0.01)
+        return {'avg_temp_c': 20.0, 'avg_humidity_percent': 55.0, 'total_rainfall_mm': 1.2, 'num_data_points': 24}
+
+    async def _demo():
+        index = IngestionDedupIndex(radius_km=1.0)
+        # 100 points on a 100 m grid: nearly all of them fall within 1 km of an earlier request
+        points = [(40.71 + i * 0.0009, -74.00 + j * 0.0012) for i in range(10) for j in range(10)]
+        await asyncio.gather(*(index.fetch(lat, lon, '2024-01-01', _fake_fetcher) for lat, lon in points))
+        print(index.stats())
+
+    asyncio.run(_demo())
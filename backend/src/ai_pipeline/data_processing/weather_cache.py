@@ -0,0 +1,84 @@
+from datetime import date as date_cls, datetime
+from typing import Any, Dict, Optional
+
+from backend.src.ai_pipeline.caching.persistent_cache import PersistentLRUCache, resolve_cache_path
+from backend.src.ai_pipeline.config import get_env
+
+DEFAULT_GRID_DEG = 0.01  # ~1.1 km in latitude, finer than OpenWeatherMap's model grid
+
+
+class WeatherCache(PersistentLRUCache):
+    """
+    Cache of daily weather summaries keyed by coordinates snapped to a grid plus the date.
+
+    Historical weather for a past day never changes, so once a (cell, date) summary has been
+    fetched it can be served to any later request that falls in the same grid cell.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, grid_deg: float = DEFAULT_GRID_DEG, **kwargs: Any):
+        """
+        Args:
+            db_path (str, optional): SQLite file for the persistent level (None = memory only).
+            grid_deg (float): Size of the snapping grid in degrees.
+            **kwargs: Size/age limits forwarded to PersistentLRUCache.
+        """
+        if grid_deg <= 0:
+            raise ValueError("grid_deg must be positive.")
+        kwargs.setdefault('table_name', 'weather_cache')
+        super().__init__(db_path=db_path, **kwargs)
+        self.grid_deg = grid_deg
+
+    def snap(self, value: float) -> float:
+        return round(round(value / self.grid_deg) * self.grid_deg, 6)
+
+    def make_key(self, lat: float, lon: float, date: str) -> str:
+        return f"{self.snap(lat)}:{self.snap(lon)}:{_normalize_date(date)}"
+
+    def get_weather(self, lat: float, lon: float, date: str) -> Optional[Dict[str, Optional[float]]]:
+        return self.get(self.make_key(lat, lon, date))
+
+    def put_weather(self, lat: float, lon: float, date: str, weather: Dict[str, Optional[float]]) -> bool:
+        """
+        Stores a weather summary if it is final. Returns True if it was cached.
+
+        Summaries for today (still accumulating hours) and failed fetches are not cached.
+        """
+        if not weather or not weather.get('num_data_points'):
+            return False
+        if _normalize_date(date) >= date_cls.today().isoformat():
+            return False
+        self.set(self.make_key(lat, lon, date), _to_builtin(weather))
+        return True
+
+
+def _normalize_date(date: str) -> str:
+    return datetime.fromisoformat(str(date)[:10]).date().isoformat()
+
+
+def _to_builtin(weather: Dict[str, Any]) -> Dict[str, Any]:
+    # Pandas reductions return NumPy scalars, which json can't serialise
+    return {k: (v.item() if hasattr(v, 'item') else v) for k, v in weather.items()}
+
+
+_default_cache: Optional[WeatherCache] = None
+
+
+def get_default_weather_cache() -> WeatherCache:
+    """
+    Returns the process-wide weather cache, creating it on first use.
+
+    Configured through environment variables:
+        WEATHER_CACHE_PATH: SQLite file for the persistent level (default weather_cache.sqlite
+            under CACHE_DIR; 'memory' for no disk level).
+        WEATHER_CACHE_GRID_DEG: Snapping grid size in degrees.
+        WEATHER_CACHE_MAX_AGE_DAYS: Age after which cached days are refetched.
+    """
+    global _default_cache
+    if _default_cache is None:
+        max_age_days = get_env("WEATHER_CACHE_MAX_AGE_DAYS")
+        _default_cache = WeatherCache(
+            db_path=resolve_cache_path(get_env("WEATHER_CACHE_PATH"), 'weather_cache.sqlite'),
+            grid_deg=float(get_env("WEATHER_CACHE_GRID_DEG", DEFAULT_GRID_DEG)),
+            max_age_seconds=float(max_age_days) * 86400 if max_age_days else None
+        )
+    return _default_cache
@@ -0,0 +1 @@
+"""Site geometry: sample grids and zone polygons."""
@@ -0,0 +1,251 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import geopandas as gpd
+import httpx
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+
+from backend.src.ai_pipeline.data_processing.data_ingestion import (
+    default_weather_dates,
+    fetch_weather_data_many,
+    get_soil_properties_bulk,
+)
+from backend.src.ai_pipeline.data_processing.spatial_dedup import IngestionDedupIndex
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import (
+    FEATURE_COLUMNS,
+    describe_clusters,
+    fit_streaming_zoning_model,
+)
+
+WGS84 = "EPSG:4326"
+DEFAULT_RESOLUTION_M = 100.0
+DEFAULT_TILE_CELLS = 32  # tiles are TILE_CELLS x TILE_CELLS grid cells
+
+
+def _as_geometry(polygon: Union[BaseGeometry, Dict[str, Any]]) -> BaseGeometry:
+    geometry = shape(polygon) if isinstance(polygon, dict) else polygon
+    if geometry.is_empty or geometry.geom_type not in ('Polygon', 'MultiPolygon'):
+        raise ValueError("Site must be a non-empty Polygon or MultiPolygon in WGS84 lon/lat.")
+    return geometry
+
+
+def generate_sample_grid(
+    polygon: Union[BaseGeometry, Dict[str, Any]],
+    resolution_m: float = DEFAULT_RESOLUTION_M,
+    tile_cells: int = DEFAULT_TILE_CELLS
+) -> Iterator[pd.DataFrame]:
+    """
+    Lays a square grid of resolution_m cells over a project polygon and yields the cells whose
+    centres fall inside it, one tile at a time so large parcels never materialise in full.
+
+    The grid is built in the polygon's local UTM zone so cells are true metre squares.
+
+    Args:
+        polygon: Shapely (Multi)Polygon or GeoJSON-like dict in WGS84 lon/lat.
+        resolution_m (float): Cell size in metres.
+        tile_cells (int): Tile edge length in cells.
+
+    Yields:
+        pd.DataFrame: One row per cell with 'row', 'col' (grid indices), 'x', 'y' (UTM cell centre)
+        and 'lat', 'lon' (WGS84 cell centre). The UTM CRS is stored in the frame's attrs['crs'].
+    """
+    if resolution_m <= 0 or tile_cells < 1:
+        raise ValueError("resolution_m and tile_cells must be positive.")
+
+    site = gpd.GeoSeries([_as_geometry(polygon)], crs=WGS84)
+    utm_crs = site.estimate_utm_crs()
+    site_utm = site.to_crs(utm_crs).iloc[0]
+    shapely.prepare(site_utm)
+    to_wgs84 = Transformer.from_crs(utm_crs, WGS84, always_xy=True)
+
+    minx, miny, maxx, maxy = site_utm.bounds
+    n_rows = max(1, int(np.ceil((maxy - miny) / resolution_m)))
+    n_cols = max(1, int(np.ceil((maxx - minx) / resolution_m)))
+
+    for row_start in range(0, n_rows, tile_cells):
+        rows = np.arange(row_start, min(row_start + tile_cells, n_rows), dtype=np.int32)
+        for col_start in range(0, n_cols, tile_cells):
+            cols = np.arange(col_start, min(col_start + tile_cells, n_cols), dtype=np.int32)
+            grid_rows, grid_cols = np.meshgrid(rows, cols, indexing='ij')
+            grid_rows, grid_cols = grid_rows.ravel(), grid_cols.ravel()
+            xs = minx + (grid_cols + 0.5) * resolution_m
+            ys = miny + (grid_rows + 0.5) * resolution_m
+
+            inside = shapely.contains_xy(site_utm, xs, ys)
+            if not inside.any():
+                continue
+            lons, lats = to_wgs84.transform(xs[inside], ys[inside])
+            cells = pd.DataFrame({
+                'row': grid_rows[inside],
+                'col': grid_cols[inside],
+                'x': xs[inside],
+                'y': ys[inside],
+                'lat': np.round(lats, 6),
+                'lon': np.round(lons, 6),
+            })
+            cells.attrs['crs'] = utm_crs
+            yield cells
+
+
+async def _ingest_tile(
+    cells: pd.DataFrame,
+    dates: Sequence[str],
+    client: Optional[httpx.AsyncClient],
+    dedup_index: Optional[IngestionDedupIndex] = None
+) -> pd.DataFrame:
+    """
+    Weather and soil for one tile of grid cells, with float32 feature columns.
+    """
+    points = list(zip(cells['lat'], cells['lon']))
+    weather_task = fetch_weather_data_many(points, dates, client=client, dedup_index=dedup_index)
+    soil_task = asyncio.to_thread(get_soil_properties_bulk, cells['lat'].to_numpy(), cells['lon'].to_numpy())
+    weather, soil = await asyncio.gather(weather_task, soil_task)
+
+    tile = cells.merge(weather[['lat', 'lon'] + FEATURE_COLUMNS], on=['lat', 'lon'], how='left')
+    tile[FEATURE_COLUMNS] = tile[FEATURE_COLUMNS].astype(np.float32)
+    tile['soil_type'] = soil['soil_type'].astype(str).to_numpy()
+    tile['ph_level'] = soil['ph_level'].to_numpy(dtype=np.float32)
+    return tile
+
+
+async def analyze_site(
+    polygon: Union[BaseGeometry, Dict[str, Any]],
+    resolution_m: float = DEFAULT_RESOLUTION_M,
+    dates: Optional[Sequence[str]] = None,
+    n_clusters: int = 3,
+    tile_cells: int = DEFAULT_TILE_CELLS,
+    batch_size: int = 10_000,
+    client: Optional[httpx.AsyncClient] = None,
+    random_state: int = 42,
+    dedup_index: Optional[IngestionDedupIndex] = None
+) -> gpd.GeoDataFrame:
+    """
+    Zones a whole project polygon: grid it, ingest every cell, cluster, and merge cells into zone polygons.
+
+    Work happens tile by tile so memory stays bounded for large municipal parcels:
+        1. Each tile of grid cells is ingested (weather + soil) and spilled to a temporary
+           directory as float32 features.
+        2. The spilled tiles are streamed through fit_streaming_zoning_model.
+        3. Each tile is labelled, and its cells are merged into per-zone polygons and statistics.
+
+    Args:
+        polygon: Shapely (Multi)Polygon or GeoJSON-like dict in WGS84 lon/lat.
+        resolution_m (float): Sample grid resolution in metres.
+        dates (Sequence[str], optional): Weather dates; defaults to the last 3 days.
+        n_clusters (int): The number of microclimate zones to identify.
+        tile_cells (int): Tile edge length in cells.
+        batch_size (int): Rows per MiniBatchKMeans.partial_fit call.
+        client (httpx.AsyncClient, optional): Shared HTTP client for weather requests.
+        random_state (int): Seed for MiniBatchKMeans.
+        dedup_index (IngestionDedupIndex, optional): Shares weather fetches between nearby cells,
+            e.g. one fetch per weather-grid cell when resolution_m is finer than the weather data.
+
+    Returns:
+        gpd.GeoDataFrame: One row per zone (WGS84) with the same fields as the
+        identify_microclimate_zones descriptions plus 'soil_type', 'ph_level', 'area_m2' and
+        the zone geometry. Cells without weather data are left out of every zone.
+    """
+    dates = list(dates) if dates else default_weather_dates()
+    spill_dir = tempfile.mkdtemp(prefix='site_analysis_')
+    try:
+        tile_paths: List[str] = []
+        utm_crs = None
+        for tile_index, cells in enumerate(generate_sample_grid(polygon, resolution_m, tile_cells)):
+            utm_crs = cells.attrs['crs']
+            tile = await _ingest_tile(cells, dates, client, dedup_index)
+            path = os.path.join(spill_dir, f'tile_{tile_index:06d}.parquet')
+            tile.to_parquet(path, index=False)
+            tile_paths.append(path)
+
+        empty = gpd.GeoDataFrame(
+            columns=['cluster_id'] + FEATURE_COLUMNS + ['count', 'representative_category',
+                                                        'soil_type', 'ph_level', 'area_m2', 'geometry'],
+            geometry='geometry', crs=WGS84
+        )
+        if not tile_paths:
+            print("Warning: The site polygon contains no grid cells at this resolution.")
+            return empty
+
+        def read_tiles() -> Iterator[pd.DataFrame]:
+            for path in tile_paths:
+                yield pd.read_parquet(path, columns=FEATURE_COLUMNS)
+
+        model = await asyncio.to_thread(
+            fit_streaming_zoning_model, read_tiles, n_clusters,
+            batch_size=batch_size, random_state=random_state
+        )
+        if model is None:
+            return empty
+        scaler, kmeans = model
+        k = kmeans.n_clusters
+
+        sums = np.zeros((k, len(FEATURE_COLUMNS)))
+        counts = np.zeros(k, dtype=np.int64)
+        ph_sums = np.zeros(k)
+        ph_counts = np.zeros(k, dtype=np.int64)
+        soil_counts = [Counter() for _ in range(k)]
+        zone_geometries: List[Optional[BaseGeometry]] = [None] * k
+        half = resolution_m / 2
+
+        for path in tile_paths:
+            tile = pd.read_parquet(path).dropna(subset=FEATURE_COLUMNS)
+            if tile.empty:
+                continue
+            features = tile[FEATURE_COLUMNS].to_numpy(dtype=float)
+            labels = kmeans.predict(scaler.transform(features))
+
+            counts += np.bincount(labels, minlength=k)
+            for j in range(len(FEATURE_COLUMNS)):
+                sums[:, j] += np.bincount(labels, weights=features[:, j], minlength=k)
+            ph = tile['ph_level'].to_numpy(dtype=float)
+            has_ph = ~np.isnan(ph)
+            ph_sums += np.bincount(labels[has_ph], weights=ph[has_ph], minlength=k)
+            ph_counts += np.bincount(labels[has_ph], minlength=k)
+
+            cells = shapely.box(tile['x'] - half, tile['y'] - half, tile['x'] + half, tile['y'] + half)
+            for label in np.unique(labels):
+                in_zone = labels == label
+                soil_counts[label].update(tile['soil_type'][in_zone].dropna())
+                tile_geometry = shapely.union_all(cells[in_zone])
+                previous = zone_geometries[label]
+                zone_geometries[label] = tile_geometry if previous is None else shapely.union(previous, tile_geometry)
+
+        descriptions = describe_clusters(sums, counts)
+        for desc in descriptions:
+            i = desc['cluster_id']
+            desc['soil_type'] = soil_counts[i].most_common(1)[0][0] if soil_counts[i] else None
+            desc['ph_level'] = round(ph_sums[i] / ph_counts[i], 2) if ph_counts[i] else None
+            desc['area_m2'] = round(zone_geometries[i].area, 1)
+            desc['geometry'] = zone_geometries[i]
+        if not descriptions:
+            return empty
+
+        zones = gpd.GeoDataFrame(descriptions, geometry='geometry', crs=utm_crs)
+        return zones.to_crs(WGS84)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    from shapely.geometry import Polygon
+
+    # A ~1 km x 1 km parcel in New York City
+    example_site = Polygon([
+        (-74.010, 40.710), (-73.998, 40.710), (-73.998, 40.719), (-74.010, 40.719), (-74.010, 40.710)
+    ])
+
+    n_cells = sum(len(tile) for tile in generate_sample_grid(example_site, resolution_m=100))
+    print(f"Sample grid at 100 m resolution: {n_cells} cells")
+
+    site_zones = asyncio.run(analyze_site(example_site, resolution_m=250, n_clusters=2))
+    print(site_zones.drop(columns='geometry'))
@@ -0,0 +1,393 @@
+"""
+Per-stage timing and metrics for the pipeline.
+
+Pipeline code reports through the module-level helpers (stage_timer, instrumented,
+record_error, record_cache, record_payload); where the measurements go is decided by the
+exporter installed with set_exporter:
+
+    PrometheusExporter   aggregates counters and histograms and renders the Prometheus text format
+    InMemoryCollector    keeps every raw event, for tests and ad-hoc profiling
+
+With no exporter installed (the default) every helper returns after one global check, so
+instrumentation can stay in hot paths. configure_from_env() installs an exporter from the
+PIPELINE_METRICS environment variable ('prometheus' or 'memory').
+
+Metrics:
+    pipeline_stage_duration_seconds   histogram  {stage}
+    pipeline_stage_calls_total        counter    {stage}
+    pipeline_stage_errors_total       counter    {stage, error}
+    pipeline_cache_lookups_total      counter    {cache, result}   result: hit | miss
+    pipeline_payload_size             histogram  {stage, unit}     unit: rows, points, plants, bytes, ...
+    pipeline_router_decisions_total   counter    {route, reason}   route: direct | agent
+    pipeline_router_saved_seconds     counter    {}                estimated LLM time skipped by direct routes
+"""
+import abc
+import bisect
+import functools
+import inspect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from backend.src.ai_pipeline.config import get_env
+
+STAGE_DURATION = 'pipeline_stage_duration_seconds'
+STAGE_CALLS = 'pipeline_stage_calls_total'
+STAGE_ERRORS = 'pipeline_stage_errors_total'
+CACHE_LOOKUPS = 'pipeline_cache_lookups_total'
+PAYLOAD_SIZE = 'pipeline_payload_size'
+ROUTER_DECISIONS = 'pipeline_router_decisions_total'
+ROUTER_SAVED = 'pipeline_router_saved_seconds'
+
+METRIC_HELP = {
+    STAGE_DURATION: 'Wall-clock time spent in a pipeline stage.',
+    STAGE_CALLS: 'Number of times a pipeline stage ran.',
+    STAGE_ERRORS: 'Number of failures in a pipeline stage, by error type.',
+    CACHE_LOOKUPS: 'Cache lookups by cache and result.',
+    PAYLOAD_SIZE: 'Size of the data a pipeline stage handled.',
+    ROUTER_DECISIONS: 'Agent queries by route taken and the reason for it.',
+    ROUTER_SAVED: 'Estimated agent (LLM) time skipped by answering queries directly.',
+}
+
+LATENCY_BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsExporter(abc.ABC):
+    """
+    Receives measurements from the pipeline. Subclasses decide what to keep.
+    """
+
+    @abc.abstractmethod
+    def increment(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        """
+        Adds value to the counter name{labels}.
+        """
+
+    @abc.abstractmethod
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        """
+        Records one observation of the histogram name{labels}.
+        """
+
+
+class PrometheusExporter(MetricsExporter):
+    """
+    Aggregates counters and cumulative histograms in memory; render() returns them in the
+    Prometheus text exposition format (e.g. for a /metrics endpoint). Thread-safe.
+    """
+
+    def __init__(self, buckets: Optional[Dict[str, Tuple[float, ...]]] = None):
+        """
+        Args:
+            buckets (Dict[str, Tuple[float, ...]], optional): Histogram bucket bounds per metric name.
+                Metrics not listed use LATENCY_BUCKETS_S.
+        """
+        self.buckets = {STAGE_DURATION: LATENCY_BUCKETS_S, PAYLOAD_SIZE: SIZE_BUCKETS, **(buckets or {})}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        # name -> labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._histograms: Dict[str, Dict[Labels, List[Any]]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        bounds = self.buckets.get(name, LATENCY_BUCKETS_S)
+        # Index of the first bucket whose upper bound holds value (len(bounds) is +Inf)
+        index = bisect.bisect_left(bounds, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            state = series.get(labels)
+            if state is None:
+                state = series[labels] = [[0] * (len(bounds) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0.0)
+
+    def histogram_summary(self, name: str, **labels: Any) -> Dict[str, float]:
+        """
+        Returns {'count', 'sum', 'mean'} for one histogram series.
+        """
+        with self._lock:
+            state = self._histograms.get(name, {}).get(_labels(labels))
+            if state is None:
+                return {'count': 0, 'sum': 0.0, 'mean': 0.0}
+            return {'count': state[2], 'sum': state[1], 'mean': state[1] / state[2]}
+
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(labels) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        escaped = (
+            '{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for k, v in pairs
+        )
+        return '{' + ','.join(escaped) + '}'
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        if math.isinf(value):
+            return '+Inf'
+        return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{self._format_labels(labels)} {self._format_value(value)}")
+            for name in sorted(self._histograms):
+                bounds = self.buckets.get(name, LATENCY_BUCKETS_S)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, (counts, total, count) in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(list(bounds) + [math.inf], counts):
+                        cumulative += bucket_count
+                        le = ('le', self._format_value(bound))
+                        lines.append(f"{name}_bucket{self._format_labels(labels, le)} {cumulative}")
+                    lines.append(f"{name}_sum{self._format_labels(labels)} {self._format_value(total)}")
+                    lines.append(f"{name}_count{self._format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+class InMemoryCollector(MetricsExporter):
+    """
+    Records every measurement as a raw (kind, name, labels, value) event, so tests can assert
+    on exactly what a piece of code reported.
+    """
+
+    def __init__(self):
+        self.events: List[Tuple[str, str, Dict[str, str], float]] = []
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        with self._lock:
+            self.events.append(('counter', name, dict(labels), value))
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            self.events.append(('histogram', name, dict(labels), value))
+
+    def _matching(self, kind: str, name: str, labels: Dict[str, Any]) -> List[float]:
+        wanted = {k: str(v) for k, v in labels.items()}
+        with self._lock:
+            return [
+                value for event_kind, event_name, event_labels, value in self.events
+                if event_kind == kind and event_name == name
+                and all(event_labels.get(k) == v for k, v in wanted.items())
+            ]
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """
+        Sum of a counter over every series matching the given labels.
+        """
+        return sum(self._matching('counter', name, labels))
+
+    def observations(self, name: str, **labels: Any) -> List[float]:
+        """
+        Every value observed for a histogram in series matching the given labels.
+        """
+        return self._matching('histogram', name, labels)
+
+    def stages(self) -> List[str]:
+        with self._lock:
+            return sorted({labels['stage'] for _, name, labels, _ in self.events if name == STAGE_CALLS})
+
+    def clear(self) -> None:
+        with self._lock:
+            self.events.clear()
+
+
+_exporter: Optional[MetricsExporter] = None
+
+
+def set_exporter(exporter: Optional[MetricsExporter]) -> Optional[MetricsExporter]:
+    """
+    Installs the process-wide exporter (None disables instrumentation). Returns the previous one.
+    """
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    return previous
+
+
+def get_exporter() -> Optional[MetricsExporter]:
+    return _exporter
+
+
+def configure_from_env() -> Optional[MetricsExporter]:
+    """
+    Installs an exporter according to PIPELINE_METRICS ('prometheus', 'memory', or unset/'off'),
+    unless one is already installed. Returns the active exporter.
+    """
+    if _exporter is None:
+        mode = (get_env("PIPELINE_METRICS") or 'off').strip().lower()
+        if mode == 'prometheus':
+            set_exporter(PrometheusExporter())
+        elif mode == 'memory':
+            set_exporter(InMemoryCollector())
+        elif mode not in ('', 'off', 'none', '0', 'false'):
+            raise ValueError(f"Unknown PIPELINE_METRICS value: {mode!r}")
+    return _exporter
+
+
+class _StageTimer:
+    __slots__ = ('exporter', 'stage', 'labels', 'start')
+
+    def __init__(self, exporter: MetricsExporter, stage: str):
+        self.exporter = exporter
+        self.stage = stage
+        self.labels: Labels = (('stage', stage),)
+        self.start = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.exporter.observe(STAGE_DURATION, self.labels, time.perf_counter() - self.start)
+        self.exporter.increment(STAGE_CALLS, self.labels)
+        if exc_type is not None:
+            record_error(self.stage, exc_type.__name__, self.exporter)
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def stage_timer(stage: str):
+    """
+    Context manager timing a block as one call of stage. An exception escaping the block is
+    counted as an error (by exception type) and re-raised.
+    """
+    exporter = _exporter
+    if exporter is None:
+        return _NOOP_TIMER
+    return _StageTimer(exporter, stage)
+
+
+def instrumented(stage: str) -> Callable[[F], F]:
+    """
+    Decorator timing every call of a sync or async function as stage (see stage_timer).
+    """
+    def decorator(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                exporter = _exporter
+                if exporter is None:
+                    return await fn(*args, **kwargs)
+                with _StageTimer(exporter, stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            exporter = _exporter
+            if exporter is None:
+                return fn(*args, **kwargs)
+            with _StageTimer(exporter, stage):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def record_duration(stage: str, seconds: float) -> None:
+    """
+    Records a latency measured by hand (e.g. time to first token) without counting a stage call.
+    """
+    exporter = _exporter
+    if exporter is not None:
+        exporter.observe(STAGE_DURATION, (('stage', stage),), seconds)
+
+
+def record_error(stage: str, error: str, exporter: Optional[MetricsExporter] = None) -> None:
+    """
+    Counts a failure in stage. Stages call this for failures they handle themselves (logged
+    and an empty result returned) rather than raise, e.g. error='missing_columns'.
+    """
+    exporter = exporter or _exporter
+    if exporter is not None:
+        exporter.increment(STAGE_ERRORS, (('error', error), ('stage', stage)))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    exporter = _exporter
+    if exporter is not None:
+        exporter.increment(CACHE_LOOKUPS, (('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+
+def record_payload(stage: str, size: float, unit: str = 'items') -> None:
+    exporter = _exporter
+    if exporter is not None:
+        exporter.observe(PAYLOAD_SIZE, (('stage', stage), ('unit', unit)), size)
+
+
+def record_route(route: str, reason: str, saved_s: float = 0.0) -> None:
+    exporter = _exporter
+    if exporter is not None:
+        exporter.increment(ROUTER_DECISIONS, (('reason', reason), ('route', route)))
+        if saved_s > 0:
+            exporter.increment(ROUTER_SAVED, (), saved_s)
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    @instrumented('demo.work')
+    def work(n: int) -> int:
+        record_payload('demo.work', n, 'rows')
+        if n < 0:
+            raise ValueError("negative")
+        return sum(range(n))
+
+    # Disabled: the wrapper only pays for one global lookup
+    start = time.perf_counter()
+    for _ in range(100_000):
+        work(10)
+    print(f"Disabled: {(time.perf_counter() - start) * 1e6 / 100_000:.2f} us/call")
+
+    exporter = PrometheusExporter()
+    set_exporter(exporter)
+    start = time.perf_counter()
+    for _ in range(100_000):
+        work(10)
+    print(f"Enabled:  {(time.perf_counter() - start) * 1e6 / 100_000:.2f} us/call")
+    try:
+        work(-1)
+    except ValueError:
+        pass
+    record_cache('demo', hit=True)
+    record_cache('demo', hit=False)
+    print(exporter.render())
@@ -0,0 +1 @@
+"""LangChain agent and tools around the plant recommender."""
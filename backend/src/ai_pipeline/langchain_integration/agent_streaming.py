@@ -0,0 +1,180 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from backend.src.ai_pipeline.instrumentation import record_duration, record_error, stage_timer
+from backend.src.ai_pipeline.langchain_integration.query_router import QueryRouter
+
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_HEARTBEAT_S = 15.0
+_DONE = object()
+
+
+def _event_from_langchain(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Maps one astream_events (v2) event to the compact event sent to clients, or None to skip it.
+    """
+    kind = event['event']
+    data = event.get('data', {})
+    if kind in ('on_llm_stream', 'on_chat_model_stream'):
+        chunk = data.get('chunk')
+        text = getattr(chunk, 'text', None) or getattr(chunk, 'content', None) or ''
+        return {'type': 'token', 'text': text} if text else None
+    if kind == 'on_tool_start':
+        # The ReAct agent's tool arguments are already in the streamed tokens ("Action Input: ...")
+        return {'type': 'tool_start', 'tool': event['name']}
+    if kind == 'on_tool_end':
+        return {'type': 'tool_end', 'tool': event['name'], 'output': str(data.get('output'))}
+    if kind == 'on_chain_end' and not event.get('parent_ids'):
+        # The root run (the AgentExecutor itself) finishing carries the final answer
+        output = data.get('output')
+        return {'type': 'final', 'output': output.get('output') if isinstance(output, dict) else str(output)}
+    return None
+
+
+async def _produce(agent: Any, inputs: Dict[str, Any], queue: asyncio.Queue) -> None:
+    """
+    Runs the agent and feeds client events into queue.
+
+    The queue is bounded: when the consumer falls behind, tokens are merged into one pending
+    chunk instead of queueing each one (so memory stays bounded without dropping text), and
+    every other event waits for room.
+    """
+    pending_text = ''
+
+    async def flush_tokens() -> None:
+        nonlocal pending_text
+        if pending_text:
+            await queue.put({'type': 'token', 'text': pending_text})
+            pending_text = ''
+
+    router, route, reason = None, None, None
+    try:
+        if isinstance(agent, QueryRouter):
+            router = agent
+            route, reason, _ = await router.aroute(inputs['input'])
+            await queue.put({'type': 'route', 'route': route, 'reason': reason})
+            if route == 'direct':
+                # No LLM involved: the routed answer is the whole response (ainvoke records it)
+                result = await router.ainvoke(inputs)
+                await queue.put({'type': 'final', 'output': result['output']})
+                await queue.put(_DONE)
+                return
+            agent = router.agent
+
+        start = time.perf_counter()
+        async for event in agent.astream_events(inputs, version='v2'):
+            client_event = _event_from_langchain(event)
+            if client_event is None:
+                continue
+            if client_event['type'] == 'token':
+                if not pending_text:
+                    try:
+                        queue.put_nowait(client_event)
+                        continue
+                    except asyncio.QueueFull:
+                        pass
+                pending_text += client_event['text']
+                if not queue.full():
+                    await flush_tokens()
+                continue
+            await flush_tokens()
+            await queue.put(client_event)
+        await flush_tokens()
+        if router is not None:
+            # Only completed runs count, as with ainvoke, so the router's latency estimate stays honest
+            router.record(route, reason, time.perf_counter() - start)
+    except asyncio.CancelledError:
+        # The consumer went away (stream_agent_events closed): nobody is waiting for _DONE, and
+        # awaiting room in a full queue here would never return
+        raise
+    except Exception as e:
+        record_error('agent.stream', type(e).__name__)
+        await flush_tokens()
+        await queue.put({'type': 'error', 'message': str(e)})
+    await queue.put(_DONE)
+
+
+async def stream_agent_events(
+    agent: Any,
+    inputs: Dict[str, Any],
+    max_queue: int = DEFAULT_MAX_QUEUE,
+    heartbeat_s: Optional[float] = DEFAULT_HEARTBEAT_S
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs the agent from build_ai_agent (or a QueryRouter in front of it) and yields its progress
+    as it happens, instead of waiting for the whole ReAct loop like ainvoke.
+
+    Yields dicts with a 'type' of:
+        start       sent immediately, before the first LLM call
+        route       the QueryRouter's decision (only when agent is a QueryRouter)
+        token       a chunk of LLM output ('text')
+        tool_start  a tool call ('tool')
+        tool_end    a tool result ('tool', 'output')
+        final       the final answer ('output')
+        error       the run failed ('message')
+        heartbeat   nothing happened for heartbeat_s seconds (keeps proxies from closing the stream)
+
+    The agent runs in a separate task that feeds a bounded queue (see _produce). Closing the
+    generator early (e.g. the HTTP client disconnected) cancels that task and with it the LLM call.
+
+    Args:
+        agent: AgentExecutor, or a QueryRouter wrapping one.
+        inputs (Dict[str, Any]): Agent inputs, e.g. {'input': query}.
+        max_queue (int): Events buffered ahead of a slow consumer.
+        heartbeat_s (float, optional): Idle interval after which a heartbeat is sent (None disables).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+    start = time.perf_counter()
+    producer = asyncio.create_task(_produce(agent, inputs, queue))
+    first_token = True
+    try:
+        with stage_timer('agent.stream'):
+            yield {'type': 'start'}
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat_s)
+                except asyncio.TimeoutError:
+                    yield {'type': 'heartbeat'}
+                    continue
+                if event is _DONE:
+                    break
+                if first_token and event['type'] in ('token', 'final'):
+                    first_token = False
+                    record_duration('agent.first_token', time.perf_counter() - start)
+                yield event
+    finally:
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Encodes an event from stream_agent_events as a server-sent event (heartbeats as comments).
+    """
+    if event['type'] == 'heartbeat':
+        return ": heartbeat\n\n"
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+# Example Usage (for testing purposes, run asynchronously)
+async def main_test_streaming():
+    from backend.src.ai_pipeline.langchain_integration.query_router import build_routed_agent
+    from backend.src.ai_pipeline.plant_selection.recommender import PlantRecommender
+
+    router = build_routed_agent(PlantRecommender(), verbose=False)
+    query = "What are some good plants for carbon sequestration in a temperate-humid region with clay soil?"
+    start = time.perf_counter()
+    async for event in stream_agent_events(router, {'input': query}):
+        elapsed = time.perf_counter() - start
+        if event['type'] == 'token':
+            print(event['text'], end='', flush=True)
+        else:
+            print(f"\n[{elapsed:6.2f}s] {event}")
+
+
+if __name__ == '__main__':
+    # Needs the same setup as chain_builder's example: Supabase in .env and Ollama running 'llama2'
+    asyncio.run(main_test_streaming())
@@ -1,117 +1,198 @@
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain_core.prompts import ChatPromptTemplate
-# For local LLM (e.g., Ollama, Llama.cpp)
-from langchain_community.llms import Ollama 
-# For OpenAI or other commercial LLMs, uncomment and configure
-# from langchain_openai import ChatOpenAI 
-from langchain_core.tools import tool # Standard way to create a LangChain tool
-from typing import List, Dict, Any, Optional
+from langchain_core.tools import BaseTool
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Type
+import asyncio
+import json
 
 # Import your PlantRecommender class (assuming it's relative to this file's location)
 # Adjust path if your main.py import structure is different.
-# If this file is only for agent building and recommender is passed in, this relative import might not be strictly needed here.
-# For standalone testing of chain_builder, you might need a mock or actual instance.
 from backend.src.ai_pipeline.plant_selection.recommender import PlantRecommender 
+from backend.src.ai_pipeline.caching.llm_cache import PersistentLLMCache, get_default_llm_cache
+from backend.src.ai_pipeline.instrumentation import instrumented, record_error, record_payload
+from backend.src.ai_pipeline.langchain_integration.tool_cache import ToolResultCache, get_default_tool_cache
 
 
-# Define a custom tool using the @tool decorator
-# This tool will wrap the functionality of your PlantRecommender class
-@tool
-def recommend_plants_tool(
+class PlantRecommendationInput(BaseModel):
+    microclimate_category: str = Field(
+        description="Microclimate category, e.g. 'temperate-humid'. A JSON object with all fields is also accepted."
+    )
+    soil_type: Optional[str] = Field(default=None, description="Soil type, e.g. 'loamy', 'sandy' or 'clay'.")
+    ph_level: Optional[float] = Field(default=None, description="Soil pH level, e.g. 6.5.")
+    user_goals: Optional[List[str]] = Field(default=None, description="Optional goals, e.g. ['pollinator-friendly'].")
+
+
+def _coerce_tool_input(
     microclimate_category: str,
-    soil_type: str,
-    ph_level: float,
-    user_goals: Optional[List[str]] = None
-) -> str:
+    soil_type: Optional[str],
+    ph_level: Optional[float],
+    user_goals: Optional[Any]
+) -> Dict[str, Any]:
     """
-    Recommends plant species based on specific environmental conditions and user goals.
-    Input should be a JSON string with 'microclimate_category', 'soil_type', 'ph_level' (float),
-    and optionally 'user_goals' (list of strings).
-    Example: {"microclimate_category": "temperate-humid", "soil_type": "loamy", "ph_level": 6.5, "user_goals": ["pollinator-friendly"]}
+    Normalises tool arguments. ReAct agents pass the whole 'Action Input' as one string, so a JSON
+    object in the first argument is unpacked into the individual fields.
     """
-    # This function needs an instance of PlantRecommender to actually work.
-    # In a real application, this tool instance would likely be passed or
-    # the recommender would be initialized within the FastAPI app and passed to the agent.
-    # For now, let's assume `plant_recommender_instance` is available in the scope
-    # where this tool is used, or initialize a new one for demonstration.
-
-    # IMPORTANT: In a production setup, avoid initializing the recommender inside the tool
-    # every time it's called. Pass it as a dependency or use a global singleton if appropriate
-    # for your application's architecture (e.g., FastAPI's dependency injection).
-    try:
-        current_recommender = PlantRecommender() # Re-initialize for simplicity in tool definition example
-        # In an actual FastAPI app, you'd pass the initialized recommender here.
-        # e.g., current_recommender = tool_context.get('plant_recommender')
-
-        # Convert user_goals to list if it's None or a single string
-        goals_list = user_goals if isinstance(user_goals, list) else ([user_goals] if user_goals else [])
-
-        recommended = asyncio.run(current_recommender.recommend_plants(
-            microclimate_category=microclimate_category,
-            soil_type=soil_type,
-            ph_level=ph_level,
-            user_goals=goals_list
-        ))
-        
-        if recommended:
-            return "Recommended plants: " + ", ".join([p.get('common_name', p.get('scientific_name', 'Unknown Plant')) for p in recommended])
-        else:
-            return "No plants found for the given criteria."
-    except Exception as e:
-        return f"Error recommending plants: {e}. Please ensure inputs are correct and backend is running."
-
-def build_ai_agent(recommender_instance: PlantRecommender):
+    if soil_type is None and microclimate_category.strip().startswith('{'):
+        try:
+            parsed = json.loads(microclimate_category)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict):
+            microclimate_category = parsed.get('microclimate_category', microclimate_category)
+            soil_type = parsed.get('soil_type')
+            ph_level = parsed.get('ph_level', ph_level)
+            user_goals = parsed.get('user_goals', user_goals)
+
+    # Convert user_goals to list if it's None or a single string
+    goals_list = user_goals if isinstance(user_goals, list) else ([user_goals] if user_goals else [])
+    return {
+        'microclimate_category': microclimate_category,
+        'soil_type': soil_type,
+        'ph_level': None if ph_level is None else float(ph_level),
+        'user_goals': goals_list,
+    }
+
+
+def _format_recommendations(recommended: List[Dict[str, Any]]) -> str:
+    if recommended:
+        return "Recommended plants: " + ", ".join([p.get('common_name', p.get('scientific_name', 'Unknown Plant')) for p in recommended])
+    return "No plants found for the given criteria."
+
+
+class PlantRecommenderTool(BaseTool):
+    """
+    LangChain tool wrapping a shared PlantRecommender.
+
+    The recommender (and its Supabase client and plant catalog) is injected once when the tool is
+    built, and the async path awaits it directly, so concurrent agent sessions running under
+    ainvoke share one event loop and one recommender. With a result_cache, repeated criteria
+    (after normalization, see ToolResultCache) are answered without touching the recommender.
+    """
+
+    name: str = "recommend_plants_tool"
+    description: str = (
+        "Recommends plant species based on specific environmental conditions and user goals. "
+        "Input should be a JSON string with 'microclimate_category', 'soil_type', 'ph_level' (float), "
+        "and optionally 'user_goals' (list of strings). "
+        'Example: {"microclimate_category": "temperate-humid", "soil_type": "loamy", "ph_level": 6.5, '
+        '"user_goals": ["pollinator-friendly"]}'
+    )
+    args_schema: Type[BaseModel] = PlantRecommendationInput
+    recommender: PlantRecommender
+    result_cache: Optional[ToolResultCache] = None
+
+    @instrumented('agent.tool')
+    async def _arun(
+        self,
+        microclimate_category: str,
+        soil_type: Optional[str] = None,
+        ph_level: Optional[float] = None,
+        user_goals: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None
+    ) -> str:
+        try:
+            criteria = _coerce_tool_input(microclimate_category, soil_type, ph_level, user_goals)
+            if self.result_cache is None:
+                recommended = await self.recommender.recommend_plants(**criteria)
+            else:
+                # Query with the rounded pH the cache key uses, so a cached answer is exactly what a fresh query gives
+                criteria['ph_level'] = self.result_cache.round_ph(criteria['ph_level'])
+                # Key on the catalog the answer comes from (refreshed first if stale), so a
+                # result never outlives it
+                catalog = await self.recommender.get_catalog()
+                recommended = self.result_cache.get_result(catalog_version=catalog.version, **criteria)
+                if recommended is None:
+                    recommended = await self.recommender.recommend_plants(**criteria)
+                    self.result_cache.put_result(recommended, catalog_version=catalog.version, **criteria)
+            observation = _format_recommendations(recommended)
+            record_payload('agent.tool', len(observation), 'chars')
+            return observation
+        except Exception as e:
+            record_error('agent.tool', type(e).__name__)
+            return f"Error recommending plants: {e}. Please ensure inputs are correct and backend is running."
+
+    def _run(
+        self,
+        microclimate_category: str,
+        soil_type: Optional[str] = None,
+        ph_level: Optional[float] = None,
+        user_goals: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForToolRun] = None
+    ) -> str:
+        # The sync path is only for callers without an event loop (e.g. agent.invoke in a script);
+        # blocking on asyncio.run inside a running loop would fail, so point them at ainvoke instead.
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._arun(microclimate_category, soil_type, ph_level, user_goals))
+        return "Error recommending plants: the sync tool path cannot run inside an event loop; use ainvoke."
+
+
+def build_ai_agent(
+    recommender_instance: PlantRecommender,
+    llm: Optional[Any] = None,
+    verbose: bool = True,
+    llm_cache: Optional[PersistentLLMCache] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    use_cache: bool = True
+):
     """
     Builds a LangChain ReAct agent capable of interacting with a PlantRecommenderTool.
 
     Args:
         recommender_instance (PlantRecommender): An initialized instance of your PlantRecommender.
+        llm (optional): LangChain LLM to drive the agent; defaults to a local Ollama 'llama2'.
+        verbose (bool): Print the agent's thought process and tool calls.
+        llm_cache (PersistentLLMCache, optional): Completion cache for the LLM; defaults to the
+            process-wide cache (LLM_CACHE_PATH). Not applied if the llm already has a cache set.
+        tool_cache (ToolResultCache, optional): Result cache for the recommendation tool; defaults
+            to the process-wide cache (TOOL_CACHE_PATH).
+        use_cache (bool): Set to False to always call the LLM and the recommender.
 
     Returns:
         AgentExecutor: A configured LangChain agent ready to process queries.
     """
-    # Pass the actual recommender_instance to the tool's context or modify the tool definition
-    # to receive it properly. For this simplified @tool, we're relying on it being accessible
-    # or being passed during tool creation. A more robust way might be to define the tool class
-    # and pass the recommender during its instantiation.
-    
-    # Let's override the `recommend_plants_tool` to use the provided instance
-    # This is a bit of a hack for the @tool decorator; typically you'd define a class-based tool
-    # and pass dependencies in its constructor.
-    # For a simple @tool, we need to ensure it uses the provided recommender_instance.
-    # A cleaner approach for production is often a Pydantic-based tool or a custom Tool class.
-
-    # Example of a more robust way (if not using @tool directly on a function):
-    # class PlantRecommenderTool(BaseTool):
-    #     name = "plant_recommender"
-    #     description = "Useful for recommending plants based on microclimate, soil, pH, and user goals."
-    #     recommender: PlantRecommender # Inject the recommender instance
-
-    #     def _run(self, microclimate_category: str, soil_type: str, ph_level: float, user_goals: Optional[List[str]] = None):
-    #         # ... call recommender.recommend_plants ...
+    if use_cache:
+        llm_cache = llm_cache if llm_cache is not None else get_default_llm_cache()
+        tool_cache = tool_cache if tool_cache is not None else get_default_tool_cache()
+    else:
+        llm_cache = tool_cache = None
 
-    #     def _arun(self, microclimate_category: str, soil_type: str, ph_level: float, user_goals: Optional[List[str]] = None):
-    #         # ... call async recommender.recommend_plants ...
+    # The tool reuses the injected recommender instead of creating a client per call
+    tools = [PlantRecommenderTool(recommender=recommender_instance, result_cache=tool_cache)] # Our single tool
 
-    # Now, let's make the `@tool` version work with the injected instance:
-    # We can't directly inject into the @tool function easily with its current signature
-    # without making it a method of a class. So, for the purpose of this example,
-    # let's modify the `recommend_plants_tool` function to temporarily use the passed instance
-    # (or you should adopt the `BaseTool` class approach above).
-
-    # For now, let's redefine the tool using functools.partial or make the recommender a global
-    # or ensure it's loaded in the tool's execution context.
-    # The simplest for this example is to instantiate it inside the tool (as done above),
-    # but be aware of performance implications if the tool is called frequently.
-
-    tools = [recommend_plants_tool] # Our single tool
+    # Agent and LLM integrations are heavy to import, so they load on first build
+    try:
+        # LangChain 1.x moved the classic AgentExecutor and ReAct agent to langchain-classic
+        from langchain_classic.agents import AgentExecutor, create_react_agent
+    except ImportError:
+        from langchain.agents import AgentExecutor, create_react_agent
+    from langchain_core.prompts import ChatPromptTemplate
+    # For local LLM (e.g., Ollama, Llama.cpp)
+    from langchain_community.llms import Ollama
+    # For OpenAI or other commercial LLMs, uncomment and configure
+    # from langchain_openai import ChatOpenAI
 
     # Choose your LLM. For local development, Ollama is great.
-    llm = Ollama(model="llama2") # Ensure 'llama2' model is pulled via Ollama
+    if llm is None:
+        llm = Ollama(model="llama2") # Ensure 'llama2' model is pulled via Ollama
+    if llm_cache is not None and llm.cache is None:
+        # Repeat prompts skip generation entirely; the model name and parameters are part of the key
+        llm.cache = llm_cache
     # llm = ChatOpenAI(model="gpt-4-turbo", temperature=0) # For OpenAI
 
     prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert AI assistant for carbon sequestration planning. Your primary role is to help users find suitable plants for their projects based on environmental data and their goals. You have access to a plant recommendation tool. Always explain your recommendations clearly and concisely."),
+        ("system", "You are an expert AI assistant for carbon sequestration planning. Your primary role is to help users find suitable plants for their projects based on environmental data and their goals. You have access to a plant recommendation tool. Always explain your recommendations clearly and concisely.\n\n"
+                   "You have access to the following tools:\n\n{tools}\n\n"
+                   "Use the following format:\n\n"
+                   "Question: the input question you must answer\n"
+                   "Thought: you should always think about what to do\n"
+                   "Action: the action to take, should be one of [{tool_names}]\n"
+                   "Action Input: the input to the action\n"
+                   "Observation: the result of the action\n"
+                   "... (this Thought/Action/Action Input/Observation can repeat N times)\n"
+                   "Thought: I now know the final answer\n"
+                   "Final Answer: the final answer to the original input question"),
         ("human", "{input}"),
         ("ai", "{agent_scratchpad}"), # This is where the agent's thoughts and tool outputs go
     ])
@@ -123,7 +204,7 @@ def build_ai_agent(recommender_instance: PlantRecommender):
     agent_executor = AgentExecutor(
         agent=agent,
         tools=tools,
-        verbose=True, # Set to True to see the agent's thought process and tool calls
+        verbose=verbose, # Set to True to see the agent's thought process and tool calls
         handle_parsing_errors=True # Good for debugging agent issues
     )
     
@@ -0,0 +1,360 @@
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.src.ai_pipeline.data_processing.soil_raster import SOIL_TYPES as _RASTER_SOIL_TYPES
+from backend.src.ai_pipeline.instrumentation import record_route, stage_timer
+from backend.src.ai_pipeline.langchain_integration.chain_builder import PlantRecommenderTool, build_ai_agent
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import MICROCLIMATE_CATEGORIES
+from backend.src.ai_pipeline.plant_selection.recommender import PlantRecommender
+
+SOIL_TYPES = [soil for soil in _RASTER_SOIL_TYPES if soil != "unknown"]
+
+# Goals users commonly state; the catalog's own biodiversity_benefit phrases are added on first use
+DEFAULT_GOAL_PHRASES = [
+    "pollinator-friendly", "pollinator", "bird habitat", "wildlife", "low-water", "drought-tolerant",
+    "shade", "erosion control", "native", "fast-growing", "edible", "windbreak", "evergreen",
+]
+
+# A query has to ask for plants at all before it is answered without the LLM
+INTENT_WORDS = {
+    "plant", "plants", "planting", "tree", "trees", "shrub", "shrubs", "species",
+    "recommend", "recommendations", "suggest", "grow", "grows", "growing",
+}
+# A criterion is negated when one of these comes before it in the same clause
+NEGATIONS = {
+    "not", "no", "never", "nor", "neither", "none", "without", "except", "excluding", "avoid", "avoiding",
+    "don't", "dont", "doesn't", "doesnt", "didn't", "won't", "isn't", "aren't", "can't", "cannot",
+    "shouldn't", "wouldn't", "unlike",
+}
+NEGATION_PHRASES = {("instead", "of"), ("rather", "than"), ("other", "than")}
+# Words that end a clause like punctuation does ("no clay, but sandy soil is fine")
+CLAUSE_BREAK_WORDS = {"but", "however", "although", "though", "whereas"}
+
+# The value, and a second number if it is a range ("pH 6-7", "pH 6.0 to 7.5", "pH between 6 and 7")
+_PH_PATTERN = re.compile(
+    r"\bph\b(?:\s+(?:level|value|range))?\s*(?:of|is|=|:|around|about|near|~|between|from)?\s*(\d{1,2}(?:\.\d+)?)"
+    r"(\s*(?:-|\u2013|\u2014|to|and|or|/)\s*\d{1,2}(?:\.\d+)?)?",
+    re.IGNORECASE
+)
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+# Words, plus the punctuation that separates clauses (a '.' inside a number like 6.5 does not)
+_CLAUSE_TOKEN_PATTERN = re.compile(r"[a-z0-9']+|[;:!?,()]|\.(?!\d)")
+
+REQUIRED_FIELDS = ('microclimate_category', 'soil_type', 'ph_level')
+
+
+def _words(text: str) -> List[str]:
+    # Hyphens and other punctuation separate words, so "hot-humid-tropical" and "hot humid tropical" match alike
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def _words_and_clauses(text: str) -> Tuple[List[str], List[int]]:
+    """
+    The words of text (as _words) and, for each, the index of the clause it belongs to.
+    """
+    words: List[str] = []
+    clauses: List[int] = []
+    clause = 0
+    for token in _CLAUSE_TOKEN_PATTERN.findall(text.lower().replace("\u2019", "'")):
+        if not (token[0].isalnum() or token[0] == "'"):
+            clause += 1
+            continue
+        if token in CLAUSE_BREAK_WORDS:
+            clause += 1
+        words.append(token)
+        clauses.append(clause)
+    return words, clauses
+
+
+def _find_phrase(words: Sequence[str], phrase: Sequence[str]) -> List[int]:
+    """
+    Word offsets at which phrase occurs in words.
+    """
+    n = len(phrase)
+    return [i for i in range(len(words) - n + 1) if list(words[i:i + n]) == list(phrase)]
+
+
+def _negated(words: Sequence[str], clauses: Sequence[int], start: int) -> bool:
+    """
+    True if a negation comes before words[start] in its clause ("I don't want clay soil",
+    "loamy instead of clay").
+    """
+    i = start - 1
+    while i >= 0 and clauses[i] == clauses[start]:
+        if words[i] in NEGATIONS or (i + 1 < start and (words[i], words[i + 1]) in NEGATION_PHRASES):
+            return True
+        i -= 1
+    return False
+
+
+def goal_phrases_from_catalog(plants: Iterable[Dict[str, Any]]) -> List[str]:
+    """
+    The distinct comma/semicolon-separated phrases in the catalog's biodiversity_benefit column.
+    """
+    phrases = set()
+    for plant in plants:
+        for phrase in re.split(r"[,;]", plant.get('biodiversity_benefit') or ''):
+            phrase = phrase.strip().lower()
+            if phrase:
+                phrases.add(phrase)
+    return sorted(phrases)
+
+
+class StructuredQueryParser:
+    """
+    Rule/keyword parser pulling recommend_plants arguments out of a free-text query.
+
+    Categories, soil types and goals are matched as whole-word phrases against fixed vocabularies;
+    pH is read from "pH 6.5" / "pH of 6.5" / "pH level: 6.5". A criterion counts as ambiguous if
+    the query names more than one value for it, gives a range for it ("pH 6-7"), or negates it
+    anywhere earlier in the same clause ("not clay", "I don't want clay soil").
+    """
+
+    def __init__(
+        self,
+        categories: Sequence[str] = MICROCLIMATE_CATEGORIES,
+        soil_types: Sequence[str] = SOIL_TYPES,
+        goal_phrases: Sequence[str] = DEFAULT_GOAL_PHRASES
+    ):
+        self.categories = [(category, _words(category)) for category in categories]
+        self.soil_types = [(soil, _words(soil)) for soil in soil_types]
+        self.set_goal_phrases(goal_phrases)
+
+    def set_goal_phrases(self, goal_phrases: Iterable[str]) -> None:
+        # Longest first, so "bird habitat" is taken before a shorter phrase inside it
+        unique = {phrase.lower(): _words(phrase) for phrase in goal_phrases if _words(phrase)}
+        self.goal_phrases = sorted(unique.items(), key=lambda item: -len(item[1]))
+
+    def _match_one(
+        self,
+        words: Sequence[str],
+        clauses: Sequence[int],
+        vocabulary: Sequence[Tuple[str, List[str]]],
+        field: str,
+        ambiguities: List[str]
+    ) -> Optional[str]:
+        found = []
+        for value, phrase in vocabulary:
+            offsets = _find_phrase(words, phrase)
+            if not offsets:
+                continue
+            # A one-word category like "moderate" is only a category when followed by "climate"/"microclimate"
+            if field == 'microclimate_category' and len(phrase) == 1:
+                offsets = [i for i in offsets if i + 1 < len(words) and words[i + 1] in ("climate", "microclimate")]
+                if not offsets:
+                    continue
+            if any(_negated(words, clauses, i) for i in offsets):
+                ambiguities.append(f"negated_{field}")
+                return None
+            found.append(value)
+        if len(found) > 1:
+            ambiguities.append(f"multiple_{field}")
+            return None
+        return found[0] if found else None
+
+    def parse(self, query: str) -> Dict[str, Any]:
+        """
+        Returns {'microclimate_category', 'soil_type', 'ph_level', 'user_goals', 'has_intent',
+        'ambiguities'}; fields that could not be read unambiguously are None.
+        """
+        words, clauses = _words_and_clauses(query)
+        ambiguities: List[str] = []
+
+        category = self._match_one(words, clauses, self.categories, 'microclimate_category', ambiguities)
+        soil_type = self._match_one(words, clauses, self.soil_types, 'soil_type', ambiguities)
+
+        ph_matches = _PH_PATTERN.findall(query)
+        ph_values = {float(value) for value, _ in ph_matches}
+        ph_level = None
+        if any(range_end for _, range_end in ph_matches):
+            ambiguities.append("ph_level_range")
+        elif len(ph_values) > 1:
+            ambiguities.append("multiple_ph_level")
+        elif ph_values:
+            value = ph_values.pop()
+            if 0 <= value <= 14:
+                ph_level = value
+            else:
+                ambiguities.append("invalid_ph_level")
+
+        goals: List[str] = []
+        taken = set()
+        for phrase, phrase_words in self.goal_phrases:
+            for offset in _find_phrase(words, phrase_words):
+                span = set(range(offset, offset + len(phrase_words)))
+                if span & taken or _negated(words, clauses, offset):
+                    continue
+                taken |= span
+                goals.append(phrase)
+                break
+
+        return {
+            'microclimate_category': category,
+            'soil_type': soil_type,
+            'ph_level': ph_level,
+            'user_goals': goals,
+            'has_intent': any(word in INTENT_WORDS for word in words),
+            'ambiguities': ambiguities,
+        }
+
+
+class QueryRouter:
+    """
+    Front door for the planning agent: fully specified plant queries are answered straight from
+    the recommendation tool, everything else goes to the ReAct agent.
+
+    A query is routed directly when it asks for plants and names exactly one microclimate
+    category, soil type and pH (goals are optional). That skips the LLM generations the agent
+    would spend extracting those arguments. Routing decisions and the estimated time saved are
+    reported through the instrumentation layer and stats().
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        tool: PlantRecommenderTool,
+        parser: Optional[StructuredQueryParser] = None,
+        required_fields: Sequence[str] = REQUIRED_FIELDS,
+        baseline_agent_latency_s: Optional[float] = None
+    ):
+        """
+        Args:
+            agent: Runnable answering free-form queries (the AgentExecutor from build_ai_agent).
+            tool (PlantRecommenderTool): Tool answering routed queries directly.
+            parser (StructuredQueryParser, optional): Query parser; one with the default vocabularies
+                is created if omitted, and extended with the catalog's goal phrases on first use.
+            required_fields (Sequence[str]): Criteria a query must state to skip the agent.
+            baseline_agent_latency_s (float, optional): Agent latency assumed for the saved-time
+                estimate until an agent call has been measured.
+        """
+        self.agent = agent
+        self.tool = tool
+        self.parser = parser or StructuredQueryParser()
+        self.required_fields = tuple(required_fields)
+        self._learn_goals = parser is None
+
+        self.direct = 0
+        self.fallthrough = 0
+        self.direct_time_s = 0.0
+        self.agent_time_s = 0.0
+        self.saved_s = 0.0
+        self.baseline_agent_latency_s = baseline_agent_latency_s
+
+    def _agent_latency_estimate(self) -> Optional[float]:
+        if self.fallthrough:
+            return self.agent_time_s / self.fallthrough
+        return self.baseline_agent_latency_s
+
+    async def _learn_goal_phrases(self) -> None:
+        self._learn_goals = False
+        try:
+            catalog = await self.tool.recommender.get_catalog()
+        except Exception as e:
+            print(f"Warning: Could not load goal phrases from the plant catalog: {e}")
+            return
+        self.parser.set_goal_phrases(DEFAULT_GOAL_PHRASES + goal_phrases_from_catalog(catalog.plants))
+
+    async def aroute(self, query: str) -> Tuple[str, str, Dict[str, Any]]:
+        """
+        route(), after extending the parser with the catalog's goal phrases on first use.
+        """
+        if self._learn_goals:
+            await self._learn_goal_phrases()
+        return self.route(query)
+
+    def record(self, route: str, reason: str, elapsed_s: float) -> float:
+        """
+        Counts one answered query in stats() and the routing metrics. ainvoke calls this itself;
+        callers that run the chosen path on their own (e.g. stream_agent_events) report here.
+
+        Returns:
+            float: Estimated agent time saved (0 for queries that went to the agent).
+        """
+        saved = 0.0
+        if route == 'direct':
+            estimate = self._agent_latency_estimate()
+            saved = max(0.0, estimate - elapsed_s) if estimate is not None else 0.0
+            self.direct += 1
+            self.direct_time_s += elapsed_s
+            self.saved_s += saved
+        else:
+            self.fallthrough += 1
+            self.agent_time_s += elapsed_s
+        record_route(route, reason, saved)
+        return saved
+
+    def route(self, query: str) -> Tuple[str, str, Dict[str, Any]]:
+        """
+        Decides how query would be answered. Returns (route, reason, parsed criteria), where route
+        is 'direct' or 'agent'.
+        """
+        parsed = self.parser.parse(query)
+        if not parsed['has_intent']:
+            return 'agent', 'no_plant_intent', parsed
+        if parsed['ambiguities']:
+            return 'agent', parsed['ambiguities'][0], parsed
+        missing = [field for field in self.required_fields if parsed.get(field) is None]
+        if missing:
+            return 'agent', f"missing_{missing[0]}", parsed
+        return 'direct', 'fully_specified', parsed
+
+    async def ainvoke(self, inputs: Dict[str, Any], config: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Same calling convention as AgentExecutor.ainvoke ({'input': query} -> {'output': ...}), with
+        'route' and 'reason' added to the result.
+        """
+        route, reason, parsed = await self.aroute(inputs['input'])
+        start = time.perf_counter()
+        if route == 'direct':
+            with stage_timer('router.direct'):
+                criteria = {field: parsed[field] for field in ('microclimate_category', 'soil_type', 'ph_level', 'user_goals')}
+                output = await self.tool.ainvoke(criteria)
+            self.record(route, reason, time.perf_counter() - start)
+            return {**inputs, 'output': output, 'route': route, 'reason': reason, 'criteria': criteria}
+
+        with stage_timer('router.agent'):
+            result = await self.agent.ainvoke(inputs, config)
+        self.record(route, reason, time.perf_counter() - start)
+        return {**result, 'route': route, 'reason': reason}
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.direct + self.fallthrough
+        return {
+            'requests': total,
+            'direct': self.direct,
+            'agent': self.fallthrough,
+            'direct_rate': self.direct / total if total else 0.0,
+            'mean_direct_ms': round(self.direct_time_s / self.direct * 1000, 2) if self.direct else None,
+            'mean_agent_ms': round(self.agent_time_s / self.fallthrough * 1000, 2) if self.fallthrough else None,
+            'estimated_saved_s': round(self.saved_s, 3),
+        }
+
+
+def build_routed_agent(recommender_instance: PlantRecommender, **agent_kwargs: Any) -> QueryRouter:
+    """
+    build_ai_agent with a QueryRouter in front. The router's direct path uses the agent's own
+    recommendation tool, so both paths share its result cache.
+
+    Args:
+        recommender_instance (PlantRecommender): An initialized instance of your PlantRecommender.
+        **agent_kwargs: Forwarded to build_ai_agent (llm, verbose, caches, ...).
+    """
+    agent = build_ai_agent(recommender_instance, **agent_kwargs)
+    tool = next(tool for tool in agent.tools if isinstance(tool, PlantRecommenderTool))
+    return QueryRouter(agent, tool)
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    parser = StructuredQueryParser()
+    for query in [
+        "I need plants for a hot-humid-tropical microclimate, loamy soil, and pH 6.0. I want them to be low-water.",
+        "What are some good plants for carbon sequestration in a temperate-humid region with clay soil?",
+        "Trees for cool temperate sites, not clay, sandy soil with a pH of 5.5",
+        "Tell me a joke about a tree.",
+    ]:
+        router = QueryRouter(agent=None, tool=None, parser=parser)
+        route, reason, parsed = router.route(query)
+        print(f"{route:<7} {reason:<30} {query}")
+        print(f"        {({k: v for k, v in parsed.items() if k not in ('has_intent', 'ambiguities')})}")
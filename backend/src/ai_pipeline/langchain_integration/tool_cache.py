@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Optional
+
+from backend.src.ai_pipeline.caching.persistent_cache import PersistentLRUCache, resolve_cache_path
+from backend.src.ai_pipeline.config import get_env
+
+# Entries are keyed to the catalog version they came from, so the TTL only bounds how long
+# results for a still-current catalog are kept
+DEFAULT_TOOL_CACHE_TTL_SECONDS = 24 * 3600
+DEFAULT_PH_DECIMALS = 1
+
+
+class ToolResultCache(PersistentLRUCache):
+    """
+    Cache of plant recommendation tool results keyed on normalized criteria.
+
+    Agents phrase the same request many ways ("Loamy" vs "loamy", pH 6.52 vs 6.5, goals in any
+    order), so the key is built from the lower-cased category and soil type, the pH rounded to
+    ph_decimals and the sorted, de-duplicated goals.
+
+    The key also holds the version of the plant catalog the result was computed from
+    (PlantCatalog.version): once a refresh changes the catalog, its old results stop matching.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ph_decimals: int = DEFAULT_PH_DECIMALS, **kwargs: Any):
+        """
+        Args:
+            db_path (str, optional): SQLite file for the persistent level (None = memory only).
+            ph_decimals (int): Decimal places pH is rounded to before lookup.
+            **kwargs: Size/age limits forwarded to PersistentLRUCache.
+        """
+        kwargs.setdefault('table_name', 'agent_tool_cache')
+        kwargs.setdefault('max_age_seconds', DEFAULT_TOOL_CACHE_TTL_SECONDS)
+        super().__init__(db_path=db_path, **kwargs)
+        self.ph_decimals = ph_decimals
+
+    def round_ph(self, ph_level: Optional[float]) -> Optional[float]:
+        return None if ph_level is None else round(float(ph_level), self.ph_decimals)
+
+    def make_key(
+        self,
+        microclimate_category: Optional[str],
+        soil_type: Optional[str],
+        ph_level: Optional[float],
+        user_goals: Optional[List[str]] = None,
+        catalog_version: str = ''
+    ) -> str:
+        goals = sorted({goal.strip().lower() for goal in user_goals or [] if goal and goal.strip()})
+        return "|".join([
+            catalog_version,
+            (microclimate_category or '').strip().lower(),
+            (soil_type or '').strip().lower(),
+            '' if ph_level is None else f"{self.round_ph(ph_level):.{self.ph_decimals}f}",
+            ",".join(goals),
+        ])
+
+    def get_result(self, **criteria: Any) -> Optional[List[Dict[str, Any]]]:
+        return self.get(self.make_key(**criteria))
+
+    def put_result(self, recommended: List[Dict[str, Any]], **criteria: Any) -> bool:
+        """
+        Stores a recommendation result. Returns True if it was cached.
+
+        Empty results are not cached: the recommender also returns [] when the catalog can't
+        be loaded, and that must not be served for the rest of the TTL.
+        """
+        if not recommended:
+            return False
+        self.set(self.make_key(**criteria), recommended)
+        return True
+
+
+_default_cache: Optional[ToolResultCache] = None
+
+
+def get_default_tool_cache() -> ToolResultCache:
+    """
+    Returns the process-wide tool result cache, creating it on first use.
+
+    Configured through environment variables:
+        TOOL_CACHE_PATH: SQLite file for the persistent level (default tool_cache.sqlite under
+            CACHE_DIR; 'memory' for no disk level).
+        TOOL_CACHE_TTL_SECONDS: Age after which cached results are recomputed.
+        TOOL_CACHE_MAX_ENTRIES: Maximum number of results kept in memory and on disk.
+    """
+    global _default_cache
+    if _default_cache is None:
+        max_entries = int(get_env("TOOL_CACHE_MAX_ENTRIES", 10_000))
+        _default_cache = ToolResultCache(
+            db_path=resolve_cache_path(get_env("TOOL_CACHE_PATH"), 'tool_cache.sqlite'),
+            max_age_seconds=float(get_env("TOOL_CACHE_TTL_SECONDS", DEFAULT_TOOL_CACHE_TTL_SECONDS)),
+            max_memory_entries=max_entries,
+            max_disk_entries=max_entries,
+        )
+    return _default_cache
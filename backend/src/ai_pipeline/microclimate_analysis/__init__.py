@@ -0,0 +1 @@
+"""Microclimate categorisation and zoning."""
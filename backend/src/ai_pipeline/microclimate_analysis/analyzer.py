@@ -1,6 +1,34 @@
-import pandas as pd
-from sklearn.cluster import KMeans
+from __future__ import annotations
+
 import numpy as np
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from backend.src.ai_pipeline._lazy import lazy_import
+from backend.src.ai_pipeline.instrumentation import instrumented, record_error, record_payload
+
+# pandas and scikit-learn are only imported once a function needs them
+pd = lazy_import('pandas')
+
+ArrayLike = Union[np.ndarray, "pd.Series", list]
+ChunkSource = Union[str, os.PathLike, Iterable["pd.DataFrame"], Callable[[], Iterable["pd.DataFrame"]]]
+
+# Feature columns used for zoning, as produced by the data ingestion stage
+FEATURE_COLUMNS = ['avg_temp_c', 'avg_humidity_percent', 'total_rainfall_mm']
+
+# Every label categorize_microclimate can return, in the order its rules are checked
+MICROCLIMATE_CATEGORIES = [
+    "hot-dry-desert",
+    "hot-humid-tropical",
+    "temperate-humid",
+    "cool-temperate",
+    "cold-dry-arid",
+    "polar-alpine",
+    "moderate",
+]
 
 def categorize_microclimate(temp_c: float, humidity_percent: float, rainfall_mm: float) -> str:
     """
@@ -22,7 +50,132 @@ def categorize_microclimate(temp_c: float, humidity_percent: float, rainfall_mm:
     else:
         return "moderate"
 
-def identify_microclimate_zones(data: pd.DataFrame, n_clusters: int = 3):
+def categorize_microclimate_array(
+    temp_c: ArrayLike, humidity_percent: ArrayLike, rainfall_mm: ArrayLike
+) -> Union[pd.Categorical, pd.Series]:
+    """
+    Vectorized version of categorize_microclimate for whole arrays or DataFrame columns.
+
+    The rules are evaluated in the same order as the scalar if/elif chain, so results match
+    element for element (e.g. 'polar-alpine' is only assigned where 'cold-dry-arid' does not
+    apply, and NaN inputs fall through to 'moderate').
+
+    Args:
+        temp_c, humidity_percent, rainfall_mm: Equal-length arrays (or Series) of the inputs.
+
+    Returns:
+        pd.Categorical with categories MICROCLIMATE_CATEGORIES, or a categorical pd.Series
+        aligned to temp_c's index if temp_c is a Series.
+    """
+    temp = np.asarray(temp_c, dtype=float)
+    humidity = np.asarray(humidity_percent, dtype=float)
+    rainfall = np.asarray(rainfall_mm, dtype=float)
+
+    conditions = [
+        (temp > 28) & (humidity < 40),
+        (temp > 25) & (humidity >= 70) & (rainfall > 1000),
+        (temp >= 15) & (temp <= 25) & (humidity >= 60) & (rainfall > 700),
+        (temp >= 10) & (temp < 15) & (rainfall > 500),
+        (temp < 10) & (rainfall < 300),
+        temp < 0,
+    ]
+    # np.select takes the first matching condition, mirroring the elif chain
+    codes = np.select(conditions, np.arange(len(conditions), dtype=np.int8), default=len(conditions))
+    categories = pd.Categorical.from_codes(codes.astype(np.int8), categories=MICROCLIMATE_CATEGORIES)
+
+    if isinstance(temp_c, pd.Series):
+        return pd.Series(categories, index=temp_c.index, name='microclimate_category')
+    return categories
+
+def _score_k(args: Tuple[np.ndarray, int, int]) -> Tuple[int, float, float]:
+    """
+    Fits KMeans with k clusters on a (scaled, sampled) feature matrix and returns
+    (k, silhouette score, inertia).
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+
+    sample, k, random_state = args
+    kmeans = KMeans(n_clusters=k, random_state=random_state, n_init=3)
+    labels = kmeans.fit_predict(sample)
+    if len(np.unique(labels)) < 2:
+        # Duplicate points can collapse clusters; silhouette is undefined then
+        return k, -1.0, float(kmeans.inertia_)
+    return k, float(silhouette_score(sample, labels)), float(kmeans.inertia_)
+
+# Thread pools for select_n_clusters, one per size, created on first use and reused by every call
+_k_selection_pools: Dict[int, ThreadPoolExecutor] = {}
+_k_selection_pools_lock = threading.Lock()
+
+
+def _k_selection_pool(workers: int) -> ThreadPoolExecutor:
+    with _k_selection_pools_lock:
+        pool = _k_selection_pools.get(workers)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='select-k')
+            _k_selection_pools[workers] = pool
+        return pool
+
+def select_n_clusters(
+    scaled_features: np.ndarray,
+    max_clusters: int = 8,
+    sample_size: int = 2000,
+    max_workers: Union[int, None] = None,
+    random_state: int = 42
+) -> int:
+    """
+    Picks the number of microclimate clusters by scoring candidate k values (2..max_clusters)
+    in parallel on a random sample of the standardized features.
+
+    Candidates are scored on a long-lived thread pool rather than a process pool: KMeans and
+    the silhouette distances run in native code without the GIL, so threads parallelize them
+    without paying for process startup and for pickling the sample on every call.
+
+    Each candidate is fitted on the same sample of at most sample_size rows, so selection cost
+    does not grow with the dataset. The k with the highest silhouette score wins; ties go to the
+    smaller k (lower inertia alone always favours more clusters, so it is only reported).
+
+    Args:
+        scaled_features (np.ndarray): Standardized feature matrix.
+        max_clusters (int): Largest k to consider.
+        sample_size (int): Number of rows sampled for scoring.
+        max_workers (int, optional): Thread pool size (default: CPU count); 1 scores candidates
+            in the calling thread.
+        random_state (int): Seed for sampling and KMeans.
+
+    Returns:
+        int: The selected number of clusters (1 if there are too few points to compare).
+    """
+    rng = np.random.default_rng(random_state)
+    if len(scaled_features) > sample_size:
+        sample = scaled_features[rng.choice(len(scaled_features), sample_size, replace=False)]
+    else:
+        sample = np.asarray(scaled_features)
+
+    # Silhouette needs 2 <= k <= n_samples - 1
+    candidates = list(range(2, min(max_clusters, len(sample) - 1) + 1))
+    if not candidates:
+        return 1
+    if len(candidates) == 1:
+        return candidates[0]
+
+    jobs = [(sample, k, random_state) for k in candidates]
+    if max_workers == 1:
+        scores = [_score_k(job) for job in jobs]
+    else:
+        pool = _k_selection_pool(max_workers or os.cpu_count() or 1)
+        scores = list(pool.map(_score_k, jobs))
+
+    best_k, _, _ = max(scores, key=lambda score: (score[1], -score[0]))
+    return best_k
+
+@instrumented('zoning')
+def identify_microclimate_zones(
+    data: pd.DataFrame,
+    n_clusters: Union[int, str] = 3,
+    max_clusters: int = 8,
+    max_workers: Union[int, None] = None
+):
     """
     Identifies distinct microclimate zones within a dataset using KMeans clustering.
     This is useful for segmenting larger project areas with varied conditions.
@@ -31,65 +184,286 @@ def identify_microclimate_zones(data: pd.DataFrame, n_clusters: int = 3):
         data (pd.DataFrame): DataFrame containing location data with at least
                              'avg_temp_c', 'avg_humidity_percent', 'total_rainfall_mm'.
                              Each row could represent a different sub-location within a project.
-        n_clusters (int): The number of microclimate clusters to identify.
+        n_clusters (int or "auto"): The number of microclimate clusters to identify, or "auto"
+                                    to choose it with select_n_clusters.
+        max_clusters (int): Largest number of clusters considered when n_clusters="auto".
+        max_workers (int, optional): Thread pool size used when n_clusters="auto".
 
     Returns:
         list: A list of dictionaries, where each dictionary describes a cluster
               (e.g., average temp, humidity, rainfall, and count of locations in that cluster).
     """
-    required_cols = ['avg_temp_c', 'avg_humidity_percent', 'total_rainfall_mm']
+    required_cols = FEATURE_COLUMNS
     
     if data.empty or not all(col in data.columns for col in required_cols):
         print("Warning: Input data is empty or missing required columns for microclimate zoning.")
+        record_error('zoning', 'missing_columns')
         return []
 
     # Drop rows with any NaN values in the features critical for clustering
     features_data = data[required_cols].dropna()
+    record_payload('zoning', len(features_data), 'rows')
 
     if features_data.empty:
         print("Warning: No valid data points after dropping NaNs for microclimate zoning.")
+        record_error('zoning', 'no_valid_rows')
         return []
 
-    # Ensure n_clusters is not greater than the number of valid data points
-    n_clusters = min(n_clusters, len(features_data))
-    if n_clusters < 1: # Handle case where n_clusters might become 0
-        return []
+    if isinstance(n_clusters, str) and n_clusters != "auto":
+        raise ValueError(f"n_clusters must be an integer or 'auto', got {n_clusters!r}")
 
     # Standardize features for better clustering performance (optional but good practice)
+    from sklearn.cluster import KMeans
     from sklearn.preprocessing import StandardScaler
     scaler = StandardScaler()
-    scaled_features = scaler.fit_transform(features_data)
+    features = features_data.to_numpy(dtype=float)
+    scaled_features = scaler.fit_transform(features)
+
+    if n_clusters == "auto":
+        n_clusters = select_n_clusters(scaled_features, max_clusters=max_clusters, max_workers=max_workers)
+
+    # Ensure n_clusters is not greater than the number of valid data points
+    n_clusters = min(n_clusters, len(features_data))
+    if n_clusters < 1: # Handle case where n_clusters might become 0
+        return []
 
     try:
         kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10) # n_init for modern KMeans
         clusters = kmeans.fit_predict(scaled_features)
-        
-        # Add cluster labels back to the original (non-scaled, non-NaN) data
-        features_data['cluster'] = clusters
-        
-        cluster_descriptions = []
-        for i in range(n_clusters):
-            cluster_subset = features_data[features_data['cluster'] == i]
-            if not cluster_subset.empty:
-                desc = {
-                    'cluster_id': i,
-                    'avg_temp_c': cluster_subset['avg_temp_c'].mean(),
-                    'avg_humidity_percent': cluster_subset['avg_humidity_percent'].mean(),
-                    'total_rainfall_mm': cluster_subset['total_rainfall_mm'].mean(),
-                    'count': len(cluster_subset),
-                    'representative_category': categorize_microclimate(
-                        cluster_subset['avg_temp_c'].mean(),
-                        cluster_subset['avg_humidity_percent'].mean(),
-                        cluster_subset['total_rainfall_mm'].mean()
-                    )
-                }
-                cluster_descriptions.append(desc)
-        
-        return cluster_descriptions
+
+        # Per-cluster counts and feature sums in one pass each, instead of masking per cluster
+        counts = np.bincount(clusters, minlength=n_clusters)
+        sums = np.column_stack([
+            np.bincount(clusters, weights=features[:, j], minlength=n_clusters)
+            for j in range(len(required_cols))
+        ])
+        return describe_clusters(sums, counts)
     except Exception as e:
         print(f"Error during KMeans clustering: {e}")
+        record_error('zoning', type(e).__name__)
         return []
 
+def describe_clusters(sums: np.ndarray, counts: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Builds the cluster-description dicts returned by the zoning functions from per-cluster
+    feature sums (k x 3, in FEATURE_COLUMNS order) and point counts (k,). Empty clusters are skipped.
+    """
+    cluster_descriptions = []
+    for i in np.flatnonzero(counts):
+        avg_temp, avg_humidity, avg_rainfall = (sums[i] / counts[i]).tolist()
+        cluster_descriptions.append({
+            'cluster_id': int(i),
+            'avg_temp_c': avg_temp,
+            'avg_humidity_percent': avg_humidity,
+            'total_rainfall_mm': avg_rainfall,
+            'count': int(counts[i]),
+            'representative_category': categorize_microclimate(avg_temp, avg_humidity, avg_rainfall)
+        })
+    return cluster_descriptions
+
+def _read_feature_chunks(source: ChunkSource, chunksize: int) -> Iterator[np.ndarray]:
+    """
+    Yields float64 arrays of FEATURE_COLUMNS (rows with NaNs dropped) from a CSV/Parquet path,
+    a callable returning DataFrame chunks, or an iterable of DataFrame chunks.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith(('.parquet', '.pq')):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("pyarrow is required to stream Parquet files for microclimate zoning.") from e
+            batches = (
+                batch.to_pandas()
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=FEATURE_COLUMNS)
+            )
+        else:
+            batches = pd.read_csv(path, usecols=FEATURE_COLUMNS, chunksize=chunksize)
+    elif callable(source):
+        batches = source()
+    else:
+        batches = source
+
+    for chunk in batches:
+        missing = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Chunk is missing required columns for microclimate zoning: {missing}")
+        features = chunk[FEATURE_COLUMNS].to_numpy(dtype=float)
+        features = features[~np.isnan(features).any(axis=1)]
+        if len(features):
+            yield features
+
+def _replayable_chunks(source: ChunkSource, chunksize: int) -> Tuple[Callable[[], Iterator[np.ndarray]], Callable[[], None]]:
+    """
+    Returns (factory, cleanup) where factory() starts a fresh pass over the feature chunks.
+
+    Paths, callables and re-iterable collections are simply read again on every pass. A one-shot
+    iterator can only be read once, so its features are spilled to a temporary .npy stream
+    (one array per chunk) that later passes replay from disk.
+    """
+    is_one_shot = (
+        not isinstance(source, (str, os.PathLike))
+        and not callable(source)
+        and iter(source) is source
+    )
+    if not is_one_shot:
+        return (lambda: _read_feature_chunks(source, chunksize)), (lambda: None)
+
+    spill = tempfile.NamedTemporaryFile(suffix='.npy', delete=False)
+    try:
+        try:
+            for features in _read_feature_chunks(source, chunksize):
+                np.save(spill, features)
+        finally:
+            spill.close()
+    except BaseException:
+        # No cleanup callback reaches the caller on this path, so the spill file goes now
+        os.remove(spill.name)
+        raise
+
+    def replay() -> Iterator[np.ndarray]:
+        with open(spill.name, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            while f.tell() < size:
+                yield np.load(f)
+
+    return replay, (lambda: os.remove(spill.name))
+
+def _rebatch(chunks: Iterable[np.ndarray], batch_size: int) -> Iterator[np.ndarray]:
+    """
+    Re-slices arbitrarily sized chunks into batches of exactly batch_size rows (except the last).
+    """
+    pending: List[np.ndarray] = []
+    pending_rows = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_rows += len(chunk)
+        if pending_rows < batch_size:
+            continue
+        merged = np.concatenate(pending)
+        n_full = len(merged) // batch_size * batch_size
+        for start in range(0, n_full, batch_size):
+            yield merged[start:start + batch_size]
+        pending = [merged[n_full:]]
+        pending_rows = len(pending[0])
+    if pending_rows:
+        yield np.concatenate(pending)
+
+def _fit_streaming_model(
+    chunks: Callable[[], Iterator[np.ndarray]],
+    n_clusters: int,
+    batch_size: int,
+    random_state: int
+):
+    """
+    Fits StandardScaler (one pass) and MiniBatchKMeans (a second pass over re-sliced batches)
+    from a replayable chunk factory. Returns (scaler, kmeans), or None if there is no valid data.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    n_points = 0
+    for features in chunks():
+        scaler.partial_fit(features)
+        n_points += len(features)
+
+    if n_points == 0:
+        print("Warning: No valid data points after dropping NaNs for microclimate zoning.")
+        return None
+
+    n_clusters = min(n_clusters, n_points)
+    if n_clusters < 1:
+        return None
+
+    kmeans = MiniBatchKMeans(
+        n_clusters=n_clusters, random_state=random_state, batch_size=batch_size, n_init=3
+    )
+    # The first partial_fit call needs at least n_clusters samples
+    for batch in _rebatch(chunks(), max(batch_size, n_clusters)):
+        kmeans.partial_fit(scaler.transform(batch))
+    return scaler, kmeans
+
+def fit_streaming_zoning_model(
+    source: ChunkSource,
+    n_clusters: int = 3,
+    chunksize: int = 100_000,
+    batch_size: int = 10_000,
+    random_state: int = 42
+):
+    """
+    Fits the scaler and MiniBatchKMeans model used by identify_microclimate_zones_streaming
+    without the labelling pass, for callers that assign labels themselves (e.g. per map tile).
+
+    Returns:
+        (StandardScaler, MiniBatchKMeans), or None if the source has no valid rows.
+    """
+    if batch_size < 1 or chunksize < 1:
+        raise ValueError("chunksize and batch_size must be positive integers.")
+
+    chunks, cleanup = _replayable_chunks(source, chunksize)
+    try:
+        return _fit_streaming_model(chunks, n_clusters, batch_size, random_state)
+    finally:
+        cleanup()
+
+@instrumented('zoning.streaming')
+def identify_microclimate_zones_streaming(
+    source: ChunkSource,
+    n_clusters: int = 3,
+    chunksize: int = 100_000,
+    batch_size: int = 10_000,
+    random_state: int = 42
+):
+    """
+    Out-of-core variant of identify_microclimate_zones for datasets too large to hold in memory.
+
+    The data is read chunk by chunk in three passes, so memory stays bounded by the chunk and
+    batch sizes rather than the dataset size:
+        1. StandardScaler.partial_fit over every chunk.
+        2. MiniBatchKMeans.partial_fit over scaled mini-batches.
+        3. Label assignment, accumulating per-cluster sums and counts.
+
+    Args:
+        source: A CSV or Parquet path, an iterable of DataFrame chunks, or a callable returning
+                a fresh iterable of chunks. Chunks need the same columns as identify_microclimate_zones.
+                One-shot iterators are spilled to a temporary file so they can be read again.
+        n_clusters (int): The number of microclimate clusters to identify.
+        chunksize (int): Rows per chunk when reading from a file path.
+        batch_size (int): Rows per MiniBatchKMeans.partial_fit call.
+        random_state (int): Seed for MiniBatchKMeans.
+
+    Returns:
+        list: Cluster descriptions in the same format as identify_microclimate_zones.
+    """
+    if batch_size < 1 or chunksize < 1:
+        raise ValueError("chunksize and batch_size must be positive integers.")
+
+    chunks, cleanup = _replayable_chunks(source, chunksize)
+    try:
+        try:
+            model = _fit_streaming_model(chunks, n_clusters, batch_size, random_state)
+            if model is None:
+                return []
+            scaler, kmeans = model
+            n_clusters = kmeans.n_clusters
+
+            sums = np.zeros((n_clusters, len(FEATURE_COLUMNS)))
+            counts = np.zeros(n_clusters, dtype=np.int64)
+            for features in chunks():
+                labels = kmeans.predict(scaler.transform(features))
+                counts += np.bincount(labels, minlength=n_clusters)
+                for j in range(len(FEATURE_COLUMNS)):
+                    sums[:, j] += np.bincount(labels, weights=features[:, j], minlength=n_clusters)
+
+            return describe_clusters(sums, counts)
+        except Exception as e:
+            print(f"Error during streaming MiniBatchKMeans clustering: {e}")
+            record_error('zoning.streaming', type(e).__name__)
+            return []
+    finally:
+        cleanup()
+
 # Example Usage (for testing purposes)
 if __name__ == '__main__':
     # Test categorize_microclimate
@@ -100,6 +474,12 @@ if __name__ == '__main__':
     print(f"5C, 20% H, 150mm R: {categorize_microclimate(5, 20, 150)}")   # cold-dry-arid
     print(f"22C, 55% H, 600mm R: {categorize_microclimate(22, 55, 600)}") # moderate
 
+    # Test the vectorized version on the same inputs
+    print("\nCategorizing microclimates (vectorized):")
+    print(list(categorize_microclimate_array(
+        [29, 26, 18, 5, 22], [30, 80, 65, 20, 55], [100, 1200, 800, 150, 600]
+    )))
+
     # Test identify_microclimate_zones
     print("\nIdentifying microclimate zones:")
     sample_data = pd.DataFrame({
@@ -113,6 +493,10 @@ if __name__ == '__main__':
     for zone in zones:
         print(f"Cluster {zone['cluster_id']}: Temp={zone['avg_temp_c']:.1f}C, Humid={zone['avg_humidity_percent']:.1f}%, Rain={zone['total_rainfall_mm']:.1f}mm, Count={zone['count']}, Category='{zone['representative_category']}'")
 
+    # Test automatic selection of the number of clusters
+    auto_zones = identify_microclimate_zones(sample_data, n_clusters="auto")
+    print(f"\nAuto-selected {len(auto_zones)} clusters: {[zone['representative_category'] for zone in auto_zones]}")
+
     # Test with empty data
     empty_data = pd.DataFrame(columns=['avg_temp_c', 'avg_humidity_percent', 'total_rainfall_mm'])
     empty_zones = identify_microclimate_zones(empty_data)
@@ -126,4 +510,11 @@ if __name__ == '__main__':
         'total_rainfall_mm': [600, 800, 700]
     })
     nan_zones = identify_microclimate_zones(nan_data, n_clusters=2)
-    print(f"\nNaN data test: {nan_zones}")
\ No newline at end of file
+    print(f"\nNaN data test: {nan_zones}")
+
+    # Test the streaming variant on the same sample data, fed as small chunks
+    print("\nIdentifying microclimate zones (streaming):")
+    chunk_iter = (sample_data.iloc[i:i + 4] for i in range(0, len(sample_data), 4))
+    streamed_zones = identify_microclimate_zones_streaming(chunk_iter, n_clusters=3, batch_size=4)
+    for zone in streamed_zones:
+        print(f"Cluster {zone['cluster_id']}: Count={zone['count']}, Category='{zone['representative_category']}'")
\ No newline at end of file
@@ -0,0 +1,595 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.src.ai_pipeline._lazy import lazy_import
+from backend.src.ai_pipeline.config import get_env
+from backend.src.ai_pipeline.instrumentation import instrumented, record_payload, stage_timer
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import (
+    FEATURE_COLUMNS,
+    categorize_microclimate,
+    describe_clusters,
+    select_n_clusters,
+)
+
+pd = lazy_import('pandas')
+
+FeatureInput = Union["pd.DataFrame", np.ndarray]
+
+METADATA_FILE = "metadata.json"
+SCALER_FILE = "scaler.npy"
+CENTROIDS_FILE = "centroids.npy"
+COUNTS_FILE = "counts.npy"
+SUMS_FILE = "sums.npy"
+SUMSQ_FILE = "sumsq.npy"
+RECENT_FILE = "recent.npy"
+RECENT_LABELS_FILE = "recent_labels.npy"
+FORMAT_VERSION = 1
+
+DEFAULT_DRIFT_THRESHOLD = 1.5
+DEFAULT_MIN_DRIFT_POINTS = 50
+DEFAULT_MAX_RECENT = 10_000
+# Digests of the batches a model has already absorbed (see ZoningModelStore.fit_or_update)
+MAX_SEEN_BATCHES = 1000
+
+_PROJECT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def _feature_matrix(data: FeatureInput) -> np.ndarray:
+    if isinstance(data, np.ndarray):
+        features = np.asarray(data, dtype=float).reshape(-1, len(FEATURE_COLUMNS))
+    else:
+        missing = [col for col in FEATURE_COLUMNS if col not in data.columns]
+        if missing:
+            raise ValueError(f"Data is missing required columns for microclimate zoning: {missing}")
+        features = data[FEATURE_COLUMNS].to_numpy(dtype=float)
+    return features
+
+
+def _batch_digest(features: np.ndarray) -> str:
+    valid = features[~np.isnan(features).any(axis=1)]
+    return hashlib.sha1(np.ascontiguousarray(valid, dtype=np.float64).tobytes()).hexdigest()
+
+
+class ZoningModel:
+    """
+    A fitted microclimate zoning model that can be kept per project and updated as new
+    readings arrive, instead of refitting KMeans on every identify_microclimate_zones call.
+
+    State (all small: k clusters x 3 features):
+        scaler     - StandardScaler mean and scale (2 x d)
+        centroids  - cluster centres in standardized space (k x d)
+        counts, sums, sumsq - per-cluster point count and raw feature sums / sums of squares
+        recent, recent_labels - raw readings added since the last fit (bounded, for refits)
+        seen_batches - digests of the batches already absorbed, so repeats are not counted twice
+
+    predict assigns points to the nearest centroid, O(k) per point. update does the same, then
+    moves each centroid to the running mean of its points (sequential k-means), so cluster ids
+    stay stable. It also tracks drift: the mean squared distance of new readings to their
+    centroid, relative to the model's own within-cluster spread at fit time. Once that ratio
+    exceeds drift_threshold, the model is refitted from its sufficient statistics (each old
+    cluster as one weighted point) plus the recent raw readings, and new clusters are matched to
+    the old ids.
+
+    Models are saved as a directory of .npy files plus metadata.json, which load() memory-maps.
+    """
+
+    def __init__(
+        self,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        centroids: np.ndarray,
+        counts: np.ndarray,
+        sums: np.ndarray,
+        sumsq: np.ndarray,
+        fit_mse: float,
+        recent: Optional[np.ndarray] = None,
+        recent_labels: Optional[np.ndarray] = None,
+        drift_sse: float = 0.0,
+        drift_n: int = 0,
+        n_refits: int = 0,
+        seen_batches: Optional[List[str]] = None,
+        drift_threshold: float = DEFAULT_DRIFT_THRESHOLD,
+        min_drift_points: int = DEFAULT_MIN_DRIFT_POINTS,
+        max_recent: int = DEFAULT_MAX_RECENT,
+        random_state: int = 42
+    ):
+        """
+        Args:
+            mean, scale: Standardization parameters (d,).
+            centroids: Cluster centres in standardized space (k x d).
+            counts, sums, sumsq: Per-cluster count (k,) and raw feature sums / sums of squares (k x d).
+            fit_mse (float): Mean squared standardized distance of points to their centroid at fit time.
+            recent, recent_labels: Raw readings added since the last fit and their labels.
+            drift_sse (float), drift_n (int): Squared distance total and count of readings since the last fit.
+            n_refits (int): Number of drift-triggered refits so far.
+            seen_batches (list of str): Digests of the batches fitted or updated on, oldest first.
+            drift_threshold (float): Drift ratio above which update() refits.
+            min_drift_points (int): Readings needed since the last fit before drift is acted on.
+            max_recent (int): Most recent raw readings kept for refits.
+            random_state (int): Seed for KMeans refits.
+        """
+        if drift_threshold <= 1:
+            raise ValueError("drift_threshold must be greater than 1.")
+        self.mean = mean
+        self.scale = scale
+        self.centroids = centroids
+        self.counts = counts
+        self.sums = sums
+        self.sumsq = sumsq
+        self.fit_mse = float(fit_mse)
+        n_features = len(FEATURE_COLUMNS)
+        self.recent = recent if recent is not None else np.empty((0, n_features))
+        self.recent_labels = recent_labels if recent_labels is not None else np.empty(0, dtype=np.int64)
+        self.drift_sse = float(drift_sse)
+        self.drift_n = int(drift_n)
+        self.n_refits = int(n_refits)
+        self.seen_batches = list(seen_batches or [])
+        self.drift_threshold = float(drift_threshold)
+        self.min_drift_points = int(min_drift_points)
+        self.max_recent = int(max_recent)
+        self.random_state = int(random_state)
+        self._writable = all(
+            isinstance(array, np.ndarray) and not isinstance(array, np.memmap)
+            for array in (centroids, counts, sums, sumsq, self.recent, self.recent_labels)
+        )
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def categories(self) -> List[str]:
+        """
+        Representative microclimate category of each cluster (by its mean conditions).
+        """
+        means = self.sums / np.maximum(self.counts, 1)[:, None]
+        return [categorize_microclimate(*row) for row in means.tolist()]
+
+    @property
+    def drift(self) -> float:
+        """
+        Mean squared distance of readings added since the last fit to their centroid, relative to
+        fit_mse (about 1 while new readings look like the training data; 0 before any update).
+        """
+        if self.drift_n == 0 or self.fit_mse <= 0:
+            return 0.0
+        return (self.drift_sse / self.drift_n) / self.fit_mse
+
+    @classmethod
+    def _from_statistics(
+        cls, mean: np.ndarray, scale: np.ndarray, centroids: np.ndarray,
+        counts: np.ndarray, sums: np.ndarray, sumsq: np.ndarray, **kwargs: Any
+    ) -> "ZoningModel":
+        model = cls(mean, scale, centroids, counts, sums, sumsq, fit_mse=0.0, **kwargs)
+        model.fit_mse = model._within_cluster_mse()
+        return model
+
+    @classmethod
+    @instrumented('zoning.model.fit')
+    def fit(
+        cls,
+        data: FeatureInput,
+        n_clusters: Union[int, str] = 3,
+        max_clusters: int = 8,
+        random_state: int = 42,
+        **kwargs: Any
+    ) -> "ZoningModel":
+        """
+        Fits a model the same way identify_microclimate_zones clusters (standardized features,
+        KMeans with n_init=10); rows with NaN features are ignored.
+
+        Args:
+            data: DataFrame with FEATURE_COLUMNS, or an (n x 3) array in that column order.
+            n_clusters (int or "auto"): Number of clusters, or "auto" for select_n_clusters.
+            max_clusters (int): Largest number of clusters considered when n_clusters="auto".
+            random_state (int): Seed for KMeans.
+            **kwargs: Drift/refit settings forwarded to ZoningModel.
+
+        Raises:
+            ValueError: If there are no valid rows.
+        """
+        from sklearn.cluster import KMeans
+
+        features = _feature_matrix(data)
+        features = features[~np.isnan(features).any(axis=1)]
+        if len(features) == 0:
+            raise ValueError("No valid data points to fit a zoning model on.")
+        record_payload('zoning.model.fit', len(features), 'rows')
+
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        scaled = (features - mean) / scale
+
+        if n_clusters == "auto":
+            n_clusters = select_n_clusters(scaled, max_clusters=max_clusters, random_state=random_state)
+        n_clusters = min(int(n_clusters), len(features))
+
+        kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+        labels = kmeans.fit_predict(scaled)
+        counts, sums, sumsq = cls._cluster_statistics(features, labels, n_clusters)
+        return cls._from_statistics(
+            mean, scale, kmeans.cluster_centers_, counts, sums, sumsq, random_state=random_state, **kwargs
+        )
+
+    @staticmethod
+    def _cluster_statistics(
+        features: np.ndarray, labels: np.ndarray, n_clusters: int, weights: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        weights = np.ones(len(features)) if weights is None else weights
+        counts = np.bincount(labels, weights=weights, minlength=n_clusters)
+        sums = np.column_stack([
+            np.bincount(labels, weights=weights * features[:, j], minlength=n_clusters)
+            for j in range(features.shape[1])
+        ])
+        sumsq = np.column_stack([
+            np.bincount(labels, weights=weights * features[:, j] ** 2, minlength=n_clusters)
+            for j in range(features.shape[1])
+        ])
+        return counts, sums, sumsq
+
+    def _within_cluster_mse(self) -> float:
+        """
+        Mean squared standardized distance of every point to its centroid, from the per-cluster
+        sums alone: sum (x - c)^2 = sumsq - 2 c sums + n c^2 per feature.
+        """
+        total = self.counts.sum()
+        if total == 0:
+            return 0.0
+        raw_centroids = self.centroids * self.scale + self.mean
+        sse = (self.sumsq - 2 * raw_centroids * self.sums + self.counts[:, None] * raw_centroids ** 2)
+        return float(max((sse / self.scale ** 2).sum(), 0.0) / total)
+
+    def _distances(self, features: np.ndarray) -> np.ndarray:
+        scaled = (features - self.mean) / self.scale
+        return ((scaled[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2)
+
+    def predict(self, data: FeatureInput) -> np.ndarray:
+        """
+        Cluster id of each row (nearest centroid in standardized space); -1 for rows with NaN features.
+        """
+        features = _feature_matrix(data)
+        labels = np.full(len(features), -1, dtype=np.int64)
+        valid = ~np.isnan(features).any(axis=1)
+        if valid.any():
+            labels[valid] = self._distances(features[valid]).argmin(axis=1)
+        return labels
+
+    def _ensure_writable(self) -> None:
+        # A loaded model is memory-mapped read-only; copy its (small) arrays before the first update
+        if not self._writable:
+            self.centroids = np.array(self.centroids, dtype=float)
+            self.counts = np.array(self.counts, dtype=float)
+            self.sums = np.array(self.sums, dtype=float)
+            self.sumsq = np.array(self.sumsq, dtype=float)
+            self.recent = np.array(self.recent, dtype=float)
+            self.recent_labels = np.array(self.recent_labels, dtype=np.int64)
+            self._writable = True
+
+    @instrumented('zoning.model.update')
+    def update(self, data: FeatureInput, allow_refit: bool = True) -> np.ndarray:
+        """
+        Assigns new readings to clusters and folds them into the model.
+
+        Each cluster's centroid moves to the mean of all points assigned to it so far, so existing
+        cluster ids keep their meaning. If drift exceeds drift_threshold (after min_drift_points
+        readings) and allow_refit is set, the model is refitted before returning.
+
+        Returns:
+            np.ndarray: Cluster id of each row, after any refit (-1 for rows with NaN features).
+        """
+        features = _feature_matrix(data)
+        valid = ~np.isnan(features).any(axis=1)
+        labels = np.full(len(features), -1, dtype=np.int64)
+        new = features[valid]
+        record_payload('zoning.model.update', len(new), 'rows')
+        if len(new) == 0:
+            return labels
+        self._ensure_writable()
+
+        distances = self._distances(new)
+        new_labels = distances.argmin(axis=1)
+        self.drift_sse += float(distances[np.arange(len(new)), new_labels].sum())
+        self.drift_n += len(new)
+
+        counts, sums, sumsq = self._cluster_statistics(new, new_labels, self.n_clusters)
+        self.counts += counts
+        self.sums += sums
+        self.sumsq += sumsq
+        touched = counts > 0
+        # Running mean of each touched cluster: c += (sum of new scaled points - n * c) / total count
+        scaled_sums = (sums[touched] - counts[touched, None] * self.mean) / self.scale
+        self.centroids[touched] += (
+            scaled_sums - counts[touched, None] * self.centroids[touched]
+        ) / self.counts[touched, None]
+
+        self.recent = np.concatenate([self.recent, new])[-self.max_recent:]
+        self.recent_labels = np.concatenate([self.recent_labels, new_labels])[-self.max_recent:]
+
+        if allow_refit and self.needs_refit():
+            self.refit()
+            new_labels = self._distances(new).argmin(axis=1)
+        labels[valid] = new_labels
+        return labels
+
+    def needs_refit(self) -> bool:
+        return self.drift_n >= self.min_drift_points and self.drift > self.drift_threshold
+
+    def refit(self, n_clusters: Optional[int] = None) -> None:
+        """
+        Refits scaler and KMeans without the original data.
+
+        The training set is each cluster's older points collapsed to their mean (weighted by their
+        count) plus the recent raw readings. The new scaler comes from the exact feature totals.
+        New clusters are matched to old ids by centroid distance; older mass moves with its mean.
+        """
+        from scipy.optimize import linear_sum_assignment
+        from sklearn.cluster import KMeans
+
+        with stage_timer('zoning.model.refit'):
+            self._ensure_writable()
+            n_clusters = n_clusters or self.n_clusters
+
+            recent_counts, recent_sums, recent_sumsq = self._cluster_statistics(
+                self.recent, self.recent_labels, self.n_clusters
+            )
+            old_counts = np.maximum(self.counts - recent_counts, 0)
+            old_sums = self.sums - recent_sums
+            old_sumsq = self.sumsq - recent_sumsq
+            has_old = old_counts > 1e-9
+            old_means = old_sums[has_old] / old_counts[has_old, None]
+
+            total = self.counts.sum()
+            mean = self.sums.sum(axis=0) / total
+            scale = np.sqrt(np.maximum(self.sumsq.sum(axis=0) / total - mean ** 2, 0.0))
+            scale[scale == 0] = 1.0
+
+            points = np.concatenate([old_means, self.recent])
+            weights = np.concatenate([old_counts[has_old], np.ones(len(self.recent))])
+            n_clusters = min(n_clusters, len(points))
+            kmeans = KMeans(n_clusters=n_clusters, random_state=self.random_state, n_init=10)
+            kmeans.fit((points - mean) / scale, sample_weight=weights)
+
+            # Keep ids stable: the new cluster closest to old cluster i becomes cluster i
+            old_centroids = (self.centroids * self.scale + self.mean - mean) / scale
+            cost = ((old_centroids[:, None, :] - kmeans.cluster_centers_[None, :, :]) ** 2).sum(axis=2)
+            _, new_ids = linear_sum_assignment(cost)
+            order = list(new_ids) + [i for i in range(n_clusters) if i not in set(new_ids)]
+            centroids = kmeans.cluster_centers_[order]
+
+            self.mean, self.scale, self.centroids = mean, scale, centroids
+            recent_labels = self._distances(self.recent).argmin(axis=1) if len(self.recent) else self.recent_labels
+            counts, sums, sumsq = self._cluster_statistics(self.recent, recent_labels, n_clusters)
+            # Older points move as a block with their old cluster's mean
+            old_labels = self._distances(old_means).argmin(axis=1) if len(old_means) else np.empty(0, dtype=np.int64)
+            for statistic, old in ((counts, old_counts[has_old]), (sums, old_sums[has_old]), (sumsq, old_sumsq[has_old])):
+                np.add.at(statistic, old_labels, old)
+
+            self.counts, self.sums, self.sumsq = counts, sums, sumsq
+            self.recent_labels = recent_labels
+            self.fit_mse = self._within_cluster_mse()
+            self.drift_sse, self.drift_n = 0.0, 0
+            self.n_refits += 1
+
+    def has_seen(self, data: FeatureInput) -> bool:
+        """
+        Whether this exact batch of readings has already been fitted or updated on.
+        """
+        return _batch_digest(_feature_matrix(data)) in self.seen_batches
+
+    def mark_seen(self, data: FeatureInput) -> None:
+        digest = _batch_digest(_feature_matrix(data))
+        if digest not in self.seen_batches:
+            self.seen_batches = (self.seen_batches + [digest])[-MAX_SEEN_BATCHES:]
+
+    def describe(self, data: Optional[FeatureInput] = None, labels: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Cluster descriptions in the format of identify_microclimate_zones, either for every reading
+        the model has seen (data=None) or for the given rows, assigned with predict unless their
+        labels are passed (so the zones match labels the caller already holds).
+        """
+        if data is None:
+            return describe_clusters(self.sums, self.counts)
+        features = _feature_matrix(data)
+        labels = self.predict(features) if labels is None else np.asarray(labels)
+        valid = labels >= 0
+        counts, sums, _ = self._cluster_statistics(features[valid], labels[valid], self.n_clusters)
+        return describe_clusters(sums, counts.astype(np.int64))
+
+    def save(self, directory: str) -> None:
+        """
+        Writes the model as .npy arrays plus metadata.json. Each file is written to a temporary
+        name and renamed into place, metadata last, so readers never see a half-written model.
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            SCALER_FILE: np.vstack([self.mean, self.scale]),
+            CENTROIDS_FILE: self.centroids,
+            COUNTS_FILE: self.counts,
+            SUMS_FILE: self.sums,
+            SUMSQ_FILE: self.sumsq,
+            RECENT_FILE: self.recent,
+            RECENT_LABELS_FILE: self.recent_labels,
+        }
+        for name, array in arrays.items():
+            tmp_path = os.path.join(directory, f".{name}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array, dtype=np.int64 if name == RECENT_LABELS_FILE else np.float64))
+            os.replace(tmp_path, os.path.join(directory, name))
+
+        tmp_path = os.path.join(directory, f".{METADATA_FILE}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'format_version': FORMAT_VERSION,
+                'feature_columns': FEATURE_COLUMNS,
+                'n_clusters': self.n_clusters,
+                'categories': self.categories,
+                'fit_mse': self.fit_mse,
+                'drift_sse': self.drift_sse,
+                'drift_n': self.drift_n,
+                'n_refits': self.n_refits,
+                'seen_batches': self.seen_batches,
+                'drift_threshold': self.drift_threshold,
+                'min_drift_points': self.min_drift_points,
+                'max_recent': self.max_recent,
+                'random_state': self.random_state,
+            }, f, indent=2)
+        os.replace(tmp_path, os.path.join(directory, METADATA_FILE))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "ZoningModel":
+        """
+        Opens a model directory written by save. With mmap=True the arrays are memory-mapped
+        read-only (copied on the first update).
+        """
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        if metadata.get('feature_columns') != FEATURE_COLUMNS:
+            raise ValueError(f"Zoning model in {directory} was fitted on {metadata.get('feature_columns')}, not {FEATURE_COLUMNS}.")
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+            for name in (SCALER_FILE, CENTROIDS_FILE, COUNTS_FILE, SUMS_FILE, SUMSQ_FILE, RECENT_FILE, RECENT_LABELS_FILE)
+        }
+        return cls(
+            mean=np.array(arrays[SCALER_FILE][0]),
+            scale=np.array(arrays[SCALER_FILE][1]),
+            centroids=arrays[CENTROIDS_FILE],
+            counts=arrays[COUNTS_FILE],
+            sums=arrays[SUMS_FILE],
+            sumsq=arrays[SUMSQ_FILE],
+            fit_mse=metadata['fit_mse'],
+            recent=arrays[RECENT_FILE],
+            recent_labels=arrays[RECENT_LABELS_FILE],
+            drift_sse=metadata['drift_sse'],
+            drift_n=metadata['drift_n'],
+            n_refits=metadata['n_refits'],
+            seen_batches=metadata.get('seen_batches'),
+            drift_threshold=metadata['drift_threshold'],
+            min_drift_points=metadata['min_drift_points'],
+            max_recent=metadata['max_recent'],
+            random_state=metadata['random_state'],
+        )
+
+
+class ZoningModelStore:
+    """
+    Zoning models kept per project under a root directory (root/<project_id>/), with the
+    loaded models cached in memory.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._models: Dict[str, ZoningModel] = {}
+        self._lock = threading.Lock()
+        # One lock per project around fit_or_update, so a project's first fit happens once
+        self._project_locks: Dict[str, threading.Lock] = {}
+
+    def path(self, project_id: str) -> str:
+        if not _PROJECT_ID_PATTERN.match(project_id) or project_id in ('.', '..'):
+            raise ValueError(f"Invalid project id for a zoning model: {project_id!r}")
+        return os.path.join(self.root, project_id)
+
+    def _project_lock(self, project_id: str) -> threading.Lock:
+        with self._lock:
+            return self._project_locks.setdefault(project_id, threading.Lock())
+
+    def get(self, project_id: str) -> Optional[ZoningModel]:
+        """
+        The project's model, or None if none has been saved.
+        """
+        with self._lock:
+            if project_id not in self._models:
+                directory = self.path(project_id)
+                if not os.path.exists(os.path.join(directory, METADATA_FILE)):
+                    return None
+                self._models[project_id] = ZoningModel.load(directory)
+            return self._models[project_id]
+
+    def save(self, project_id: str, model: ZoningModel) -> None:
+        with self._lock:
+            model.save(self.path(project_id))
+            self._models[project_id] = model
+
+    def fit_or_update(
+        self, project_id: str, data: FeatureInput, n_clusters: Union[int, str] = 3, **fit_kwargs: Any
+    ) -> Tuple[ZoningModel, np.ndarray]:
+        """
+        Fits and saves a model for a new project, or adds data to the existing one (refitting on
+        drift) and saves it. A batch the model has already absorbed (e.g. the same request made
+        again once its cached plan expired) is only assigned, not counted a second time.
+
+        Returns:
+            (model, cluster id of each row of data under the model as saved)
+        """
+        with self._project_lock(project_id):
+            model = self.get(project_id)
+            if model is None:
+                model = ZoningModel.fit(data, n_clusters, **fit_kwargs)
+            elif model.has_seen(data):
+                return model, model.predict(data)
+            else:
+                model.update(data)
+            model.mark_seen(data)
+            self.save(project_id, model)
+            # update's labels predate the centroid moves, so assign again with the final centroids
+            return model, model.predict(data)
+
+
+_default_store: Optional[ZoningModelStore] = None
+_default_store_loaded = False
+
+
+def get_default_zoning_store() -> Optional[ZoningModelStore]:
+    """
+    Returns the store rooted at the ZONING_MODEL_DIR environment variable, or None if it is not set.
+    """
+    global _default_store, _default_store_loaded
+    if not _default_store_loaded:
+        directory = get_env("ZONING_MODEL_DIR")
+        _default_store = ZoningModelStore(directory) if directory else None
+        _default_store_loaded = True
+    return _default_store
+
+
+# Example Usage (for testing purposes)
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(0)
+    site_conditions = np.array([[28.0, 35.0, 80.0], [18.0, 70.0, 900.0], [12.0, 60.0, 650.0]])
+
+    def readings(n, centres=site_conditions, noise=(1.0, 3.0, 40.0)):
+        centre = centres[rng.integers(0, len(centres), n)]
+        return pd.DataFrame(centre + rng.normal(0, noise, centre.shape), columns=FEATURE_COLUMNS)
+
+    store = ZoningModelStore(tempfile.mkdtemp())
+    model, _ = store.fit_or_update('demo-site', readings(5000), n_clusters=3)
+    print(f"Fitted {model.n_clusters} zones: {model.categories}")
+
+    # A new batch of readings from the same site: assigned and folded in, no refit
+    new = readings(200)
+    start = time.perf_counter()
+    model, labels = store.fit_or_update('demo-site', new)
+    print(f"Updated with 200 readings in {(time.perf_counter() - start) * 1000:.1f} ms; "
+          f"drift={model.drift:.2f}, refits={model.n_refits}, labels={np.bincount(labels)}")
+
+    # Reopened from disk (memory-mapped) it assigns points identically
+    reopened = ZoningModelStore(store.root).get('demo-site')
+    print(f"Reopened model agrees on predictions: {np.array_equal(reopened.predict(new), model.predict(new))}")
+
+    # Conditions shift (e.g. a new, much wetter part of the site): drift grows until a refit
+    shifted = np.array([[26.0, 85.0, 1600.0], [18.0, 70.0, 900.0], [12.0, 60.0, 650.0]])
+    for _ in range(5):
+        model, _ = store.fit_or_update('demo-site', readings(300, shifted))
+        print(f"drift={model.drift:.2f}, refits={model.n_refits}, categories={model.categories}")
@@ -0,0 +1 @@
+"""Plant catalog and recommendations."""
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, Optional, Set
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Goal tokens whose row sets are kept (the catalog is immutable, so they never go stale)
+_MAX_CACHED_GOAL_TOKENS = 4096
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class PlantCatalog:
+    """
+    An immutable, indexed in-memory copy of the 'plant_species' table.
+
+    Answers the same filters PlantRecommender used to send to Supabase, without a database
+    round trip:
+        - ideal_microclimate_tags contains the category (inverted index)
+        - ideal_soil_type equals the soil type (inverted index)
+        - ph_level_min <= pH <= ph_level_max (two sorted indexes, bisected)
+        - biodiversity_benefit ILIKE '%goal%' for each goal (token index, then substring check)
+    Results are sorted by carbon_seq_rate_kg_per_year_per_plant, highest first.
+
+    ILIKE matches inside words ('pollinat' matches 'pollinators'), so goal tokens are looked up
+    in a sorted list of every suffix of every benefit token: the tokens containing a goal token
+    are exactly those with a suffix starting with it, one bisected range.
+    """
+
+    def __init__(self, plants: List[Dict[str, Any]]):
+        # Row ids are positions in carbon-rate order, so sorting a match set is sorting ints
+        self._plants = sorted(
+            plants,
+            key=lambda p: p.get('carbon_seq_rate_kg_per_year_per_plant') or 0,
+            reverse=True
+        )
+
+        # Identifies the catalog's contents, so results derived from it (e.g. the agent's tool
+        # cache) can be keyed to it and stop matching once a refresh changes the table
+        rows = sorted(json.dumps(plant, sort_keys=True, default=str) for plant in self._plants)
+        self.version = hashlib.sha1('\n'.join(rows).encode()).hexdigest()[:16]
+
+        self._by_tag: Dict[str, Set[int]] = defaultdict(set)
+        self._by_soil: Dict[str, Set[int]] = defaultdict(set)
+        self._by_token: Dict[str, Set[int]] = defaultdict(set)
+        self._benefit_text: List[str] = []
+        ph_min_entries = []
+        ph_max_entries = []
+
+        for row_id, plant in enumerate(self._plants):
+            for tag in plant.get('ideal_microclimate_tags') or []:
+                self._by_tag[tag].add(row_id)
+
+            soil_type = plant.get('ideal_soil_type')
+            if soil_type is not None:
+                self._by_soil[soil_type].add(row_id)
+
+            benefit = (plant.get('biodiversity_benefit') or '').lower()
+            self._benefit_text.append(benefit)
+            for token in set(_tokenize(benefit)):
+                self._by_token[token].add(row_id)
+
+            # Like SQL comparisons, a NULL pH bound never matches a pH filter
+            ph_min = plant.get('ph_level_min')
+            ph_max = plant.get('ph_level_max')
+            if ph_min is not None and ph_max is not None:
+                ph_min_entries.append((float(ph_min), row_id))
+                ph_max_entries.append((float(ph_max), row_id))
+
+        # (suffix, token) pairs, sorted, for infix lookups of goal tokens
+        self._token_suffixes = sorted(
+            (token[start:], token) for token in self._by_token for start in range(len(token))
+        )
+        self._containing_cache: Dict[str, FrozenSet[int]] = {}
+
+        ph_min_entries.sort()
+        ph_max_entries.sort()
+        self._ph_min_values = [value for value, _ in ph_min_entries]
+        self._ph_max_values = [value for value, _ in ph_max_entries]
+        # Each row's position in the two sorted pH indexes, so a bisected cut filters a match
+        # set row by row instead of materializing every row on one side of it. Rows without
+        # pH bounds get positions no cut accepts.
+        self._ph_min_rank = [len(self._plants)] * len(self._plants)
+        self._ph_max_rank = [-1] * len(self._plants)
+        for rank, (_, row_id) in enumerate(ph_min_entries):
+            self._ph_min_rank[row_id] = rank
+        for rank, (_, row_id) in enumerate(ph_max_entries):
+            self._ph_max_rank[row_id] = rank
+
+    def __len__(self) -> int:
+        return len(self._plants)
+
+    @property
+    def plants(self) -> List[Dict[str, Any]]:
+        return list(self._plants)
+
+    def _filter_ph(self, row_ids: Set[int], ph_level: float) -> Set[int]:
+        # ph_level_min <= ph_level: rows before this cut of the ascending min index
+        min_cut = bisect_right(self._ph_min_values, ph_level)
+        # ph_level_max >= ph_level: rows from this cut of the ascending max index on
+        max_cut = bisect_left(self._ph_max_values, ph_level)
+        return {
+            row_id for row_id in row_ids
+            if self._ph_min_rank[row_id] < min_cut and self._ph_max_rank[row_id] >= max_cut
+        }
+
+    def _ids_containing(self, goal_token: str) -> FrozenSet[int]:
+        """
+        Rows whose benefit text has a token containing goal_token.
+        """
+        cached = self._containing_cache.get(goal_token)
+        if cached is not None:
+            return cached
+        matching: Set[int] = set()
+        position = bisect_left(self._token_suffixes, (goal_token,))
+        seen_tokens = set()
+        while position < len(self._token_suffixes):
+            suffix, token = self._token_suffixes[position]
+            if not suffix.startswith(goal_token):
+                break
+            if token not in seen_tokens:
+                seen_tokens.add(token)
+                matching |= self._by_token[token]
+            position += 1
+        if len(self._containing_cache) >= _MAX_CACHED_GOAL_TOKENS:
+            self._containing_cache.clear()
+        self._containing_cache[goal_token] = result = frozenset(matching)
+        return result
+
+    def _filter_goal(self, row_ids: Set[int], goal: str) -> Set[int]:
+        goal_lower = goal.lower()
+        # Narrow with the token index: every goal token must appear inside some benefit token
+        for goal_token in _tokenize(goal_lower):
+            row_ids = row_ids & self._ids_containing(goal_token)
+            if not row_ids:
+                return set()
+        # Confirm the exact ILIKE '%goal%' semantics on the narrowed set
+        return {row_id for row_id in row_ids if goal_lower in self._benefit_text[row_id]}
+
+    def query(
+        self,
+        microclimate_category: str,
+        soil_type: str,
+        ph_level: Optional[float] = None,
+        user_goals: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the plants matching every criterion, sorted by carbon sequestration rate (descending).
+        """
+        # Start from the most selective index and intersect the rest into it
+        matches = self._by_tag.get(microclimate_category, set()) & self._by_soil.get(soil_type, set())
+        if matches and ph_level is not None:
+            matches = self._filter_ph(matches, float(ph_level))
+        for goal in user_goals or []:
+            if not matches:
+                break
+            matches = self._filter_goal(matches, goal)
+        return [self._plants[row_id] for row_id in sorted(matches)]
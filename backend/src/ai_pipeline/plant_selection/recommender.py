@@ -1,32 +1,112 @@
-from supabase import Client, create_client
-import os
-from dotenv import load_dotenv
+import asyncio
+import inspect
+import time
 from typing import List, Dict, Any, Optional
 
-load_dotenv()
+from backend.src.ai_pipeline.config import get_env
+from backend.src.ai_pipeline.instrumentation import instrumented, record_cache, record_error, record_payload
+from backend.src.ai_pipeline.plant_selection.plant_catalog import PlantCatalog
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+# How long a loaded plant catalog is trusted before it is fetched again
+DEFAULT_CATALOG_TTL_SECONDS = 15 * 60
+
+
+async def _execute(query: Any) -> Any:
+    """
+    Runs a Supabase query built on either client: supabase's sync Client (what create_client
+    returns), whose execute() blocks and so runs in a worker thread, or an async client, whose
+    execute() is awaited.
+    """
+    if inspect.iscoroutinefunction(query.execute):
+        return await query.execute()
+    return await asyncio.to_thread(query.execute)
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in .env")
 
 class PlantRecommender:
-    def __init__(self):
-        # Create a Supabase client with the service role key for backend operations
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    def __init__(
+        self,
+        catalog_ttl_seconds: Optional[float] = DEFAULT_CATALOG_TTL_SECONDS,
+        supabase_client: Optional[Any] = None
+    ):
+        """
+        Args:
+            catalog_ttl_seconds (float, optional): Age after which the in-memory plant catalog is
+                refreshed on the next recommendation. None keeps it until refresh_catalog() is called.
+            supabase_client (optional): Client (sync or async) to use instead of creating one from
+                SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY.
+
+        Raises:
+            ValueError: If no client is given and the Supabase settings are missing.
+        """
+        if supabase_client is None:
+            # Config and the client are only needed once a recommender is created, not at import
+            supabase_url = get_env("SUPABASE_URL")
+            supabase_key = get_env("SUPABASE_SERVICE_ROLE_KEY")
+            if not supabase_url or not supabase_key:
+                raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in .env")
+            from supabase import create_client
+            # Create a Supabase client with the service role key for backend operations
+            supabase_client = create_client(supabase_url, supabase_key)
+        self.supabase = supabase_client
+        self.catalog_ttl_seconds = catalog_ttl_seconds
+        self._catalog: Optional[PlantCatalog] = None
+        self._catalog_loaded_at = 0.0
+        self._catalog_lock = asyncio.Lock()
 
     async def get_all_plant_species(self) -> List[Dict[str, Any]]:
         """
         Fetches all plant species from the 'plant_species' table in Supabase.
         """
         try:
-            response = await self.supabase.table('plant_species').select('*').execute()
+            response = await _execute(self.supabase.table('plant_species').select('*'))
             return response.data if response.data else []
         except Exception as e:
             print(f"Error fetching all plant species: {e}")
             return []
 
+    @instrumented('recommend.catalog_load')
+    async def _load_catalog(self) -> None:
+        try:
+            response = await _execute(self.supabase.table('plant_species').select('*'))
+            self._catalog = PlantCatalog(response.data or [])
+            self._catalog_loaded_at = time.monotonic()
+            record_payload('recommend.catalog_load', len(response.data or []), 'plants')
+        except Exception as e:
+            print(f"Error refreshing plant catalog: {e}")
+            record_error('recommend.catalog_load', type(e).__name__)
+            if self._catalog is None:
+                raise
+
+    async def refresh_catalog(self) -> PlantCatalog:
+        """
+        Loads the 'plant_species' table into a new in-memory PlantCatalog and swaps it in.
+        If the fetch fails, the previously loaded catalog (if any) is kept.
+        """
+        async with self._catalog_lock:
+            await self._load_catalog()
+            return self._catalog
+
+    def _catalog_is_stale(self) -> bool:
+        if self._catalog is None:
+            return True
+        if self.catalog_ttl_seconds is None:
+            return False
+        return time.monotonic() - self._catalog_loaded_at > self.catalog_ttl_seconds
+
+    async def get_catalog(self) -> PlantCatalog:
+        """
+        Returns the in-memory plant catalog, loading or refreshing it first if it is missing or stale.
+        """
+        stale = self._catalog_is_stale()
+        record_cache('plant_catalog', hit=not stale)
+        if stale:
+            async with self._catalog_lock:
+                # Another coroutine may have refreshed it while we waited for the lock
+                if self._catalog_is_stale():
+                    await self._load_catalog()
+        return self._catalog
+
+    @instrumented('recommend')
     async def recommend_plants(
         self,
         microclimate_category: str,
@@ -36,37 +116,84 @@ class PlantRecommender:
     ) -> List[Dict[str, Any]]:
         """
         Recommends plant species based on microclimate, soil type, pH level, and user-defined goals.
+
+        Matching runs against the indexed in-memory catalog (see PlantCatalog), so only catalog
+        loads/refreshes touch the database.
         """
         try:
-            query = self.supabase.table('plant_species').select('*')
-
-            # Filter by microclimate_category
-            query = query.contains('ideal_microclimate_tags', [microclimate_category])
-
-            # Filter by soil type
-            query = query.eq('ideal_soil_type', soil_type)
-            
-            # Filter by pH level
-            if ph_level is not None:
-                query = query.lte('ph_level_min', ph_level).gte('ph_level_max', ph_level)
-
-            # Filter by user goals
-            if user_goals:
-                for goal in user_goals:
-                    query = query.ilike('biodiversity_benefit', f'%{goal}%')
-
-            response = await query.execute()
-            if response.data:
-                return sorted(
-                    response.data,
-                    key=lambda x: x.get('carbon_seq_rate_kg_per_year_per_plant', 0),
-                    reverse=True
-                )
-            return []
+            catalog = await self.get_catalog()
+            recommended = catalog.query(
+                microclimate_category=microclimate_category,
+                soil_type=soil_type,
+                ph_level=ph_level,
+                user_goals=user_goals
+            )
+            record_payload('recommend', len(recommended), 'plants')
+            return recommended
         except Exception as e:
             print(f"Error recommending plants: {e}")
+            record_error('recommend', type(e).__name__)
             return []
 
+    @instrumented('recommend.batch')
+    async def recommend_plants_batch(
+        self,
+        zones: List[Dict[str, Any]],
+        user_goals: Optional[List[str]] = None
+    ) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Recommends plant species for several microclimate zones with a single catalog fetch.
+
+        Args:
+            zones (List[Dict[str, Any]]): One dict per zone with 'microclimate_category' (or the
+                'representative_category' produced by identify_microclimate_zones), 'soil_type',
+                'ph_level' and optionally 'user_goals'. Zones are keyed by 'zone_id', falling back
+                to 'cluster_id' and then to their position in the list.
+            user_goals (List[str], optional): Goals applied to zones that don't specify their own.
+
+        Returns:
+            Dict mapping each zone id to its recommended plants (same format as recommend_plants).
+            Zones with identical criteria share one lookup.
+        """
+        try:
+            catalog = await self.get_catalog()
+        except Exception as e:
+            print(f"Error recommending plants: {e}")
+            record_error('recommend.batch', type(e).__name__)
+            return {self._zone_id(zone, i): [] for i, zone in enumerate(zones)}
+
+        record_payload('recommend.batch', len(zones), 'zones')
+        results: Dict[Any, List[Dict[str, Any]]] = {}
+        resolved: Dict[tuple, List[Dict[str, Any]]] = {}
+        for i, zone in enumerate(zones):
+            category = zone.get('microclimate_category', zone.get('representative_category'))
+            soil_type = zone.get('soil_type')
+            ph_level = zone.get('ph_level')
+            goals = zone.get('user_goals', user_goals) or []
+
+            # Goal matching is case-insensitive and order-independent, so normalise before deduplicating
+            criteria = (
+                category,
+                soil_type,
+                None if ph_level is None else float(ph_level),
+                tuple(sorted({goal.lower() for goal in goals}))
+            )
+            if criteria not in resolved:
+                resolved[criteria] = catalog.query(
+                    microclimate_category=category,
+                    soil_type=soil_type,
+                    ph_level=criteria[2],
+                    user_goals=list(criteria[3])
+                )
+            results[self._zone_id(zone, i)] = list(resolved[criteria])
+        return results
+
+    @staticmethod
+    def _zone_id(zone: Dict[str, Any], position: int) -> Any:
+        if 'zone_id' in zone:
+            return zone['zone_id']
+        return zone.get('cluster_id', position)
+
 
 async def main_test_recommender():
     recommender = PlantRecommender()
@@ -103,6 +230,18 @@ async def main_test_recommender():
     else:
         print("No plants recommended for these criteria.")
 
+    print("\nRecommending plants for several zones at once:")
+    batch = await recommender.recommend_plants_batch(
+        [
+            {"zone_id": "north", "microclimate_category": "temperate-humid", "soil_type": "loamy", "ph_level": 6.5},
+            {"zone_id": "south", "microclimate_category": "hot-dry-desert", "soil_type": "sandy", "ph_level": 7.0},
+            {"zone_id": "east", "microclimate_category": "temperate-humid", "soil_type": "loamy", "ph_level": 6.5},
+        ],
+        user_goals=["pollinator-friendly"]
+    )
+    for zone_id, plants in batch.items():
+        print(f"- {zone_id}: {[plant.get('common_name') for plant in plants]}")
+
 
 if __name__ == '__main__':
     import asyncio
@@ -0,0 +1,449 @@
+import asyncio
+import hashlib
+import importlib
+import json
+import math
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, Union
+
+import httpx
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from backend.src.ai_pipeline.caching.persistent_cache import PersistentLRUCache
+from backend.src.ai_pipeline.carbon_modeling.calculator import calculate_carbon_sequestration_projection
+from backend.src.ai_pipeline.carbon_modeling.planting_optimizer import DEFAULT_TIME_BUDGET_S, optimize_planting_mix
+from backend.src.ai_pipeline.data_processing.data_ingestion import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUEST_TIMEOUT_S,
+    default_weather_dates,
+    fetch_weather_data_many,
+    get_soil_properties_bulk,
+)
+from backend.src.ai_pipeline.data_processing.climatology import (
+    ANNUAL,
+    get_climatology_features,
+    get_default_climatology_store,
+)
+from backend.src.ai_pipeline.data_processing.request_scheduler import RequestScheduler, get_default_scheduler
+from backend.src.ai_pipeline.data_processing.sensor_stream import get_default_sensor_stream
+from backend.src.ai_pipeline.data_processing.spatial_dedup import IngestionDedupIndex
+from backend.src.ai_pipeline.instrumentation import (
+    PrometheusExporter,
+    configure_from_env,
+    get_exporter,
+    stage_timer,
+)
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import FEATURE_COLUMNS, identify_microclimate_zones
+from backend.src.ai_pipeline.microclimate_analysis.zoning_model import get_default_zoning_store
+from backend.src.ai_pipeline.plant_selection.recommender import PlantRecommender
+
+METERS_PER_DEGREE_LAT = 111_320.0
+
+
+class PlanRequest(BaseModel):
+    latitude: float = Field(ge=-90, le=90, description="Latitude of the site centre.")
+    longitude: float = Field(ge=-180, le=180, description="Longitude of the site centre.")
+    sample_points: Optional[List[Tuple[float, float]]] = Field(
+        default=None, description="Explicit (lat, lon) sample points. If omitted, a grid around the centre is used."
+    )
+    grid_size: int = Field(default=3, ge=1, le=20, description="Sample grid is grid_size x grid_size points.")
+    grid_spacing_m: float = Field(default=100.0, gt=0, description="Distance between sample grid points in metres.")
+    dates: Optional[List[str]] = Field(
+        default=None, description="Dates (YYYY-MM-DD, within the last 5 days). Defaults to the last 3 days."
+    )
+    weather_source: Literal["live", "climatology"] = Field(
+        default="live",
+        description="'live' fetches recent weather from the API; 'climatology' uses the offline climate normals."
+    )
+    climatology_month: int = Field(
+        default=ANNUAL, ge=0, le=12, description="Month (1-12) of the climate normals to use, or 0 for annual."
+    )
+    n_clusters: Union[int, Literal["auto"]] = 3
+    project_id: Optional[str] = Field(
+        default=None,
+        description="Zone against the project's saved zoning model (updated with this request's readings) "
+                    "instead of clustering from scratch. Requires ZONING_MODEL_DIR."
+    )
+    user_goals: Optional[List[str]] = None
+    max_species_per_zone: int = Field(default=5, ge=1)
+    plants_per_species: int = Field(default=10, ge=0)
+    years: int = Field(default=20, ge=1, le=200)
+
+
+class PlantingMixRequest(BaseModel):
+    plants: List[Dict[str, Any]] = Field(
+        min_length=1,
+        description="Candidate species (e.g. a zone's recommended_plants) with 'footprint_m2' and 'cost' per plant."
+    )
+    site_area_m2: float = Field(gt=0)
+    budget: Optional[float] = Field(default=None, ge=0)
+    years: int = Field(default=20, ge=1, le=200)
+    max_area_share: Optional[float] = Field(
+        default=None, gt=0, le=1, description="Largest share of the site area any one species may cover."
+    )
+    max_quantity_per_species: Optional[int] = Field(default=None, ge=0)
+    time_budget_s: float = Field(default=DEFAULT_TIME_BUDGET_S, gt=0, le=10)
+
+
+class SensorReading(BaseModel):
+    station_id: str = Field(min_length=1)
+    timestamp: Optional[float] = Field(default=None, description="Unix time of the reading. Defaults to now.")
+    temp_c: Optional[float] = None
+    humidity_percent: Optional[float] = None
+    rainfall_mm: Optional[float] = Field(default=None, ge=0, description="Rain since the station's previous reading.")
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients are created once and shared by every request
+    app.state.http_client = httpx.AsyncClient(
+        timeout=DEFAULT_REQUEST_TIMEOUT_S,
+        limits=httpx.Limits(
+            max_connections=DEFAULT_MAX_CONCURRENCY,
+            max_keepalive_connections=DEFAULT_MAX_CONCURRENCY
+        )
+    )
+    try:
+        app.state.recommender = PlantRecommender()
+    except ValueError as e:
+        # The API still serves zoning and projections; endpoints needing plants answer 503
+        print(f"Warning: Plant recommendations are unavailable: {e}")
+        app.state.recommender = None
+    app.state.plan_cache = PersistentLRUCache(max_memory_entries=256, max_age_seconds=60 * 60, table_name='plan_cache')
+    # Shared across requests so overlapping sites reuse each other's in-flight and completed fetches
+    app.state.dedup_index = IngestionDedupIndex()
+    app.state.weather_scheduler = get_default_scheduler()
+    app.state.sensor_stream = get_default_sensor_stream()
+    # The planning agent pulls in LangChain, so it is built on the first /agent/stream request
+    app.state.agent = None
+    app.state.agent_lock = asyncio.Lock()
+    # Stage metrics are off unless PIPELINE_METRICS is set (e.g. 'prometheus' for GET /metrics)
+    configure_from_env()
+    # The pipeline imports scikit-learn lazily; load it now so the first /plan request doesn't pay for it
+    await asyncio.to_thread(importlib.import_module, 'sklearn.cluster')
+    if app.state.recommender is not None:
+        try:
+            await app.state.recommender.refresh_catalog()
+        except Exception as e:
+            # Not fatal: the catalog is loaded again on the first recommendation
+            print(f"Warning: Could not preload plant catalog: {e}")
+    yield
+    await app.state.http_client.aclose()
+
+
+app = FastAPI(title="Verdant Green Planner API", lifespan=lifespan)
+
+
+@contextmanager
+def _stage_timer(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        with stage_timer(f'plan.{stage}'):
+            yield
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 2)
+
+
+def _request_hash(plan_request: PlanRequest, dates: List[str]) -> str:
+    # Hashed with the resolved dates: a request without dates means "the last few days", which
+    # changes at midnight, so it must not keep serving yesterday's window from the cache
+    payload = json.dumps({**plan_request.model_dump(), 'dates': dates}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def _get_recommender(state: Any) -> PlantRecommender:
+    """
+    The shared recommender, with its plant catalog loaded; 503 if it can't be.
+    """
+    if state.recommender is None:
+        raise HTTPException(status_code=503, detail="No plant database is configured (SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY).")
+    try:
+        await state.recommender.get_catalog()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"The plant catalog could not be loaded: {e}")
+    return state.recommender
+
+
+def _sample_grid(lat: float, lon: float, grid_size: int, spacing_m: float) -> List[Tuple[float, float]]:
+    """
+    grid_size x grid_size points centred on (lat, lon), spacing_m metres apart.
+    """
+    dlat = spacing_m / METERS_PER_DEGREE_LAT
+    dlon = spacing_m / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    offsets = np.arange(grid_size) - (grid_size - 1) / 2
+    return [
+        (round(lat + i * dlat, 6), round(lon + j * dlon, 6))
+        for i in offsets
+        for j in offsets
+    ]
+
+
+def _assign_points_to_zones(features: pd.DataFrame, zones: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Index (into zones) of the nearest zone for each row, in standardized feature space.
+    """
+    values = features[FEATURE_COLUMNS].to_numpy(dtype=float)
+    centroids = np.array([[zone[col] for col in FEATURE_COLUMNS] for zone in zones])
+    scale = values.std(axis=0)
+    scale[scale == 0] = 1.0
+    distances = (((values[:, None, :] - centroids[None, :, :]) / scale) ** 2).sum(axis=2)
+    return distances.argmin(axis=1)
+
+
+def _zone_with_project_model(
+    store: Any, project_id: str, features: pd.DataFrame, n_clusters: Union[int, str]
+) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    Zones features with the project's saved model (fitted on first use, updated afterwards), so
+    zone ids stay the same across requests. Returns (zones of these points, zone index of each row).
+    """
+    model, labels = store.fit_or_update(project_id, features, n_clusters)
+    # Zones and labels from the same assignment, so every label has a (non-empty) zone
+    zones = model.describe(features, labels)
+    index_of = {zone['cluster_id']: index for index, zone in enumerate(zones)}
+    return zones, np.array([index_of[label] for label in labels])
+
+
+async def _ingest(
+    client: httpx.AsyncClient,
+    points: List[Tuple[float, float]],
+    dates: List[str],
+    dedup_index: Optional[IngestionDedupIndex] = None,
+    scheduler: Optional[RequestScheduler] = None
+) -> pd.DataFrame:
+    """
+    Fetches weather (concurrently over the shared client) and soil for every sample point.
+    """
+    weather_task = fetch_weather_data_many(
+        points, dates, client=client, dedup_index=dedup_index, scheduler=scheduler
+    )
+    soil_task = asyncio.to_thread(
+        get_soil_properties_bulk, [lat for lat, _ in points], [lon for _, lon in points]
+    )
+    weather, soil_frame = await asyncio.gather(weather_task, soil_task)
+
+    soil_frame['lat'] = [lat for lat, _ in points]
+    soil_frame['lon'] = [lon for _, lon in points]
+    return weather.merge(soil_frame, on=['lat', 'lon'], how='left')
+
+
+async def _ingest_climatology(points: List[Tuple[float, float]], month: int) -> pd.DataFrame:
+    """
+    Offline ingestion: climate normals from the local climatology store plus soil for every sample point.
+    """
+    lats = [lat for lat, _ in points]
+    lons = [lon for _, lon in points]
+    climate, soil_frame = await asyncio.gather(
+        asyncio.to_thread(get_climatology_features, points, month),
+        asyncio.to_thread(get_soil_properties_bulk, lats, lons),
+    )
+    return pd.concat([climate.reset_index(drop=True), soil_frame.reset_index(drop=True)], axis=1)
+
+
+@app.post("/plan")
+async def plan(plan_request: PlanRequest, request: Request) -> Dict[str, Any]:
+    """
+    Runs the full planning pipeline for a site: ingestion -> zoning -> recommendations -> projection.
+    """
+    state = request.app.state
+    dates = plan_request.dates or default_weather_dates()
+    cache_key = _request_hash(plan_request, dates)
+    lookup_start = time.perf_counter()
+    cached = state.plan_cache.get(cache_key)
+    if cached is not None:
+        return {
+            **cached,
+            'cached': True,
+            'timings_ms': {'cache_lookup': round((time.perf_counter() - lookup_start) * 1000, 2)},
+        }
+
+    # Fail before ingestion rather than serve zones without recommendations
+    recommender = await _get_recommender(state)
+    timings: Dict[str, float] = {}
+    points = plan_request.sample_points or _sample_grid(
+        plan_request.latitude, plan_request.longitude, plan_request.grid_size, plan_request.grid_spacing_m
+    )
+
+    with _stage_timer(timings, 'ingestion'):
+        if plan_request.weather_source == "climatology":
+            if get_default_climatology_store() is None:
+                raise HTTPException(status_code=503, detail="No climatology store is configured (CLIMATOLOGY_DIR).")
+            site_data = await _ingest_climatology(points, plan_request.climatology_month)
+        else:
+            try:
+                site_data = await _ingest(
+                    state.http_client, points, dates, state.dedup_index, state.weather_scheduler
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+    valid = site_data.dropna(subset=FEATURE_COLUMNS)
+    if valid.empty:
+        raise HTTPException(status_code=502, detail="No weather data could be fetched for the site.")
+
+    with _stage_timer(timings, 'zoning'):
+        if plan_request.project_id:
+            zoning_store = get_default_zoning_store()
+            if zoning_store is None:
+                raise HTTPException(status_code=503, detail="No zoning model store is configured (ZONING_MODEL_DIR).")
+            try:
+                zones, nearest = await asyncio.to_thread(
+                    _zone_with_project_model, zoning_store, plan_request.project_id, valid, plan_request.n_clusters
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        else:
+            zones = await asyncio.to_thread(identify_microclimate_zones, valid, plan_request.n_clusters)
+            nearest = _assign_points_to_zones(valid, zones) if zones else None
+    if not zones:
+        raise HTTPException(status_code=422, detail="Microclimate zoning produced no zones.")
+
+    # Each zone takes the dominant soil type and mean pH of the sample points nearest to it
+    for index, zone in enumerate(zones):
+        zone_points = valid[nearest == index]
+        soil_types = Counter(zone_points['soil_type'].dropna())
+        zone['soil_type'] = soil_types.most_common(1)[0][0] if soil_types else None
+        ph = zone_points['ph_level'].dropna()
+        zone['ph_level'] = round(float(ph.mean()), 2) if not ph.empty else None
+
+    with _stage_timer(timings, 'recommendation'):
+        recommendations = await recommender.recommend_plants_batch(zones, user_goals=plan_request.user_goals)
+
+    with _stage_timer(timings, 'projection'):
+        all_selections = []
+        for zone in zones:
+            plants = recommendations.get(zone['cluster_id'], [])[:plan_request.max_species_per_zone]
+            selections = [
+                {**plant, 'quantity': plan_request.plants_per_species}
+                for plant in plants
+                if plant.get('carbon_seq_rate_kg_per_year_per_plant') is not None
+            ]
+            zone['recommended_plants'] = plants
+            zone['projection'] = calculate_carbon_sequestration_projection(selections, plan_request.years)
+            all_selections.extend(selections)
+        projection = calculate_carbon_sequestration_projection(all_selections, plan_request.years)
+
+    response = {
+        'num_sample_points': len(points),
+        'num_valid_points': len(valid),
+        'num_failed_weather_requests': int(site_data.get('num_failed_requests', pd.Series(dtype=int)).sum()),
+        'zones': zones,
+        'projection': projection,
+    }
+    state.plan_cache.set(cache_key, json.loads(json.dumps(response, default=str)))
+    return {**response, 'cached': False, 'timings_ms': timings}
+
+
+@app.post("/plan/planting-mix")
+async def planting_mix(mix_request: PlantingMixRequest) -> Dict[str, Any]:
+    """
+    Quantities of each candidate species that maximize projected carbon within the site area and budget.
+    """
+    return await asyncio.to_thread(
+        optimize_planting_mix,
+        mix_request.plants,
+        mix_request.site_area_m2,
+        budget=mix_request.budget,
+        years=mix_request.years,
+        max_area_share=mix_request.max_area_share,
+        max_quantity_per_species=mix_request.max_quantity_per_species,
+        time_budget_s=mix_request.time_budget_s,
+    )
+
+
+@app.get("/stats/ingestion")
+async def ingestion_stats(request: Request) -> Dict[str, Any]:
+    """
+    Weather ingestion counters: rate limiter queue depth, throttling and retries, and dedup savings.
+    """
+    state = request.app.state
+    return {
+        'scheduler': state.weather_scheduler.stats(),
+        'dedup': state.dedup_index.stats(),
+    }
+
+
+@app.post("/sensors/readings")
+async def ingest_sensor_readings(readings: List[SensorReading], request: Request) -> Dict[str, Any]:
+    """
+    Adds a batch of on-site station readings to the rolling per-station windows.
+    """
+    stream = request.app.state.sensor_stream
+    for reading in readings:
+        if reading.lat is not None and reading.lon is not None:
+            stream.register_station(reading.station_id, reading.lat, reading.lon)
+    accepted = stream.push_many(reading.model_dump(exclude={'lat', 'lon'}) for reading in readings)
+    return {'accepted': accepted, 'rejected_late': len(readings) - accepted}
+
+
+@app.get("/sensors/features")
+async def sensor_features(request: Request, station_id: Optional[List[str]] = Query(default=None)) -> Dict[str, Any]:
+    """
+    Current rolling weather features per station, in the format identify_microclimate_zones takes.
+    """
+    stream = request.app.state.sensor_stream
+    frame = stream.feature_frame(station_id)
+    # NaN isn't valid JSON
+    frame = frame.astype(object).where(frame.notna(), None)
+    return {'stations': frame.to_dict(orient='records'), 'summary': stream.summary()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """
+    Pipeline stage metrics in the Prometheus text format (requires PIPELINE_METRICS=prometheus).
+    """
+    exporter = get_exporter()
+    if not isinstance(exporter, PrometheusExporter):
+        raise HTTPException(status_code=404, detail="Prometheus metrics are not enabled (PIPELINE_METRICS=prometheus).")
+    return exporter.render()
+
+
+async def _get_agent(state: Any) -> Any:
+    async with state.agent_lock:
+        if state.agent is None:
+            from backend.src.ai_pipeline.langchain_integration.query_router import build_routed_agent
+            recommender = await _get_recommender(state)
+            state.agent = await asyncio.to_thread(build_routed_agent, recommender, verbose=False)
+    return state.agent
+
+
+@app.get("/agent/stream")
+async def agent_stream(request: Request, query: str) -> StreamingResponse:
+    """
+    Answers a free-text planning question with the AI agent, streamed as server-sent events
+    (start, route, token, tool_start, tool_end, final, error) as the agent produces them.
+
+    A GET so browsers can consume it with EventSource. If the client disconnects, the stream is
+    closed and the agent run is cancelled.
+    """
+    from backend.src.ai_pipeline.langchain_integration.agent_streaming import format_sse, stream_agent_events
+
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="query must not be empty.")
+    agent = await _get_agent(request.app.state)
+
+    async def events() -> Any:
+        async for event in stream_agent_events(agent, {'input': query}):
+            yield format_sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies (nginx) must not buffer the stream, or tokens arrive all at once
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run("backend.src.main:app", host="0.0.0.0", port=8000)
+
@@ -0,0 +1,77 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+# respond(call_number, query) -> (status, headers, body); a non-bytes body is sent as JSON
+Responder = Callable[[int, Dict[str, str]], Tuple[int, Dict[str, str], Any]]
+
+
+class StubServer:
+    """
+    Local HTTP server standing in for OpenWeatherMap. Every GET is answered by the responder,
+    and the query strings received are kept in `requests`.
+    """
+
+    def __init__(self, respond: Responder):
+        self.respond = respond
+        self.requests: List[str] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append(self.path)
+                    call_number = len(stub.requests)
+                query = dict(parse_qsl(urlsplit(self.path).query))
+                status, headers, body = stub.respond(call_number, query)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def calls(self) -> int:
+        return len(self.requests)
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server() -> Iterator[Callable[[Responder], StubServer]]:
+    servers: List[StubServer] = []
+
+    def start(respond: Responder) -> StubServer:
+        server = StubServer(respond)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture(autouse=True)
+def _test_env(monkeypatch, tmp_path):
+    # Ingestion refuses to run without a key; the stub server ignores it
+    monkeypatch.setenv('OPENWEATHERMAP_API_KEY', 'test-key')
+    # Keep default caches out of the user's cache directory
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path / 'cache'))
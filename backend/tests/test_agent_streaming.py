@@ -0,0 +1,76 @@
+import asyncio
+
+from backend.src.ai_pipeline.langchain_integration.agent_streaming import stream_agent_events
+from backend.src.ai_pipeline.langchain_integration.query_router import QueryRouter, StructuredQueryParser
+
+FREE_FORM_QUERY = "What are some good plants for carbon sequestration in a temperate-humid region with clay soil?"
+
+
+class EventAgent:
+    """
+    Stands in for the AgentExecutor: streams n tool events, then the final answer.
+    """
+
+    def __init__(self, n_events: int):
+        self.n_events = n_events
+
+    async def astream_events(self, inputs, version):
+        for _ in range(self.n_events):
+            yield {'event': 'on_tool_start', 'name': 'recommend_plants_tool', 'data': {}}
+        yield {'event': 'on_chain_end', 'name': 'AgentExecutor', 'parent_ids': [],
+               'data': {'output': {'output': 'done'}}}
+
+
+def _router(agent) -> QueryRouter:
+    return QueryRouter(agent=agent, tool=None, parser=StructuredQueryParser())
+
+
+def test_streamed_fallthrough_is_recorded_by_the_router():
+    router = _router(EventAgent(n_events=3))
+
+    async def collect():
+        return [event async for event in stream_agent_events(router, {'input': FREE_FORM_QUERY}, heartbeat_s=None)]
+
+    events = asyncio.run(collect())
+    assert [event['type'] for event in events] == ['start', 'route'] + ['tool_start'] * 3 + ['final']
+    assert events[1]['reason'] == 'missing_ph_level'
+    assert router.stats()['agent'] == 1 and router.agent_time_s > 0
+
+
+def test_closing_early_with_a_full_queue_does_not_hang():
+    router = _router(EventAgent(n_events=50))
+
+    async def read_two_then_close():
+        stream = stream_agent_events(router, {'input': FREE_FORM_QUERY}, max_queue=2, heartbeat_s=None)
+        await stream.__anext__()
+        await stream.__anext__()
+        # Let the producer fill the queue and block on it before the consumer goes away
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(stream.aclose(), timeout=2)
+
+    asyncio.run(read_two_then_close())
+    # An abandoned run is not counted towards the agent's latency
+    assert router.stats()['agent'] == 0
+
+
+def test_react_agent_builds_and_streams_an_answer():
+    from backend.benchmarks.fakes import InMemorySupabase, scripted_react_llm
+    from backend.src.ai_pipeline.langchain_integration.chain_builder import build_ai_agent
+    from backend.src.ai_pipeline.plant_selection.recommender import PlantRecommender
+
+    oak = {
+        'common_name': 'Oak', 'ideal_microclimate_tags': ['temperate-humid'], 'ideal_soil_type': 'clay',
+        'ph_level_min': 5.5, 'ph_level_max': 7.5, 'biodiversity_benefit': 'Supports pollinators',
+        'carbon_seq_rate_kg_per_year_per_plant': 20.0,
+    }
+    recommender = PlantRecommender(supabase_client=InMemorySupabase({'plant_species': [oak]}))
+    criteria = {'microclimate_category': 'temperate-humid', 'soil_type': 'clay', 'ph_level': 6.5}
+    agent = build_ai_agent(recommender, llm=scripted_react_llm(criteria), verbose=False, use_cache=False)
+
+    async def collect():
+        return [event async for event in stream_agent_events(agent, {'input': FREE_FORM_QUERY}, heartbeat_s=None)]
+
+    events = asyncio.run(collect())
+    tool_ends = [event for event in events if event['type'] == 'tool_end']
+    assert tool_ends and 'Oak' in tool_ends[0]['output']
+    assert events[-1] == {'type': 'final', 'output': 'Here are the recommended plants.'}
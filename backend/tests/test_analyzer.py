@@ -0,0 +1,130 @@
+import itertools
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import (
+    FEATURE_COLUMNS,
+    MICROCLIMATE_CATEGORIES,
+    categorize_microclimate,
+    categorize_microclimate_array,
+    identify_microclimate_zones,
+    identify_microclimate_zones_streaming,
+    select_n_clusters,
+)
+
+# Well-separated site conditions, so every clustering method should find the same zones
+CENTRES = np.array([[28.0, 35.0, 80.0], [18.0, 70.0, 900.0], [5.0, 50.0, 200.0]])
+
+
+def blobs(n: int, seed: int = 0, centres: np.ndarray = CENTRES) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    zone = rng.integers(0, len(centres), n)
+    data = pd.DataFrame(centres[zone] + rng.normal(0, 1, (n, 3)) * [1.0, 3.0, 40.0], columns=FEATURE_COLUMNS)
+    data.loc[rng.random(n) < 0.01, 'total_rainfall_mm'] = np.nan
+    return data
+
+
+def by_temperature(zones):
+    return sorted(zones, key=lambda zone: zone['avg_temp_c'])
+
+# Every threshold of the rules, a value either side of it, and NaN
+TEMPS = [-5.0, -0.5, 0.0, 0.5, 9.5, 10.0, 10.5, 14.5, 15.0, 15.5, 24.5, 25.0, 25.5, 27.5, 28.0, 28.5, 35.0, np.nan]
+HUMIDITIES = [20.0, 39.5, 40.0, 40.5, 59.5, 60.0, 60.5, 69.5, 70.0, 70.5, 90.0, np.nan]
+RAINFALLS = [100.0, 299.5, 300.0, 300.5, 499.5, 500.0, 500.5, 699.5, 700.0, 700.5, 999.5, 1000.0, 1000.5, 1500.0, np.nan]
+
+
+def test_array_version_matches_the_scalar_rules():
+    grid = np.array(list(itertools.product(TEMPS, HUMIDITIES, RAINFALLS)))
+    vectorized = categorize_microclimate_array(grid[:, 0], grid[:, 1], grid[:, 2])
+    expected = [categorize_microclimate(*row) for row in grid.tolist()]
+    assert list(vectorized) == expected
+    # The grid reaches every category, so no rule goes untested
+    assert set(expected) == set(MICROCLIMATE_CATEGORIES)
+
+
+def test_series_input_keeps_its_index():
+    frame = pd.DataFrame(
+        {'t': [29.0, -3.0, np.nan], 'h': [30.0, 50.0, 80.0], 'r': [100.0, 400.0, 1200.0]}, index=[10, 20, 30]
+    )
+    result = categorize_microclimate_array(frame['t'], frame['h'], frame['r'])
+    assert list(result.index) == [10, 20, 30]
+    assert list(result) == ['hot-dry-desert', 'polar-alpine', 'moderate']
+
+
+def test_streaming_zoning_finds_the_in_memory_zones():
+    data = blobs(6_000)
+    in_memory = by_temperature(identify_microclimate_zones(data, n_clusters=3))
+    chunks = iter([data.iloc[start:start + 1_000] for start in range(0, len(data), 1_000)])
+    streamed = by_temperature(identify_microclimate_zones_streaming(chunks, n_clusters=3, batch_size=500))
+
+    assert [zone['count'] for zone in streamed] == [zone['count'] for zone in in_memory]
+    assert [zone['representative_category'] for zone in streamed] == [zone['representative_category'] for zone in in_memory]
+    for mine, theirs in zip(streamed, in_memory):
+        for column in FEATURE_COLUMNS:
+            assert mine[column] == pytest.approx(theirs[column])
+
+
+def test_spill_file_is_removed_when_the_source_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+
+    def failing_chunks():
+        yield blobs(100)
+        raise OSError("connection reset while reading chunks")
+
+    with pytest.raises(OSError):
+        identify_microclimate_zones_streaming(failing_chunks(), n_clusters=3)
+    assert list(tmp_path.iterdir()) == []
+
+    # A successful run also cleans up after itself
+    identify_microclimate_zones_streaming(iter([blobs(300)]), n_clusters=3)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_bincount_aggregation_matches_a_per_cluster_mask_loop():
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    data = blobs(2_000, seed=3)
+    zones = identify_microclimate_zones(data, n_clusters=4)
+
+    # The aggregation as it was written before: one boolean mask per cluster
+    features = data[FEATURE_COLUMNS].dropna()
+    labels = KMeans(n_clusters=4, random_state=42, n_init=10).fit_predict(StandardScaler().fit_transform(features))
+    expected = []
+    for cluster_id in range(4):
+        cluster = features[labels == cluster_id]
+        if cluster.empty:
+            continue
+        expected.append({
+            'cluster_id': cluster_id,
+            'avg_temp_c': cluster['avg_temp_c'].mean(),
+            'avg_humidity_percent': cluster['avg_humidity_percent'].mean(),
+            'total_rainfall_mm': cluster['total_rainfall_mm'].mean(),
+            'count': len(cluster),
+            'representative_category': categorize_microclimate(
+                cluster['avg_temp_c'].mean(), cluster['avg_humidity_percent'].mean(), cluster['total_rainfall_mm'].mean()
+            ),
+        })
+
+    assert [zone['cluster_id'] for zone in zones] == [zone['cluster_id'] for zone in expected]
+    for zone, reference in zip(zones, expected):
+        assert zone == pytest.approx(reference)
+
+
+@pytest.mark.parametrize('centres', [
+    CENTRES,
+    np.array([[30.0, 30.0, 100.0], [20.0, 75.0, 1000.0], [12.0, 60.0, 600.0], [2.0, 40.0, 150.0], [25.0, 85.0, 1600.0]]),
+])
+def test_auto_picks_the_true_number_of_zones(centres):
+    data = blobs(3_000, seed=1, centres=centres)
+    assert len(identify_microclimate_zones(data, n_clusters='auto')) == len(centres)
+
+
+def test_k_selection_does_not_depend_on_the_worker_count():
+    from sklearn.preprocessing import StandardScaler
+
+    scaled = StandardScaler().fit_transform(blobs(3_000, seed=2)[FEATURE_COLUMNS].dropna())
+    assert select_n_clusters(scaled, max_workers=1) == select_n_clusters(scaled, max_workers=4) == 3
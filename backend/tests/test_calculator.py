@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from backend.src.ai_pipeline.carbon_modeling.calculator import (
+    calculate_carbon_sequestration_projection,
+    project_carbon_portfolios,
+    projection_to_dict,
+)
+
+SPECIES = ['Oak Tree', 'Maple Tree', 'Pine Tree', 'Elderberry']
+RATES = [22.5, 18.0, 25.0, 3.2]
+PORTFOLIOS = np.array([
+    [50, 75, 30, 0],     # a species not planted
+    [0, 0, 0, 0],        # nothing planted
+    [1, 2, 3, 400],
+    [10, 0, 0, 0],
+])
+# Rows calculate_carbon_sequestration_projection skips: a species the catalog has no rate for
+UNKNOWN_SPECIES = [
+    {'common_name': 'Mystery Shrub', 'carbon_seq_rate_kg_per_year_per_plant': None, 'quantity': 12},
+    {'common_name': 'Unlisted Fern', 'quantity': 4},
+]
+
+
+def selections(quantities):
+    return [
+        {'common_name': name, 'carbon_seq_rate_kg_per_year_per_plant': rate, 'quantity': int(quantity)}
+        for name, rate, quantity in zip(SPECIES, RATES, quantities)
+    ] + UNKNOWN_SPECIES
+
+
+@pytest.mark.parametrize('years', [1, 20])
+def test_each_portfolio_matches_its_own_projection(years):
+    cumulative = project_carbon_portfolios(PORTFOLIOS, RATES, years)
+    assert cumulative.shape == (len(PORTFOLIOS), years)
+    for quantities, row in zip(PORTFOLIOS, cumulative):
+        assert projection_to_dict(row) == calculate_carbon_sequestration_projection(selections(quantities), years)
+
+
+def test_single_portfolio_and_validation():
+    assert np.array_equal(project_carbon_portfolios(PORTFOLIOS[0], RATES, 5), project_carbon_portfolios(PORTFOLIOS[:1], RATES, 5))
+    with pytest.raises(ValueError):
+        project_carbon_portfolios(PORTFOLIOS[:, :3], RATES, 5)
+    with pytest.raises(ValueError):
+        project_carbon_portfolios([[-1, 0, 0, 0]], RATES, 5)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.src.ai_pipeline.data_processing.climatology import (
+    ANNUAL,
+    DAYS_IN_MONTH,
+    ClimatologyStore,
+    build_climatology,
+)
+
+OBSERVATIONS = pd.DataFrame([
+    # One 1-degree cell: two January days and one February day
+    (10.2, 20.3, '2020-01-05', 10.0, 50.0, 2.0),
+    (10.7, 20.9, '2021-01-17', 20.0, 70.0, 4.0),
+    (10.5, 20.5, '2020-02-10', 5.0, 40.0, 1.0),
+    # A cell just east of the antimeridian (column 0) and one just west of it (column 359)
+    (-30.5, -179.5, '2020-06-01', 15.0, 80.0, 6.0),
+    (-30.5, 179.5, '2020-06-01', 25.0, 60.0, 0.0),
+], columns=['lat', 'lon', 'date', 'temp_c', 'humidity_percent', 'rainfall_mm'])
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / 'observations.csv'
+    OBSERVATIONS.to_csv(path, index=False)
+    # A small chunksize so partial sums from several chunks are merged
+    return build_climatology([str(path)], str(tmp_path / 'store'), resolution_deg=1.0, chunksize=2)
+
+
+def test_monthly_and_annual_normals(store):
+    january, february, annual = (store.lookup([10.5], [20.5], month=month).iloc[0] for month in (1, 2, ANNUAL))
+
+    assert (january['avg_temp_c'], january['avg_humidity_percent']) == (15.0, 60.0)
+    # Mean daily rainfall scaled to a monthly total
+    assert january['total_rainfall_mm'] == pytest.approx(3.0 * DAYS_IN_MONTH[0])
+    assert february['total_rainfall_mm'] == pytest.approx(1.0 * DAYS_IN_MONTH[1], abs=0.01)
+    assert january['n_observations'] == 2 and february['n_observations'] == 1
+
+    # Annual: mean of the monthly means, rainfall scaled from the months on record to 12
+    assert annual['avg_temp_c'] == 10.0 and annual['avg_humidity_percent'] == 50.0
+    assert annual['total_rainfall_mm'] == pytest.approx((3.0 * 31 + 1.0 * 28.25) * 12 / 2, abs=0.01)
+    assert annual['n_observations'] == 3
+
+
+def test_store_round_trips_through_disk(store, tmp_path):
+    reopened = ClimatologyStore.open(str(tmp_path / 'store'))
+    pd.testing.assert_frame_equal(reopened.lookup([10.5, -30.5], [20.5, 179.5]), store.lookup([10.5, -30.5], [20.5, 179.5]))
+
+
+def test_points_without_data(store):
+    result = store.lookup([50.0, 10.5], [50.0, 20.5], month=7)
+    assert result[['avg_temp_c', 'avg_humidity_percent', 'total_rainfall_mm']].isna().all().all()
+    assert list(result['n_observations']) == [0, 0]
+
+
+def test_fill_radius_uses_the_nearest_cell_with_data(store):
+    # One cell north of the data, then two cells north
+    points = ([11.5, 12.5], [20.5, 20.5])
+    assert store.lookup(*points)['avg_temp_c'].isna().all()
+    filled = store.lookup(*points, fill_radius_cells=1)
+    assert filled['avg_temp_c'].iloc[0] == 10.0 and np.isnan(filled['avg_temp_c'].iloc[1])
+    assert store.lookup(*points, fill_radius_cells=2)['avg_temp_c'].tolist() == [10.0, 10.0]
+
+
+def test_longitude_wraps_at_the_antimeridian(store):
+    # 180 and -180 are the same column as -179.5
+    result = store.lookup([-30.5, -30.5], [180.0, -180.0], month=6)
+    assert result['avg_temp_c'].tolist() == [15.0, 15.0]
+
+    # With data only in column 0, a point in column 359 is filled from across the antimeridian
+    east_only = ClimatologyStore(pd.DataFrame({
+        'cell_row': [59], 'cell_col': [0], 'month': [ANNUAL], 'avg_temp_c': [15.0],
+        'avg_humidity_percent': [80.0], 'total_rainfall_mm': [500.0], 'n_observations': [1],
+    }), resolution_deg=1.0)
+    assert np.isnan(east_only.lookup([-30.5], [179.5])['avg_temp_c'].iloc[0])
+    assert east_only.lookup([-30.5], [179.5], fill_radius_cells=1)['avg_temp_c'].iloc[0] == 15.0
@@ -0,0 +1,85 @@
+import asyncio
+import os
+from datetime import date, timedelta
+from typing import Any, Dict
+
+import pytest
+
+from backend.src.ai_pipeline.data_processing import weather_cache
+from backend.src.ai_pipeline.data_processing.data_ingestion import (
+    default_weather_dates,
+    fetch_weather_data,
+    fetch_weather_data_many,
+)
+from backend.src.ai_pipeline.data_processing.request_scheduler import RequestScheduler, WeatherFetchError
+from backend.src.ai_pipeline.data_processing.weather_cache import WeatherCache
+
+
+def hourly_payload(temp: float = 20.0, humidity: float = 50.0, hours: int = 24) -> Dict[str, Any]:
+    return {'hourly': [{'temp': temp, 'humidity': humidity, 'rain': {'1h': 0.5}} for _ in range(hours)]}
+
+
+def fast_scheduler(**kwargs: Any) -> RequestScheduler:
+    kwargs.setdefault('calls_per_minute', 60_000)
+    kwargs.setdefault('backoff_base_s', 0.01)
+    return RequestScheduler(**kwargs)
+
+
+def test_malformed_payload_fails_only_its_point(stub_server):
+    # The second point's body is a JSON list, not an object
+    server = stub_server(lambda n, query: (200, {}, ['not', 'a', 'dict'] if query['lat'] == '41.0' else hourly_payload()))
+    frame = asyncio.run(fetch_weather_data_many(
+        [(40.0, -74.0), (41.0, -74.0)], default_weather_dates(1),
+        use_cache=False, scheduler=fast_scheduler(), base_url=server.base_url
+    ))
+    good, bad = frame.iloc[0], frame.iloc[1]
+    assert good['avg_temp_c'] == 20.0 and good['num_failed_requests'] == 0
+    assert bad['num_failed_requests'] == 1 and bad['avg_temp_c'] != bad['avg_temp_c']  # NaN
+
+
+def test_cached_historical_day_needs_no_api_key_or_network(monkeypatch):
+    monkeypatch.delenv('OPENWEATHERMAP_API_KEY')
+    # Far outside the API's 5-day window, so it could never be fetched again
+    old_day = (date.today() - timedelta(days=30)).isoformat()
+    cache = WeatherCache()
+    summary = {'avg_temp_c': 18.5, 'avg_humidity_percent': 60.0, 'total_rainfall_mm': 2.0, 'num_data_points': 24}
+    assert cache.put_weather(40.0, -74.0, old_day, summary)
+
+    assert fetch_weather_data(40.001, -74.001, old_day, cache=cache) == summary
+    frame = asyncio.run(fetch_weather_data_many([(40.0, -74.0)], [old_day], cache=cache))
+    assert frame.iloc[0]['avg_temp_c'] == 18.5 and frame.iloc[0]['num_failed_requests'] == 0
+
+
+def test_default_weather_cache_is_on_disk(monkeypatch, tmp_path):
+    monkeypatch.delenv('WEATHER_CACHE_PATH', raising=False)
+    monkeypatch.setattr(weather_cache, '_default_cache', None)
+    cache = weather_cache.get_default_weather_cache()
+    try:
+        assert cache.db_path == os.path.join(str(tmp_path / 'cache'), 'weather_cache.sqlite')
+        assert os.path.exists(cache.db_path)
+    finally:
+        cache.close()
+
+    monkeypatch.setenv('WEATHER_CACHE_PATH', 'memory')
+    monkeypatch.setattr(weather_cache, '_default_cache', None)
+    assert weather_cache.get_default_weather_cache().db_path is None
+
+
+def test_fetch_weather_data_retries_then_summarizes(stub_server):
+    server = stub_server(lambda n, query: (503, {}, b'') if n == 1 else (200, {}, hourly_payload(temp=21.0)))
+    weather = fetch_weather_data(
+        40.0, -74.0, default_weather_dates(1)[0],
+        use_cache=False, scheduler=fast_scheduler(), base_url=server.base_url
+    )
+    assert weather['avg_temp_c'] == 21.0 and weather['num_data_points'] == 24
+    assert server.calls == 2
+
+
+@pytest.mark.parametrize('status, body', [(404, {'message': 'not found'}), (200, ['not', 'a', 'dict'])])
+def test_fetch_weather_data_raises_instead_of_returning_empty(stub_server, status, body):
+    server = stub_server(lambda n, query: (status, {}, body))
+    with pytest.raises(WeatherFetchError):
+        fetch_weather_data(
+            40.0, -74.0, default_weather_dates(1)[0],
+            use_cache=False, scheduler=fast_scheduler(), base_url=server.base_url
+        )
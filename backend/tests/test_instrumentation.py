@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from backend.src.ai_pipeline import instrumentation
+from backend.src.ai_pipeline.instrumentation import (
+    CACHE_LOOKUPS,
+    PAYLOAD_SIZE,
+    STAGE_CALLS,
+    STAGE_DURATION,
+    STAGE_ERRORS,
+    InMemoryCollector,
+    MetricsExporter,
+    PrometheusExporter,
+    instrumented,
+    record_cache,
+    record_error,
+    record_payload,
+    set_exporter,
+    stage_timer,
+)
+
+
+@pytest.fixture
+def install():
+    """set_exporter, with the previous exporter restored after the test."""
+    previous = instrumentation.get_exporter()
+    yield lambda exporter: set_exporter(exporter) or exporter
+    set_exporter(previous)
+
+
+@instrumented('test.work')
+def work(n: int) -> int:
+    record_payload('test.work', n, 'rows')
+    if n < 0:
+        raise ValueError("negative")
+    return n
+
+
+@instrumented('test.async_work')
+async def async_work() -> str:
+    return 'done'
+
+
+def test_exporter_interface_is_abstract():
+    with pytest.raises(TypeError):
+        MetricsExporter()
+
+    class CountsOnly(MetricsExporter):
+        def increment(self, name, labels, value=1.0):
+            pass
+
+    with pytest.raises(TypeError):
+        CountsOnly()
+
+
+def test_disabled_instrumentation_records_nothing(install):
+    install(None)
+    assert work(3) == 3
+    with stage_timer('test.block'):
+        pass
+    record_cache('test', hit=True)
+    assert instrumentation.get_exporter() is None
+
+
+def test_collector_records_stage_calls_and_durations(install):
+    collector = install(InMemoryCollector())
+    work(3)
+    work(4)
+    assert asyncio.run(async_work()) == 'done'
+    with stage_timer('test.block'):
+        pass
+
+    assert collector.stages() == ['test.async_work', 'test.block', 'test.work']
+    assert collector.counter(STAGE_CALLS, stage='test.work') == 2
+    durations = collector.observations(STAGE_DURATION, stage='test.work')
+    assert len(durations) == 2 and all(d >= 0 for d in durations)
+    assert collector.observations(PAYLOAD_SIZE, stage='test.work', unit='rows') == [3, 4]
+
+
+def test_collector_counts_errors(install):
+    collector = install(InMemoryCollector())
+    with pytest.raises(ValueError):
+        work(-1)
+    record_error('test.work', 'missing_columns')
+    record_error('test.work', 'missing_columns')
+
+    assert collector.counter(STAGE_CALLS, stage='test.work') == 1
+    assert collector.counter(STAGE_ERRORS, stage='test.work', error='ValueError') == 1
+    assert collector.counter(STAGE_ERRORS, stage='test.work', error='missing_columns') == 2
+    assert collector.counter(STAGE_ERRORS, stage='test.work') == 3
+
+
+def test_collector_counts_cache_hits_and_misses(install):
+    collector = install(InMemoryCollector())
+    for hit in (True, True, False):
+        record_cache('weather_cache', hit=hit)
+    record_cache('llm_cache', hit=False)
+
+    assert collector.counter(CACHE_LOOKUPS, cache='weather_cache', result='hit') == 2
+    assert collector.counter(CACHE_LOOKUPS, cache='weather_cache', result='miss') == 1
+    assert collector.counter(CACHE_LOOKUPS, result='miss') == 2
+    collector.clear()
+    assert collector.events == []
+
+
+def test_prometheus_render(install):
+    exporter = install(PrometheusExporter(buckets={STAGE_DURATION: (0.1, 1.0)}))
+    exporter.observe(STAGE_DURATION, (('stage', 'zoning'),), 0.05)
+    exporter.observe(STAGE_DURATION, (('stage', 'zoning'),), 0.5)
+    exporter.observe(STAGE_DURATION, (('stage', 'zoning'),), 2.0)
+    record_cache('weather_cache', hit=True)
+    record_error('weather.fetch', 'http_503')
+    record_error('weather.fetch', 'http_503')
+
+    lines = exporter.render().splitlines()
+    assert '# TYPE pipeline_cache_lookups_total counter' in lines
+    assert 'pipeline_cache_lookups_total{cache="weather_cache",result="hit"} 1' in lines
+    assert 'pipeline_stage_errors_total{error="http_503",stage="weather.fetch"} 2' in lines
+    assert '# TYPE pipeline_stage_duration_seconds histogram' in lines
+    # Buckets are cumulative and end with +Inf
+    assert 'pipeline_stage_duration_seconds_bucket{stage="zoning",le="0.1"} 1' in lines
+    assert 'pipeline_stage_duration_seconds_bucket{stage="zoning",le="1"} 2' in lines
+    assert 'pipeline_stage_duration_seconds_bucket{stage="zoning",le="+Inf"} 3' in lines
+    assert 'pipeline_stage_duration_seconds_sum{stage="zoning"} 2.55' in lines
+    assert 'pipeline_stage_duration_seconds_count{stage="zoning"} 3' in lines
+    assert exporter.histogram_summary(STAGE_DURATION, stage='zoning')['count'] == 3
+
+
+def test_prometheus_escapes_label_values():
+    exporter = PrometheusExporter()
+    exporter.increment(STAGE_ERRORS, (('error', 'bad "quote"\\n'), ('stage', 's')))
+    assert 'pipeline_stage_errors_total{error="bad \\"quote\\"\\\\n",stage="s"} 1' in exporter.render()
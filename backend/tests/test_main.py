@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src import main
+
+PLAN = {'latitude': 40.7128, 'longitude': -74.006, 'grid_size': 2}
+
+
+class UnloadableRecommender:
+    async def get_catalog(self):
+        raise TypeError("object APIResponse can't be used in 'await' expression")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for variable in ('SUPABASE_URL', 'SUPABASE_SERVICE_ROLE_KEY'):
+        monkeypatch.delenv(variable, raising=False)
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def test_api_starts_without_a_plant_database(client):
+    assert client.app.state.recommender is None
+    response = client.post('/plan', json=PLAN)
+    assert response.status_code == 503
+    assert 'SUPABASE_URL' in response.json()['detail']
+
+
+def test_plan_fails_when_the_catalog_cannot_load(client):
+    client.app.state.recommender = UnloadableRecommender()
+    response = client.post('/plan', json=PLAN)
+    assert response.status_code == 503
+    assert 'plant catalog could not be loaded' in response.json()['detail']
+
+
+def test_request_hash_covers_the_resolved_dates():
+    request = main.PlanRequest(**PLAN)
+    assert main._request_hash(request, ['2026-10-15']) != main._request_hash(request, ['2026-10-16'])
+    assert main._request_hash(request, ['2026-10-15']) == main._request_hash(main.PlanRequest(**PLAN), ['2026-10-15'])
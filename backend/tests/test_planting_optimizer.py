@@ -0,0 +1,35 @@
+import pytest
+
+from backend.src.ai_pipeline.carbon_modeling.planting_optimizer import optimize_planting_mix
+
+
+def plant(name: str, **fields):
+    return {'common_name': name, 'carbon_seq_rate_kg_per_year_per_plant': 10.0, 'footprint_m2': 4.0, 'cost': 5.0, **fields}
+
+
+@pytest.mark.parametrize('fields', [
+    {'footprint_m2': 'big'},
+    {'cost': 'cheap'},
+    {'carbon_seq_rate_kg_per_year_per_plant': 'lots'},
+    {'footprint_m2': -1.0},
+    {'maturity_steepness': 'fast'},
+    {'maturity_midpoint_years': [5]},
+    {'annual_mortality_rate': 1.5},
+])
+def test_species_with_invalid_values_are_skipped(fields, capsys):
+    result = optimize_planting_mix([plant('oak'), plant('bad', **fields)], site_area_m2=40.0, max_nodes=10_000)
+    assert [selection['common_name'] for selection in result['selections']] == ['oak']
+    assert 'Skipping plant' in capsys.readouterr().out
+
+
+def test_null_growth_fields_take_the_defaults():
+    with_nulls = plant('oak', maturity_steepness=None, annual_mortality_rate=None, maturity_midpoint_years=None)
+    result = optimize_planting_mix([with_nulls], site_area_m2=40.0, max_nodes=10_000)
+    expected = optimize_planting_mix([plant('oak')], site_area_m2=40.0, max_nodes=10_000)
+    assert result['selections'][0]['quantity'] == 10
+    assert result['total_carbon_kg_over_years'] == expected['total_carbon_kg_over_years']
+
+
+def test_numeric_strings_are_accepted():
+    result = optimize_planting_mix([plant('oak', footprint_m2='4', cost='5')], site_area_m2=40.0, budget=25.0, max_nodes=10_000)
+    assert result['selections'][0]['quantity'] == 5
@@ -0,0 +1,76 @@
+import pytest
+
+from backend.src.ai_pipeline.langchain_integration.query_router import QueryRouter, StructuredQueryParser
+
+
+@pytest.fixture(scope='module')
+def router() -> QueryRouter:
+    return QueryRouter(agent=None, tool=None, parser=StructuredQueryParser())
+
+
+def test_fully_specified_query_is_routed_directly(router):
+    route, reason, parsed = router.route(
+        "I need plants for a hot-humid-tropical microclimate, loamy soil, and pH 6.0. I want them to be low-water."
+    )
+    assert (route, reason) == ('direct', 'fully_specified')
+    assert parsed['microclimate_category'] == 'hot-humid-tropical'
+    assert parsed['soil_type'] == 'loamy' and parsed['ph_level'] == 6.0
+    assert parsed['user_goals'] == ['low-water']
+
+
+@pytest.mark.parametrize('query, reason', [
+    ("What are some good plants for carbon sequestration in a temperate-humid region with clay soil?", 'missing_ph_level'),
+    ("Tell me a joke about a tree.", 'missing_microclimate_category'),
+    ("What is the capital of France?", 'no_plant_intent'),
+    ("Recommend plants for a temperate-humid site with loamy or clay soil, pH 6.5", 'multiple_soil_type'),
+    ("Recommend plants for a temperate-humid site with loamy soil, pH 6.5 or maybe pH 7.5", 'multiple_ph_level'),
+])
+def test_underspecified_queries_fall_through(router, query, reason):
+    assert router.route(query)[:2] == ('agent', reason)
+
+
+@pytest.mark.parametrize('query', [
+    "I don't want clay soil; recommend plants for a hot-humid-tropical site, pH 6.0",
+    "I do not want any clay soil. Recommend plants for a hot-humid-tropical site, pH 6.0",
+    "I never have luck with clay soil. Recommend plants for a hot-humid-tropical site, pH 6.0",
+    "Recommend plants for a hot-humid-tropical site with loamy soil instead of clay, pH 6.0",
+    "Recommend plants for a hot-humid-tropical site, pH 6.0, rather than clay soil",
+    "Recommend plants for a hot-humid-tropical site, pH 6.0 — I don’t want clay soil",
+])
+def test_negated_soil_falls_through(router, query):
+    route, reason, parsed = router.route(query)
+    assert (route, reason) == ('agent', 'negated_soil_type')
+    assert parsed['soil_type'] is None
+
+
+def test_negation_ends_with_its_clause(router):
+    route, _, parsed = router.route(
+        "No idea about soil chemistry, but recommend plants for a hot-humid-tropical site with clay soil, pH 6.0"
+    )
+    assert route == 'direct' and parsed['soil_type'] == 'clay'
+
+
+def test_negated_goal_is_dropped(router):
+    parsed = router.route(
+        "Recommend plants for a temperate-humid site, loamy soil, pH 6.5, pollinator-friendly but not evergreen"
+    )[2]
+    assert parsed['user_goals'] == ['pollinator-friendly']
+
+
+@pytest.mark.parametrize('query', [
+    "Recommend plants for a hot-humid-tropical site with loamy soil, pH 6-7",
+    "Recommend plants for a hot-humid-tropical site with loamy soil, pH 6.0 to 7.5",
+    "Recommend plants for a hot-humid-tropical site with loamy soil, pH 6.0–7.5",
+    "Recommend plants for a hot-humid-tropical site with loamy soil, pH between 6 and 7",
+    "Recommend plants for a hot-humid-tropical site with loamy soil, pH range 5.5 - 6.5",
+])
+def test_ph_range_falls_through(router, query):
+    route, reason, parsed = router.route(query)
+    assert (route, reason) == ('agent', 'ph_level_range')
+    assert parsed['ph_level'] is None
+
+
+def test_decimal_ph_does_not_split_clauses(router):
+    route, _, parsed = router.route("Recommend plants for a temperate-humid site with no shade, loamy soil, pH 6.5")
+    assert route == 'direct' and parsed['ph_level'] == 6.5
+    assert parsed['user_goals'] == []
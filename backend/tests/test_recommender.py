@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+from backend.benchmarks.fakes import InMemorySupabase
+from backend.src.ai_pipeline.plant_selection.recommender import PlantRecommender
+
+OAK = {
+    'common_name': 'Oak',
+    'ideal_microclimate_tags': ['temperate-humid'],
+    'ideal_soil_type': 'loamy',
+    'ph_level_min': 5.5,
+    'ph_level_max': 7.5,
+    'biodiversity_benefit': 'Supports pollinators',
+    'carbon_seq_rate_kg_per_year_per_plant': 20.0,
+}
+
+
+class SyncSupabase:
+    """
+    Mimics supabase's sync Client (what create_client returns): execute() blocks and returns the response.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.execute_threads = []
+
+    def table(self, name):
+        return self
+
+    def select(self, *columns):
+        return self
+
+    def execute(self):
+        self.execute_threads.append(threading.current_thread())
+        return type('Response', (), {'data': [dict(row) for row in self.rows]})()
+
+
+def test_catalog_loads_through_a_sync_client():
+    supabase = SyncSupabase([OAK])
+    recommender = PlantRecommender(supabase_client=supabase)
+
+    async def run():
+        recommended = await recommender.recommend_plants('temperate-humid', 'loamy', 6.5)
+        return recommended, await recommender.get_all_plant_species()
+
+    recommended, species = asyncio.run(run())
+    assert [plant['common_name'] for plant in recommended] == ['Oak']
+    assert species == [OAK]
+    # The blocking call ran off the event loop's thread
+    assert threading.main_thread() not in supabase.execute_threads
+
+
+def test_catalog_loads_through_an_async_client():
+    recommender = PlantRecommender(supabase_client=InMemorySupabase({'plant_species': [OAK]}))
+    recommended = asyncio.run(recommender.recommend_plants('temperate-humid', 'loamy', 6.5))
+    assert [plant['common_name'] for plant in recommended] == ['Oak']
@@ -0,0 +1,82 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from backend.src.ai_pipeline.data_processing.request_scheduler import RequestScheduler, TokenBucket, WeatherFetchError
+
+PATH = '/data/2.5/onecall/timemachine'
+BODY = {'hourly': [{'temp': 20.0, 'humidity': 50}]}
+
+
+def flaky(call_number, query):
+    """Throttles every third call and fails every fifth."""
+    if call_number % 3 == 0:
+        return 429, {'Retry-After': '0.05'}, b''
+    if call_number % 5 == 0:
+        return 503, {}, b''
+    return 200, {}, BODY
+
+
+def scheduler(**kwargs) -> RequestScheduler:
+    kwargs.setdefault('calls_per_minute', 60_000)
+    kwargs.setdefault('backoff_base_s', 0.01)
+    return RequestScheduler(rng=random.Random(0), **kwargs)
+
+
+def test_retries_throttles_and_coalesces_against_stub(stub_server):
+    server = stub_server(flaky)
+    requests = scheduler(burst=5)
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            # 20 distinct requests plus 20 identical ones issued alongside them
+            params = [{'lat': 40 + i / 100, 'lon': -74} for i in range(20)] * 2
+            return await asyncio.gather(*(requests.get_json(client, server.base_url + PATH, p) for p in params))
+
+    results = asyncio.run(run())
+    stats = requests.stats()
+    assert results == [BODY] * 40
+    assert stats['requests'] == 40 and stats['coalesced'] == 20
+    assert stats['upstream_calls'] == server.calls == 20 + stats['retries']
+    assert stats['throttled'] > 0 and stats['failures'] == 0
+    assert stats['max_queue_depth'] > 0 and stats['queue_depth'] == 0 and stats['in_flight'] == 0
+
+
+def test_gives_up_after_max_retries(stub_server):
+    server = stub_server(lambda n, query: (503, {}, b''))
+    requests = scheduler(max_retries=2)
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await requests.get_json(client, server.base_url + PATH, {'lat': 1})
+
+    with pytest.raises(WeatherFetchError) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 503 and error.value.attempts == 3
+    assert server.calls == 3 and requests.stats()['failures'] == 1
+
+
+def test_non_retryable_status_fails_at_once(stub_server):
+    server = stub_server(lambda n, query: (401, {}, {'message': 'bad key'}))
+    requests = scheduler()
+    with httpx.Client() as client, pytest.raises(WeatherFetchError) as error:
+        requests.get_json_blocking(client, server.base_url + PATH, {'lat': 1})
+    assert error.value.status_code == 401 and server.calls == 1
+
+
+def test_blocking_path_retries_like_the_async_one(stub_server):
+    server = stub_server(flaky)
+    requests = scheduler()
+    with httpx.Client() as client:
+        results = [requests.get_json_blocking(client, server.base_url + PATH, {'lat': i}) for i in range(6)]
+    assert results == [BODY] * 6
+    assert requests.stats()['retries'] == server.calls - 6 > 0
+
+
+def test_token_bucket_paces_after_the_burst():
+    bucket = TokenBucket(rate=10, capacity=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01) and waits[3] == pytest.approx(0.2, abs=0.01)
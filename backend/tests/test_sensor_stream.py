@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.src.ai_pipeline.data_processing.sensor_stream import METRICS, SensorStreamAggregator
+
+WINDOW_S = 600.0
+BUFFER_SIZE = 8
+
+
+class BruteForce:
+    """
+    Keeps every accepted reading and recomputes the window from scratch on each query.
+    """
+
+    def __init__(self):
+        self.readings = {}
+
+    def push(self, station_id, timestamp, values):
+        history = self.readings.setdefault(station_id, [])
+        if history and timestamp < history[-1][0]:
+            return False
+        history.append((timestamp, values))
+        return True
+
+    def window(self, station_id, now):
+        # The newest BUFFER_SIZE readings, minus those that have aged out of the time window
+        return [values for timestamp, values in self.readings[station_id][-BUFFER_SIZE:] if timestamp > now - WINDOW_S]
+
+    def stats(self, station_id, now):
+        window = self.window(station_id, now)
+        result = {'num_readings': len(window)}
+        for metric, name in enumerate(METRICS):
+            present = [values[metric] for values in window if values[metric] is not None]
+            result[name] = {
+                'count': len(present),
+                'sum': sum(present),
+                'mean': sum(present) / len(present) if present else None,
+                'min': min(present) if present else None,
+                'max': max(present) if present else None,
+            }
+        return result
+
+
+def random_reading(rng):
+    # Some metrics missing (None), to check they are skipped rather than counted
+    return tuple(
+        None if rng.random() < 0.2 else round(float(rng.normal(centre, spread)), 3)
+        for centre, spread in ((18.0, 5.0), (60.0, 10.0), (0.3, 0.2))
+    )
+
+
+def assert_matches(actual, expected):
+    assert actual['num_readings'] == expected['num_readings']
+    for name in METRICS:
+        for field in ('count', 'min', 'max'):
+            assert actual[name][field] == expected[name][field], (name, field)
+        assert actual[name]['sum'] == pytest.approx(expected[name]['sum'], abs=1e-9)
+        if expected[name]['mean'] is None:
+            assert actual[name]['mean'] is None
+        else:
+            assert actual[name]['mean'] == pytest.approx(expected[name]['mean'])
+
+
+def test_matches_a_brute_force_window():
+    rng = np.random.default_rng(0)
+    stream = SensorStreamAggregator(window_s=WINDOW_S, buffer_size=BUFFER_SIZE, resync_every=5)
+    reference = BruteForce()
+    stations = ['a', 'b', 'c']
+    clock = {station: 0.0 for station in stations}
+    late = 0
+    now = 0.0
+
+    for step in range(3_000):
+        station = stations[rng.integers(len(stations))]
+        if rng.random() < 0.05:
+            # A reading older than the station's latest: dropped
+            timestamp = clock[station] - float(rng.uniform(1, 100))
+            late += 1
+        else:
+            # Gaps from a few seconds (the buffer fills first) to longer than the window (all expire)
+            clock[station] += float(rng.choice([5.0, 60.0, 200.0, 900.0], p=[0.4, 0.3, 0.25, 0.05]))
+            timestamp = clock[station]
+        values = random_reading(rng)
+        accepted = stream.push(station, *values, timestamp=timestamp)
+        assert accepted == reference.push(station, timestamp, values)
+
+        if step % 7 == 0:
+            # Queries expire readings in place, so like real time they never go backwards
+            now = max(now, max(clock.values()) + float(rng.uniform(0, 300)))
+            for station_id in stations:
+                if station_id in reference.readings:
+                    assert_matches(stream.stats(station_id, now=now), reference.stats(station_id, now))
+
+    assert stream.late_readings == late
+    assert stream.readings == sum(len(history) for history in reference.readings.values())
+
+
+def test_feature_frame_matches_the_window():
+    stream = SensorStreamAggregator(window_s=WINDOW_S, buffer_size=BUFFER_SIZE)
+    stream.register_station('a', 40.7, -74.0)
+    for i in range(12):
+        stream.push('a', 10.0 + i, None if i % 3 == 0 else 50.0, 0.5, timestamp=100.0 * i)
+    stream.push('b', 20.0, 60.0, None, timestamp=0.0)
+
+    now = 1_150.0
+    frame = stream.feature_frame(['a', 'b', 'unknown'], now=now).set_index('station_id')
+    # 'a': the last 8 readings are i=4..11, of which i=6..11 are newer than now - 600
+    temps = [10.0 + i for i in range(6, 12)]
+    assert frame.loc['a', 'num_data_points'] == 6
+    assert frame.loc['a', 'avg_temp_c'] == round(sum(temps) / len(temps), 2)
+    assert frame.loc['a', 'avg_humidity_percent'] == 50.0
+    assert frame.loc['a', 'total_rainfall_mm'] == 3.0
+    assert (frame.loc['a', 'lat'], frame.loc['a', 'lon']) == (40.7, -74.0)
+    # 'b' has aged out entirely; 'unknown' never reported
+    assert frame.loc['b', 'num_data_points'] == 0 and math.isnan(frame.loc['b', 'avg_temp_c'])
+    assert frame.loc['unknown', 'num_data_points'] == 0
+    assert stream.feature_row('a', now=now) == {
+        'avg_temp_c': frame.loc['a', 'avg_temp_c'], 'avg_humidity_percent': 50.0,
+        'total_rainfall_mm': 3.0, 'num_data_points': 6,
+    }
@@ -0,0 +1,58 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from shapely.geometry import Polygon
+
+from backend.src.ai_pipeline.geospatial import site_analysis
+from backend.src.ai_pipeline.geospatial.site_analysis import analyze_site, generate_sample_grid
+
+# ~500 m x 450 m parcel in New York City
+SITE = Polygon([(-74.006, 40.710), (-74.000, 40.710), (-74.000, 40.714), (-74.006, 40.714), (-74.006, 40.710)])
+RESOLUTION_M = 50.0
+SPLIT_LON = -74.003
+
+
+async def stub_weather(points, dates, client=None, dedup_index=None, **kwargs):
+    """
+    West of SPLIT_LON is hot and dry, east of it cool and wet, so there are two clear zones.
+    """
+    rows = []
+    for lat, lon in points:
+        west = lon < SPLIT_LON
+        rows.append({
+            'lat': lat, 'lon': lon,
+            'avg_temp_c': 30.0 if west else 12.0,
+            'avg_humidity_percent': 30.0 if west else 75.0,
+            'total_rainfall_mm': 50.0 if west else 800.0,
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def zones(monkeypatch):
+    monkeypatch.setattr(site_analysis, 'fetch_weather_data_many', stub_weather)
+    return asyncio.run(analyze_site(SITE, resolution_m=RESOLUTION_M, dates=['2024-01-01'], n_clusters=2, tile_cells=3))
+
+
+def test_zone_areas_add_up_to_the_grid(zones):
+    n_cells = sum(len(tile) for tile in generate_sample_grid(SITE, RESOLUTION_M, tile_cells=3))
+    assert len(zones) == 2
+    assert zones['count'].sum() == n_cells
+    # Measured in the metric grid CRS, before the result was reprojected
+    assert zones['area_m2'].sum() == pytest.approx(n_cells * RESOLUTION_M ** 2, rel=1e-6)
+    for _, zone in zones.iterrows():
+        assert zone['area_m2'] == pytest.approx(zone['count'] * RESOLUTION_M ** 2, rel=1e-6)
+
+
+def test_zones_are_returned_in_wgs84(zones):
+    assert zones.crs.to_epsg() == 4326
+    minx, miny, maxx, maxy = zones.total_bounds
+    site_minx, site_miny, site_maxx, site_maxy = SITE.bounds
+    # Cells may poke out of the polygon by up to half a cell (~0.0006 degrees here)
+    assert site_minx - 1e-3 < minx < maxx < site_maxx + 1e-3
+    assert site_miny - 1e-3 < miny < maxy < site_maxy + 1e-3
+    categories = set(zones['representative_category'])
+    assert categories == {'hot-dry-desert', 'cool-temperate'}
+    hot = zones[zones['representative_category'] == 'hot-dry-desert'].geometry.iloc[0]
+    assert hot.centroid.x < SPLIT_LON
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+
+from backend.src.ai_pipeline.data_processing import data_ingestion, soil_raster
+from backend.src.ai_pipeline.data_processing.soil_raster import SoilRaster, build_synthetic_soil_raster
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'data', 'fixtures', 'soil_raster')
+
+
+@pytest.fixture(scope='module')
+def raster() -> SoilRaster:
+    return SoilRaster.open(FIXTURE_DIR)
+
+
+def test_fixture_is_memory_mapped(raster):
+    assert raster.shape == (36, 72)
+    assert isinstance(raster.soil_class, np.memmap)
+
+
+def test_fixture_matches_the_synthetic_builder(raster, tmp_path):
+    rebuilt = build_synthetic_soil_raster(str(tmp_path / 'raster'))
+    np.testing.assert_array_equal(rebuilt.soil_class, raster.soil_class)
+    np.testing.assert_array_equal(rebuilt.ph, raster.ph)
+
+
+def test_query_reads_the_cell_under_each_point(raster):
+    lats = np.array([40.7128, -33.8688, 0.0, 84.0])
+    lons = np.array([-74.0060, 151.2093, 0.0, 10.0])
+    frame = raster.query(lats, lons)
+
+    rows = np.floor((90 - lats) / 5).astype(int)
+    cols = np.floor((lons + 180) / 5).astype(int)
+    assert list(frame['soil_type']) == [raster.soil_types[c] for c in raster.soil_class[rows, cols]]
+    np.testing.assert_array_equal(frame['ph_level'].to_numpy(), raster.ph[rows, cols])
+    assert list(frame['texture']) == [raster.textures[c] for c in raster.texture[rows, cols]]
+    # Polar rows are nodata in the fixture
+    assert frame['soil_type'].iloc[3] == 'unknown' and np.isnan(frame['ph_level'].iloc[3])
+
+
+def test_edge_points_belong_to_the_last_row_and_column(raster):
+    frame = raster.query([-90.0, 40.0, 40.0, 90.0], [0.0, 180.0, 179.99, -180.0])
+    codes = raster.query_codes([-90.0, 40.0], [0.0, 180.0])
+    assert codes['soil_class'][0] == raster.soil_class[-1, 36]
+    assert codes['soil_class'][1] == raster.soil_class[10, -1] != 0
+    assert frame['soil_type'].iloc[1] == frame['soil_type'].iloc[2]
+    assert frame['ph_level'].iloc[1] == raster.ph[10, -1]
+
+
+def test_points_outside_the_raster_are_unknown(raster):
+    frame = raster.query([91.0, 0.0, np.nan], [0.0, -181.0, 0.0])
+    assert (frame['soil_type'] == 'unknown').all() and frame['ph_level'].isna().all()
+
+
+def test_bulk_lookup_without_a_raster_reports_unknown(monkeypatch):
+    monkeypatch.setattr(soil_raster, '_default_raster', None)
+    monkeypatch.setattr(soil_raster, '_default_raster_loaded', True)
+    frame = data_ingestion.get_soil_properties_bulk([40.0, 41.0], [-74.0, -73.0])
+    assert list(frame.columns) == ['soil_type', 'ph_level', 'texture']
+    assert (frame['soil_type'] == 'unknown').all() and frame['ph_level'].isna().all()
+    assert data_ingestion.get_soil_type_from_coords(40.0, -74.0)['soil_type'] == 'unknown'
+
+
+def test_bulk_lookup_uses_the_given_raster(raster):
+    frame = data_ingestion.get_soil_properties_bulk([40.7128], [-74.0060], raster=raster)
+    assert frame.iloc[0]['soil_type'] == raster.lookup(40.7128, -74.0060)['soil_type']
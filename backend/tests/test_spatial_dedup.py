@@ -0,0 +1,105 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from backend.src.ai_pipeline.data_processing.spatial_dedup import IngestionDedupIndex
+
+PAST_DAY = '2024-01-01'
+SUMMARY = {'avg_temp_c': 20.0, 'avg_humidity_percent': 55.0, 'total_rainfall_mm': 1.2, 'num_data_points': 24}
+
+
+class CountingFetcher:
+    def __init__(self, fail_first: int = 0, delay_s: float = 0.01):
+        self.calls = []
+        self.fail_first = fail_first
+        self.delay_s = delay_s
+
+    async def __call__(self, lat, lon, day):
+        self.calls.append((lat, lon, day))
+        await asyncio.sleep(self.delay_s)
+        if len(self.calls) <= self.fail_first:
+            raise RuntimeError("upstream error")
+        return dict(SUMMARY)
+
+
+def test_concurrent_requests_in_one_cell_share_a_fetch():
+    index, fetcher = IngestionDedupIndex(cell_deg=0.01), CountingFetcher()
+
+    async def run():
+        nearby = [(40.7101, -74.0001), (40.7102, -74.0002), (40.7109, -74.0009)]
+        return await asyncio.gather(*(index.fetch(lat, lon, PAST_DAY, fetcher) for lat, lon in nearby))
+
+    results = asyncio.run(run())
+    assert results == [SUMMARY] * 3
+    assert len(fetcher.calls) == 1
+    stats = index.stats()
+    assert (stats['requests'], stats['upstream_fetches'], stats['api_calls_saved']) == (3, 1, 2)
+    assert stats['dedup_ratio'] == pytest.approx(2 / 3)
+
+
+def test_other_cells_and_dates_fetch_separately():
+    index, fetcher = IngestionDedupIndex(cell_deg=0.01), CountingFetcher()
+
+    async def run():
+        await index.fetch(40.7101, -74.0001, PAST_DAY, fetcher)
+        await index.fetch(40.7201, -74.0001, PAST_DAY, fetcher)
+        await index.fetch(40.7101, -74.0001, '2024-01-02', fetcher)
+        await index.fetch(40.7105, -74.0005, PAST_DAY, fetcher)
+
+    asyncio.run(run())
+    assert len(fetcher.calls) == 3
+    assert index.stats()['dedup_ratio'] == 0.25
+
+
+def test_failed_fetch_is_retried_by_the_next_request():
+    index, fetcher = IngestionDedupIndex(), CountingFetcher(fail_first=1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await index.fetch(40.71, -74.0, PAST_DAY, fetcher)
+        return await index.fetch(40.71, -74.0, PAST_DAY, fetcher)
+
+    assert asyncio.run(run()) == SUMMARY
+    assert len(fetcher.calls) == 2
+    assert index.stats()['indexed_entries'] == 1
+
+
+def test_todays_summary_is_shared_only_while_in_flight():
+    index, fetcher = IngestionDedupIndex(), CountingFetcher()
+    today = date.today().isoformat()
+
+    async def run():
+        await asyncio.gather(index.fetch(40.71, -74.0, today, fetcher), index.fetch(40.71, -74.0, today, fetcher))
+        # Completed: the day is still accumulating hours, so a later request fetches again
+        await index.fetch(40.71, -74.0, today, fetcher)
+        await index.fetch(40.71, -74.0, (date.today() - timedelta(days=1)).isoformat(), fetcher)
+
+    asyncio.run(run())
+    assert len(fetcher.calls) == 3
+    assert index.stats()['indexed_entries'] == 1
+
+
+def test_completed_entries_expire_after_max_age():
+    index, fetcher = IngestionDedupIndex(max_age_seconds=0.05), CountingFetcher(delay_s=0)
+
+    async def run():
+        await index.fetch(40.71, -74.0, PAST_DAY, fetcher)
+        await index.fetch(40.71, -74.0, PAST_DAY, fetcher)
+        await asyncio.sleep(0.1)
+        await index.fetch(40.71, -74.0, PAST_DAY, fetcher)
+
+    asyncio.run(run())
+    assert len(fetcher.calls) == 2
+
+
+def test_radius_mode_shares_within_the_radius_only():
+    index, fetcher = IngestionDedupIndex(radius_km=1.0), CountingFetcher()
+
+    async def run():
+        await index.fetch(40.7100, -74.0, PAST_DAY, fetcher)
+        await index.fetch(40.7150, -74.0, PAST_DAY, fetcher)  # ~0.56 km north: shared
+        await index.fetch(40.7300, -74.0, PAST_DAY, fetcher)  # ~2.2 km north: fetched
+
+    asyncio.run(run())
+    assert len(fetcher.calls) == 2
@@ -0,0 +1,67 @@
+import asyncio
+import os
+
+from backend.benchmarks.fakes import InMemorySupabase
+from backend.src.ai_pipeline.caching import llm_cache
+from backend.src.ai_pipeline.langchain_integration import tool_cache
+from backend.src.ai_pipeline.langchain_integration.chain_builder import PlantRecommenderTool
+from backend.src.ai_pipeline.langchain_integration.tool_cache import ToolResultCache
+from backend.src.ai_pipeline.plant_selection.plant_catalog import PlantCatalog
+from backend.src.ai_pipeline.plant_selection.recommender import PlantRecommender
+
+
+def plant(name: str, rate: float) -> dict:
+    return {
+        'common_name': name,
+        'ideal_microclimate_tags': ['temperate-humid'],
+        'ideal_soil_type': 'loamy',
+        'ph_level_min': 5.5,
+        'ph_level_max': 7.5,
+        'biodiversity_benefit': 'Supports pollinators',
+        'carbon_seq_rate_kg_per_year_per_plant': rate,
+    }
+
+
+def test_catalog_version_follows_contents():
+    rows = [plant('Oak', 20.0), plant('Maple', 15.0)]
+    assert PlantCatalog(rows).version == PlantCatalog(list(reversed(rows))).version
+    assert PlantCatalog(rows).version != PlantCatalog(rows + [plant('Birch', 5.0)]).version
+
+
+def test_cached_result_does_not_outlive_its_catalog():
+    table = [plant('Oak', 20.0)]
+    supabase = InMemorySupabase({'plant_species': table})
+    recommender = PlantRecommender(catalog_ttl_seconds=None, supabase_client=supabase)
+    cache = ToolResultCache()
+    tool = PlantRecommenderTool(recommender=recommender, result_cache=cache)
+    criteria = {'microclimate_category': 'temperate-humid', 'soil_type': 'loamy', 'ph_level': 6.5}
+
+    async def run():
+        first = await tool._arun(**criteria)
+        repeat = await tool._arun(**criteria)
+        table.append(plant('Maple', 30.0))
+        await recommender.refresh_catalog()
+        after_refresh = await tool._arun(**criteria)
+        return first, repeat, after_refresh
+
+    first, repeat, after_refresh = asyncio.run(run())
+    assert first == repeat == "Recommended plants: Oak"
+    assert cache.memory_hits == 1
+    assert after_refresh == "Recommended plants: Maple, Oak"
+
+
+def test_default_agent_caches_are_on_disk(monkeypatch, tmp_path):
+    for variable in ('LLM_CACHE_PATH', 'TOOL_CACHE_PATH'):
+        monkeypatch.delenv(variable, raising=False)
+    monkeypatch.setattr(llm_cache, '_default_cache', None)
+    monkeypatch.setattr(tool_cache, '_default_cache', None)
+
+    stores = [llm_cache.get_default_llm_cache().store, tool_cache.get_default_tool_cache()]
+    try:
+        assert [store.db_path for store in stores] == [
+            os.path.join(str(tmp_path / 'cache'), 'llm_cache.sqlite'),
+            os.path.join(str(tmp_path / 'cache'), 'tool_cache.sqlite'),
+        ]
+    finally:
+        for store in stores:
+            store.close()
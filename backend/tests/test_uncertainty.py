@@ -0,0 +1,39 @@
+from backend.src.ai_pipeline.carbon_modeling.uncertainty import simulate_carbon_sequestration_uncertainty
+
+SELECTIONS = [
+    {'common_name': 'Oak Tree', 'carbon_seq_rate_kg_per_year_per_plant': 22.5, 'quantity': 50,
+     'maturity_midpoint_years': 8, 'maturity_steepness': 0.6, 'annual_mortality_rate': 0.01},
+    {'common_name': 'Maple Tree', 'carbon_seq_rate_kg_per_year_per_plant': 18.0, 'quantity': 75,
+     'maturity_midpoint_years': 6, 'annual_mortality_rate': 0.02},
+    {'common_name': 'Pine Tree', 'carbon_seq_rate_kg_per_year_per_plant': 25.0, 'quantity': 30},
+]
+
+
+def simulate(selections=SELECTIONS, **kwargs):
+    return simulate_carbon_sequestration_uncertainty(selections, years=10, n_simulations=4_000, batch_size=1_000, seed=7, **kwargs)
+
+
+def test_fixed_seed_gives_the_same_bands_for_any_worker_count():
+    in_process = simulate(max_workers=1)
+    pooled = simulate(max_workers=2)
+    assert in_process == pooled
+
+
+def test_percentiles_are_ordered_every_year():
+    bands = simulate(max_workers=1)['annual_cumulative_percentiles_kg']
+    for year in range(1, 11):
+        assert bands['P5'][year] <= bands['P50'][year] <= bands['P95'][year]
+    # Cumulative carbon only grows
+    assert all(bands['P50'][year] <= bands['P50'][year + 1] for year in range(1, 10))
+
+
+def test_null_catalog_fields_take_the_defaults():
+    nulls = {'carbon_seq_rate_cv': None, 'maturity_midpoint_years': None, 'maturity_steepness': None, 'annual_mortality_rate': None}
+    pine = SELECTIONS[2]
+    assert simulate([{**pine, **nulls}], max_workers=1) == simulate([pine], max_workers=1)
+
+
+def test_unreadable_growth_values_skip_the_plant(capsys):
+    result = simulate([SELECTIONS[2], {**SELECTIONS[0], 'maturity_steepness': 'fast'}], max_workers=1)
+    assert result == simulate([SELECTIONS[2]], max_workers=1)
+    assert 'Skipping plant' in capsys.readouterr().out
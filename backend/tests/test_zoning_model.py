@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backend.src.ai_pipeline.microclimate_analysis.analyzer import FEATURE_COLUMNS
+from backend.src.ai_pipeline.microclimate_analysis.zoning_model import ZoningModelStore
+
+SITE_CONDITIONS = np.array([[28.0, 35.0, 80.0], [18.0, 70.0, 900.0], [12.0, 60.0, 650.0]])
+
+
+def readings(n: int, seed: int, centres: np.ndarray = SITE_CONDITIONS) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    centre = centres[rng.integers(0, len(centres), n)]
+    return pd.DataFrame(centre + rng.normal(0, (1.0, 3.0, 40.0), centre.shape), columns=FEATURE_COLUMNS)
+
+
+def test_repeated_batch_is_not_counted_twice(tmp_path):
+    store = ZoningModelStore(str(tmp_path))
+    store.fit_or_update('site', readings(500, seed=0), n_clusters=3)
+    batch = readings(100, seed=1)
+    model, first = store.fit_or_update('site', batch)
+    total = model.counts.sum()
+
+    model, again = store.fit_or_update('site', batch)
+    assert model.counts.sum() == total == 600
+    assert np.array_equal(first, again)
+
+    # The record of absorbed batches survives a reload
+    reopened = ZoningModelStore(str(tmp_path))
+    model, _ = reopened.fit_or_update('site', batch)
+    assert model.counts.sum() == 600
+
+
+def test_labels_and_zones_come_from_the_final_centroids(tmp_path):
+    store = ZoningModelStore(str(tmp_path))
+    store.fit_or_update('site', readings(300, seed=0), n_clusters=3)
+    # Readings between two zones: folding them in moves the centroids they were assigned to
+    shifted = readings(200, seed=2, centres=np.array([[23.0, 52.0, 490.0]]))
+    model, labels = store.fit_or_update('site', shifted)
+
+    assert np.array_equal(labels, model.predict(shifted))
+    zones = model.describe(shifted, labels)
+    assert {zone['cluster_id'] for zone in zones} == set(labels.tolist())
+    assert sum(zone['count'] for zone in zones) == len(shifted)
+
+
+def test_concurrent_first_fits_share_one_model(tmp_path):
+    store = ZoningModelStore(str(tmp_path))
+    batches = [readings(300, seed=seed) for seed in range(4)]
+    start = threading.Barrier(len(batches))
+
+    def first_request(batch):
+        start.wait()
+        return store.fit_or_update('site', batch, n_clusters=3)
+
+    with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+        results = list(pool.map(first_request, batches))
+
+    # One fit, with the other batches folded into it, rather than one model per request
+    model = store.get('site')
+    assert all(returned is model for returned, _ in results)
+    assert model.counts.sum() == sum(len(batch) for batch in batches)
+    assert ZoningModelStore(str(tmp_path)).get('site').counts.sum() == model.counts.sum()